@@ -0,0 +1,43 @@
+import hashlib
+from datetime import datetime
+from email.utils import format_datetime
+from fastapi import Request, Response
+
+
+# Responses are per user (bearer auth) and must be revalidated on every use: browsers
+# keep them, shared caches don't, and a matching If-None-Match costs a 304 and no body.
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    # Strong validator over the data versions the body was built from plus whatever
+    # else selects the representation (path, query, encoding)
+    return '"' + hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest() + '"'
+
+
+def request_key(request: Request) -> tuple:
+    return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+
+def matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def cache_headers(etag: str, last_modified: datetime | None = None) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def not_modified(etag: str, last_modified: datetime | None = None, vary: str | None = None) -> Response:
+    headers = cache_headers(etag, last_modified)
+    if vary:
+        headers["Vary"] = vary
+    return Response(status_code=304, headers=headers)
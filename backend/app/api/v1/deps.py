@@ -1,22 +1,20 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.concurrency import run_in_threadpool
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import SessionLocal
 from app.db.models import User
+from app.services.principal_cache import Principal, principal_cache
 
 
 reusable_oauth2 = HTTPBearer(auto_error=False)
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials | None = Depends(reusable_oauth2),
-    db: Session = Depends(get_db),
-) -> User:
-    if credentials is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    token = credentials.credentials
+def authenticate_token(token: str) -> Principal:
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
         sub: str | None = payload.get("sub")
@@ -25,14 +23,50 @@ def get_current_user(
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.query(User).filter(User.email == sub).first()
-    if not user or not user.is_active:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
-    return user
+    # Version first: a user change racing this lookup leaves the entry already stale
+    users_version = principal_cache.users_version()
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.email == sub).first()
+        if not user or not user.is_active:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
+        principal = Principal(id=user.id, email=user.email, role=user.role, is_active=user.is_active)
+    principal_cache.put(token, principal, payload.get("exp"), users_version)
+    return principal
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(reusable_oauth2),
+) -> Principal:
+    if credentials is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    return await resolve_token(credentials.credentials)
+
+
+async def resolve_token(token: str) -> Principal:
+    # Cache hits are answered on the loop; anything that needs the database (a miss, or
+    # the users version due for a re-read) runs in the threadpool
+    principal = principal_cache.peek(token)
+    if principal is not None:
+        return principal
+    return await run_in_threadpool(authenticate_token, token)
+
+
+async def get_stream_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(reusable_oauth2),
+    access_token: str | None = Query(None),
+) -> str:
+    # Same check as get_current_user, but the browser's EventSource cannot set headers,
+    # so the token may also come as ?access_token=. Returned so long-lived streams can
+    # re-check it.
+    token = credentials.credentials if credentials is not None else access_token
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    await resolve_token(token)
+    return token
 
 
 def require_roles(*roles: str):
-    def role_checker(user: User = Depends(get_current_user)) -> User:
+    async def role_checker(user: Principal = Depends(get_current_user)) -> Principal:
         if roles and user.role not in roles:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
         return user
@@ -2,13 +2,16 @@ from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
-from app.db.session import get_db
+from app.api.v1.deps import require_roles
+from app.db.session import DbSession, get_db, run_db
 from app.db.models import User
 from app.core.security import (
     create_access_token,
     create_refresh_token,
-    get_password_hash,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
+    password_needs_rehash,
+    hash_stats,
     set_refresh_cookie,
     clear_refresh_cookie,
     REFRESH_COOKIE_NAME,
@@ -31,19 +34,29 @@ class LoginRequest(BaseModel):
     password: str
 
 
+def _get_user_by_email(db: Session, email: str) -> User | None:
+    return db.query(User).filter(User.email == email).first()
+
+
+def _save(db: Session, instance) -> None:
+    db.add(instance)
+    db.commit()
+    db.refresh(instance)
+
+
+# bcrypt waits in the hash pool queue, DB calls go through run_db: no request thread is
+# held for either.
 @router.post("/seed-admin", response_model=TokenResponse)
-def seed_admin(response: Response, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == "admin@sg.com").first()
+async def seed_admin(response: Response, db: DbSession = Depends(get_db)):
+    user = await run_db(db, _get_user_by_email, "admin@sg.com")
     if not user:
         user = User(
             email="admin@sg.com",
-            hashed_password=get_password_hash("admin123"),
+            hashed_password=await hash_password_async("admin123"),
             role="ADMIN",
             is_active=True,
         )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+        await run_db(db, _save, user)
 
     access = create_access_token(user.email)
     refresh = create_refresh_token(user.email)
@@ -52,10 +65,13 @@ def seed_admin(response: Response, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(payload: LoginRequest, response: Response, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.hashed_password) or not user.is_active:
+async def login(payload: LoginRequest, response: Response, db: DbSession = Depends(get_db)):
+    user = await run_db(db, _get_user_by_email, payload.email)
+    if not user or not await verify_password_async(payload.password, user.hashed_password) or not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid credentials")
+    if settings.password_rehash_on_login and password_needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password_async(payload.password)
+        await run_db(db, _save, user)
     access = create_access_token(user.email)
     refresh = create_refresh_token(user.email)
     set_refresh_cookie(response, refresh)
@@ -63,7 +79,7 @@ def login(payload: LoginRequest, response: Response, db: Session = Depends(get_d
 
 
 @router.post("/refresh", response_model=TokenResponse)
-def refresh_token(request: Request, response: Response, db: Session = Depends(get_db)):
+async def refresh_token(request: Request, response: Response, db: DbSession = Depends(get_db)):
     token = request.cookies.get(REFRESH_COOKIE_NAME)
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing refresh token")
@@ -75,7 +91,7 @@ def refresh_token(request: Request, response: Response, db: Session = Depends(ge
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
-    user = db.query(User).filter(User.email == email).first()
+    user = await run_db(db, _get_user_by_email, email)
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
 
@@ -89,3 +105,16 @@ def refresh_token(request: Request, response: Response, db: Session = Depends(ge
 def logout(response: Response):
     clear_refresh_cookie(response)
     return {"detail": "Logged out"}
+
+
+@router.get("/hash-stats", dependencies=[Depends(require_roles("ADMIN"))])
+def password_hash_stats():
+    completed = hash_stats["completed"]
+    # Every call that got a slot waited for it, failed or not
+    started = completed + hash_stats["failed"]
+    return {
+        **hash_stats,
+        "workers": settings.password_hash_workers,
+        "latency_avg_s": hash_stats["latency_total_s"] / completed if completed else 0.0,
+        "wait_avg_s": hash_stats["wait_total_s"] / started if started else 0.0,
+    }
@@ -1,14 +1,19 @@
-from datetime import datetime
-from io import StringIO
-import csv
+import base64
+import json
+from datetime import date, datetime
 from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Response, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, UploadFile, File, Response, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import asc, desc
+from sqlalchemy import asc, desc, insert, select, tuple_
 from pydantic import BaseModel
+from app.api.v1 import conditional
 from app.api.v1.deps import require_roles, get_current_user
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import DbSession, WriterSessionLocal, get_db, get_writer_db, run_db
 from app.db import models
+from app.services import batch, export, group_commit, import_jobs, importer, rollup, search, versions
 
 
 router = APIRouter()
@@ -30,19 +35,92 @@ def build_filters(query, model, params: dict[str, Any]):
     if "to" in params and params["to"]:
         query = query.filter(model.date <= parse_date(params["to"]))
     if model is models.Delay and params.get("customer"):
-        query = query.filter(models.Delay.customer.ilike(f"%{params['customer']}%"))
+        query = query.filter(search.search_clause(models.Delay, params["customer"], ("customer",)))
     if model is models.Breakage and params.get("sector"):
         query = query.filter(models.Breakage.sector == params["sector"])
+    if params.get("q"):
+        if model not in search.SEARCH_COLUMNS:
+            raise HTTPException(status_code=400, detail=f"Search is not supported for {model.__tablename__}")
+        query = query.filter(search.search_clause(model, params["q"]))
     return query
 
 
-def apply_pagination_and_sort(query, model, order_by: str | None, is_desc: bool, limit: int, offset: int):
-    if order_by:
-        column = getattr(model, order_by, None)
-        if column is not None:
-            query = query.order_by(desc(column) if is_desc else asc(column))
-    else:
-        query = query.order_by(desc(model.id))
+# Indexed sort columns per dataset. Each one, and the default order (date, id) desc, is
+# served by a (column, date, id) index (models.py), so these orders walk an index instead
+# of sorting in a temp B-tree; `app.cli plans check` enforces this. Any other column is
+# still accepted as order_by, sorted as (column, id) without an index.
+SORT_COLUMNS = {
+    models.Entry: ("date",),
+    models.Delay: ("date", "customer"),
+    models.Breakage: ("date", "sector"),
+    models.Complaint: ("date", "customer"),
+}
+
+
+def sort_key(model, order_by: str | None, is_desc: bool):
+    # Returns the ordering columns (always ending in id, so pages are deterministic) and
+    # direction. Default, and for unknown columns: newest first, (date, id) desc.
+    table = model.__table__
+    if order_by is None or order_by not in table.c:
+        return [table.c.date, table.c.id], True
+    if order_by in SORT_COLUMNS[model]:
+        if order_by == "date":
+            return [table.c.date, table.c.id], is_desc
+        return [table.c[order_by], table.c.date, table.c.id], is_desc
+    column = table.c[order_by]
+    if column is table.c.id:
+        return [table.c.id], is_desc
+    return [column, table.c.id], is_desc
+
+
+def encode_cursor(order_by: str | None, is_desc: bool, values: list[Any]) -> str:
+    values = [v.isoformat() if isinstance(v, date) else v for v in values]
+    raw = json.dumps({"o": order_by, "d": is_desc, "k": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, columns) -> tuple[str | None, bool, list[Any]]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        values = data["k"]
+        if len(values) != len(columns):
+            raise ValueError("cursor does not match sort")
+        decoded = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            decoded.append(date.fromisoformat(value) if python_type is date else python_type(value))
+        return data["o"], bool(data["d"]), decoded
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def next_cursor(model, order_by: str | None, is_desc: bool, rows: list, limit: int | None) -> str | None:
+    # Only a full page can have a successor
+    if not rows or limit is None or len(rows) < limit:
+        return None
+    columns, _ = sort_key(model, order_by, is_desc)
+    # Same rule as apply_pagination_and_sort: a nullable key can't be seeked past
+    if any(c.nullable for c in columns):
+        return None
+    last = rows[-1]
+    return encode_cursor(order_by, is_desc, [getattr(last, c.key) for c in columns])
+
+
+def apply_pagination_and_sort(
+    query, model, order_by: str | None, is_desc: bool, limit: int | None, offset: int, cursor: str | None = None
+):
+    columns, descending = sort_key(model, order_by, is_desc)
+    if cursor:
+        if any(c.nullable for c in columns):
+            raise HTTPException(status_code=400, detail=f"Cursor pagination is not supported for order_by={order_by}")
+        cursor_order_by, cursor_desc, values = decode_cursor(cursor, columns)
+        if cursor_order_by != order_by or cursor_desc != is_desc:
+            raise HTTPException(status_code=400, detail="Cursor was issued for a different sort order")
+        # Row-value seek: served straight from the (col, id) index, so every page costs the same
+        key, bound = (columns[0], values[0]) if len(columns) == 1 else (tuple_(*columns), tuple_(*values))
+        query = query.filter(key < bound if descending else key > bound)
+        offset = 0
+    query = query.order_by(*[desc(c) if descending else asc(c) for c in columns])
     return query.limit(limit).offset(offset)
 
 
@@ -80,126 +158,223 @@ class ComplaintIn(BaseModel):
     description: str | None = None
 
 
-def create_instance(model, data: dict[str, Any]):
+def coerce_dates(data: dict[str, Any]) -> dict[str, Any]:
     data = data.copy()
     if "date" in data and isinstance(data["date"], str):
         data["date"] = parse_date(data["date"])  # type: ignore
-    return model(**data)
+    return data
 
 
-def stream_csv(rows: list[dict[str, Any]]) -> str:
-    output = StringIO()
-    if not rows:
-        return ""
-    writer = csv.DictWriter(output, fieldnames=list(rows[0].keys()))
-    writer.writeheader()
-    for row in rows:
-        writer.writerow(row)
-    return output.getvalue()
+def select_fields(model, fields: str | None) -> list[str]:
+    names = model.__table__.columns.keys()
+    if not fields:
+        return names
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in names]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+    return requested
+
+
+def fetch_all(db: Session, stmt) -> list:
+    return db.execute(stmt).all()
+
+
+def list_statement(
+    model, names: list[str], params: dict[str, Any], order_by: str | None, is_desc: bool,
+    limit: int | None, offset: int, cursor: str | None = None,
+):
+    # Core select of just the needed columns: no ORM objects, no identity map. Sort
+    # columns ride along for the cursor and are dropped from the output.
+    sort_columns, _ = sort_key(model, order_by, is_desc)
+    extra = [c for c in sort_columns if c.key not in names]
+    stmt = select(*[model.__table__.c[n] for n in names], *extra)
+    stmt = build_filters(stmt, model, params)
+    return apply_pagination_and_sort(stmt, model, order_by, is_desc, limit, offset, cursor)
+
+
+def export_statement(model, params: dict[str, Any], order_by: str | None, is_desc: bool, limit: int | None, offset: int):
+    stmt = select(model.__table__)
+    stmt = build_filters(stmt, model, params)
+    return apply_pagination_and_sort(stmt, model, order_by, is_desc, limit, offset)
 
 
 def list_endpoint(model):
-    def endpoint(
-        db: Session = Depends(get_db),
+    async def endpoint(
+        request: Request,
+        db: DbSession = Depends(get_db),
         _user=Depends(get_current_user),
         from_: str | None = Query(None, alias="from"),
         to: str | None = None,
         customer: str | None = None,
         sector: str | None = None,
+        q: str | None = Query(None, min_length=1, max_length=200),
         order_by: str | None = None,
         desc_: bool = Query(False, alias="desc"),
         limit: int = 100,
         offset: int = 0,
+        cursor: str | None = None,
+        fields: str | None = None,
+        shape: str = Query("records", pattern="^(records|rows)$"),
     ):
-        params = {"from": from_, "to": to, "customer": customer, "sector": sector}
-        query = db.query(model)
-        query = build_filters(query, model, params)
-        query = apply_pagination_and_sort(query, model, order_by, desc_, limit, offset)
-        results = query.all()
-        # Serialize to dicts
-        payload = []
-        for r in results:
-            d = {c: getattr(r, c) for c in r.__table__.columns.keys()}
-            if isinstance(d.get("date"), (datetime,)):
-                d["date"] = d["date"].date().isoformat()
-            elif d.get("date"):
-                d["date"] = d["date"].isoformat()
-            payload.append(d)
-        return payload
+        params = {"from": from_, "to": to, "customer": customer, "sector": sector, "q": q}
+        names = select_fields(model, fields)
+        stmt = list_statement(model, names, params, order_by, desc_, limit, offset, cursor)
+        # Versions before the query: the body is never older than its ETag
+        etag = conditional.make_etag(await versions.snapshot_async((model.__tablename__,)), conditional.request_key(request))
+        if conditional.matches(request, etag):
+            return conditional.not_modified(etag)
+        rows = await run_db(db, fetch_all, stmt)
+        headers = conditional.cache_headers(etag)
+        token = next_cursor(model, order_by, desc_, rows, limit)
+        if token:
+            headers["X-Next-Cursor"] = token
+        width = len(names)
+        if shape == "rows":
+            content: Any = {"columns": names, "rows": [row[:width] for row in rows]}
+        else:
+            content = [dict(zip(names, row)) for row in rows]
+        return ORJSONResponse(content, headers=headers)
 
     return endpoint
 
 
+def stored_row(d: dict[str, Any]) -> dict[str, Any]:
+    if d.get("date"):
+        d["date"] = d["date"].isoformat()
+    return d
+
+
+def insert_row(db: Session, model, data: dict[str, Any]) -> dict[str, Any]:
+    # RETURNING hands back the stored row: no refresh SELECT after the commit
+    d = dict(db.execute(insert(model.__table__).values(**data).returning(*model.__table__.c)).mappings().one())
+    rollup.apply_rows(db, model, [data])
+    versions.bump(db, model.__tablename__)
+    db.commit()
+    return stored_row(d)
+
+
 def create_endpoint(model, schema_cls):
-    def endpoint(payload: schema_cls, db: Session = Depends(get_db), _user=Depends(require_roles("SUPERVISOR", "ADMIN"))):
-        instance = create_instance(model, payload.model_dump())
-        db.add(instance)
-        db.commit()
-        db.refresh(instance)
-        d = {c: getattr(instance, c) for c in instance.__table__.columns.keys()}
-        if d.get("date"):
-            d["date"] = d["date"].isoformat()
-        return d
+    # Writes go through the writer session (a single serialized connection on SQLite),
+    # or with GROUP_COMMIT_ENABLED are queued and committed together with concurrent ones
+    if settings.group_commit_enabled:
+
+        async def endpoint(payload: schema_cls, _user=Depends(require_roles("SUPERVISOR", "ADMIN"))):
+            return stored_row(await group_commit.writer.insert(model, coerce_dates(payload.model_dump())))
+
+        return endpoint
+
+    async def endpoint(payload: schema_cls, db: Session = Depends(get_writer_db), _user=Depends(require_roles("SUPERVISOR", "ADMIN"))):
+        return await run_db(db, insert_row, model, coerce_dates(payload.model_dump()))
+
+    return endpoint
+
+
+def batch_endpoint(model, schema_cls):
+    # Up to BATCH_MAX_ROWS rows in one transaction; Entry and Delay upsert on their
+    # natural keys (services/batch.py)
+    async def endpoint(
+        payload: list[schema_cls] = Body(..., min_length=1),
+        db: Session = Depends(get_writer_db),
+        _user=Depends(require_roles("SUPERVISOR", "ADMIN")),
+    ):
+        if len(payload) > settings.batch_max_rows:
+            raise HTTPException(status_code=413, detail=f"At most {settings.batch_max_rows} rows per batch")
+        rows, errors = [], []
+        for index, item in enumerate(payload):
+            try:
+                rows.append(coerce_dates(item.model_dump()))
+            except HTTPException as e:
+                errors.append({"index": index, "detail": e.detail})
+        if not errors:
+            errors = batch.duplicate_keys(model, rows)
+        if errors:
+            raise HTTPException(status_code=422, detail=errors)
+        return await run_db(db, batch.write_batch, model, rows)
 
     return endpoint
 
 
+def run_import(model, columns: list[str], file: UploadFile, chunk_size: int | None) -> dict[str, Any]:
+    # CPU-bound parsing: always in the threadpool on a sync session, in either DB mode
+    with WriterSessionLocal() as db:
+        return importer.import_csv(db, model, columns, file.file, chunk_size)
+
+
 def import_endpoint(model, columns: list[str]):
     async def endpoint(
         file: UploadFile = File(...),
-        db: Session = Depends(get_db),
+        chunk_size: int | None = Query(None, ge=1),
         _user=Depends(require_roles("SUPERVISOR", "ADMIN")),
     ):
-        content = (await file.read()).decode("utf-8")
-        reader = csv.DictReader(StringIO(content))
-        count = 0
-        for row in reader:
-            data = {col: row.get(col) for col in columns}
-            try:
-                # Coerce types
-                if "date" in data and data["date"] is not None:
-                    data["date"] = parse_date(data["date"])  # type: ignore
-                float_fields = {"pedidos_m2", "forno_m2", "days_late", "order_value", "qty_m2", "qty"}
-                for f in float_fields:
-                    if f in data and data[f] not in (None, ""):
-                        data[f] = float(data[f])
-                instance = model(**data)
-                db.add(instance)
-                count += 1
-            except Exception as e:  # skip bad lines
-                continue
-        db.commit()
-        return {"inserted": count}
+        return await run_in_threadpool(run_import, model, columns, file, chunk_size)
+
+    return endpoint
+
+
+def import_job_endpoint(model):
+    # Large files: spooled to disk and imported in the background (GET /import-jobs/{id})
+    async def endpoint(
+        file: UploadFile = File(...),
+        chunk_size: int | None = Query(None, ge=1),
+        user=Depends(require_roles("SUPERVISOR", "ADMIN")),
+    ):
+        def create() -> dict[str, Any]:
+            with WriterSessionLocal() as db:
+                job = import_jobs.create_job(db, model, file.file, file.filename, chunk_size, user.email)
+                return import_jobs.serialize(job)
+
+        job = await run_in_threadpool(create)
+        import_jobs.submit(job["id"])
+        return job
 
     return endpoint
 
 
 def export_endpoint(model):
-    def endpoint(
-        db: Session = Depends(get_db),
+    async def endpoint(
+        request: Request,
+        db: DbSession = Depends(get_db),
         _user=Depends(get_current_user),
         from_: str | None = Query(None, alias="from"),
         to: str | None = None,
         customer: str | None = None,
         sector: str | None = None,
+        q: str | None = Query(None, min_length=1, max_length=200),
         order_by: str | None = None,
         desc_: bool = Query(False, alias="desc"),
-        limit: int = 10000,
+        limit: int | None = None,
         offset: int = 0,
+        format_: str = Query("csv", alias="format", pattern="^(csv|ndjson|arrow|parquet)$"),
+        compression: str | None = None,
     ):
-        params = {"from": from_, "to": to, "customer": customer, "sector": sector}
-        query = db.query(model)
-        query = build_filters(query, model, params)
-        query = apply_pagination_and_sort(query, model, order_by, desc_, limit, offset)
-        results = query.all()
-        rows: list[dict[str, Any]] = []
-        for r in results:
-            d = {c: getattr(r, c) for c in r.__table__.columns.keys()}
-            if d.get("date"):
-                d["date"] = d["date"].isoformat()
-            rows.append(d)
-        csv_text = stream_csv(rows)
-        return Response(content=csv_text, media_type="text/csv")
+        params = {"from": from_, "to": to, "customer": customer, "sector": sector, "q": q}
+        stmt = export_statement(model, params, order_by, desc_, limit, offset)
+        fmt = export.FORMATS[format_]
+        if compression is None:
+            # Text formats follow Accept-Encoding; columnar ones compress inside the file
+            compression = fmt.compressions[0]
+            if fmt.http_compressed and not export.accepts_gzip(request.headers.get("accept-encoding")):
+                compression = "none"
+        elif compression not in fmt.compressions:
+            allowed = ", ".join(fmt.compressions)
+            raise HTTPException(status_code=400, detail=f"compression for {format_} must be one of: {allowed}")
+        gzip = fmt.http_compressed and compression == "gzip"
+        keys = (model.__tablename__,)
+        # Gzipped and identity bodies are different representations: different ETags
+        etag = conditional.make_etag(await versions.snapshot_async(keys), conditional.request_key(request), gzip)
+        last_modified = await run_db(db, versions.last_modified, keys)
+        if conditional.matches(request, etag):
+            return conditional.not_modified(etag, last_modified, vary="Accept-Encoding")
+        headers = {
+            "Content-Disposition": f'attachment; filename="{model.__tablename__}.{fmt.extension}"',
+            "Vary": "Accept-Encoding",
+            **conditional.cache_headers(etag, last_modified),
+        }
+        if gzip:
+            headers["Content-Encoding"] = "gzip"
+        body = export.iter_export(stmt, format_, compression)
+        return StreamingResponse(body, media_type=fmt.media_type, headers=headers)
 
     return endpoint
 
@@ -207,23 +382,31 @@ def export_endpoint(model):
 # Entries
 router.get("/entries")(list_endpoint(models.Entry))
 router.post("/entries")(create_endpoint(models.Entry, EntryIn))
-router.post("/entries/import")(import_endpoint(models.Entry, ["date", "shift", "pedidos_m2", "forno_m2", "notes"]))
+router.post("/entries/batch")(batch_endpoint(models.Entry, EntryIn))
+router.post("/entries/import")(import_endpoint(models.Entry, importer.IMPORT_COLUMNS[models.Entry]))
+router.post("/entries/import/jobs", status_code=202)(import_job_endpoint(models.Entry))
 router.get("/entries/export")(export_endpoint(models.Entry))
 
 # Delays
 router.get("/delays")(list_endpoint(models.Delay))
 router.post("/delays")(create_endpoint(models.Delay, DelayIn))
-router.post("/delays/import")(import_endpoint(models.Delay, ["date", "order_code", "customer", "days_late", "reason", "order_value"]))
+router.post("/delays/batch")(batch_endpoint(models.Delay, DelayIn))
+router.post("/delays/import")(import_endpoint(models.Delay, importer.IMPORT_COLUMNS[models.Delay]))
+router.post("/delays/import/jobs", status_code=202)(import_job_endpoint(models.Delay))
 router.get("/delays/export")(export_endpoint(models.Delay))
 
 # Breakages
 router.get("/breakages")(list_endpoint(models.Breakage))
 router.post("/breakages")(create_endpoint(models.Breakage, BreakageIn))
-router.post("/breakages/import")(import_endpoint(models.Breakage, ["date", "sector", "type", "operator", "qty_m2", "notes"]))
+router.post("/breakages/batch")(batch_endpoint(models.Breakage, BreakageIn))
+router.post("/breakages/import")(import_endpoint(models.Breakage, importer.IMPORT_COLUMNS[models.Breakage]))
+router.post("/breakages/import/jobs", status_code=202)(import_job_endpoint(models.Breakage))
 router.get("/breakages/export")(export_endpoint(models.Breakage))
 
 # Complaints
 router.get("/complaints")(list_endpoint(models.Complaint))
 router.post("/complaints")(create_endpoint(models.Complaint, ComplaintIn))
-router.post("/complaints/import")(import_endpoint(models.Complaint, ["date", "customer", "type", "qty", "description"]))
+router.post("/complaints/batch")(batch_endpoint(models.Complaint, ComplaintIn))
+router.post("/complaints/import")(import_endpoint(models.Complaint, importer.IMPORT_COLUMNS[models.Complaint]))
+router.post("/complaints/import/jobs", status_code=202)(import_job_endpoint(models.Complaint))
 router.get("/complaints/export")(export_endpoint(models.Complaint))
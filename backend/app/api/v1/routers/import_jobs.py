@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.api.v1.deps import require_roles
+from app.db.models import JOB_STATUSES, ImportJob, ImportJobError
+from app.db.session import DbSession, get_db, get_writer_db, run_db
+from app.services import import_jobs
+
+
+router = APIRouter(dependencies=[Depends(require_roles("SUPERVISOR", "ADMIN"))])
+
+
+def get_job(db: Session, job_id: str) -> ImportJob:
+    job = db.get(ImportJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
+def _list_jobs(db: Session, status: str | None, dataset: str | None, limit: int) -> list[dict]:
+    stmt = select(ImportJob).order_by(ImportJob.created_at.desc()).limit(limit)
+    if status:
+        stmt = stmt.where(ImportJob.status == status)
+    if dataset:
+        stmt = stmt.where(ImportJob.dataset == dataset)
+    return [import_jobs.serialize(job) for job in db.scalars(stmt)]
+
+
+@router.get("/")
+async def list_jobs(
+    db: DbSession = Depends(get_db),
+    status: str | None = Query(None, pattern=f"^({'|'.join(JOB_STATUSES)})$"),
+    dataset: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    return await run_db(db, _list_jobs, status, dataset, limit)
+
+
+def _job_status(db: Session, job_id: str) -> dict:
+    return import_jobs.serialize(get_job(db, job_id))
+
+
+@router.get("/{job_id}")
+async def job_status(job_id: str, db: DbSession = Depends(get_db)):
+    return await run_db(db, _job_status, job_id)
+
+
+def _job_errors(db: Session, job_id: str, limit: int, offset: int) -> dict:
+    job = get_job(db, job_id)
+    rows = db.execute(
+        select(ImportJobError.line, ImportJobError.reason)
+        .where(ImportJobError.job_id == job_id)
+        .order_by(ImportJobError.line, ImportJobError.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    errors = [{"line": line, "reason": reason} for line, reason in rows]
+    return {"failed": job.failed, "errors": errors}
+
+
+@router.get("/{job_id}/errors")
+async def job_errors(
+    job_id: str,
+    db: DbSession = Depends(get_db),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    return await run_db(db, _job_errors, job_id, limit, offset)
+
+
+def _cancel_job(db: Session, job_id: str) -> dict:
+    job = get_job(db, job_id)
+    if job.status in ("succeeded", "cancelled"):
+        raise HTTPException(status_code=409, detail=f"Import job is already {job.status}")
+    import_jobs.request_cancel(db, job)
+    return import_jobs.serialize(job)
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str, db: Session = Depends(get_writer_db)):
+    return await run_db(db, _cancel_job, job_id)
+
+
+def _retry_job(db: Session, job_id: str) -> dict:
+    job = get_job(db, job_id)
+    if not import_jobs.retry(db, job):
+        raise HTTPException(status_code=409, detail="Only failed jobs with their upload still spooled can be retried")
+    return import_jobs.serialize(job)
+
+
+@router.post("/{job_id}/retry")
+async def retry_job(job_id: str, db: Session = Depends(get_writer_db)):
+    job = await run_db(db, _retry_job, job_id)
+    import_jobs.submit(job_id)
+    return job
@@ -1,16 +1,231 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.api.v1.deps import get_current_user
-from app.db.session import get_db
-from app.services.kpi_calculator import kpis_overview
-from app.services.report_text import build_executive_text
+import asyncio
+import time
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from app.api.v1 import conditional
+from app.api.v1.deps import get_current_user, get_stream_token, resolve_token
+from app.core.config import settings
+from app.db.session import DbSession, get_db, run_db
+from app.services import cube, kpi_stream, reports, simulation, timeseries, versions
+from app.services.kpi_cache import compute_overview, overview_cache, overview_window
+from app.services.kpi_calculator import GOAL_DEFAULTS, OVERVIEW_DAYS, get_goal_values, overview_start
 
 
 router = APIRouter()
 
 
+class SimulationIn(BaseModel):
+    from_: date | None = Field(None, alias="from")
+    to: date | None = None
+    # Candidate values per goal key; goals left out keep their stored value
+    goals: dict[str, list[float]] = {}
+    day_shifts: list[str] | None = None
+    night_shifts: list[str] | None = None
+
+
 @router.get("/overview")
-def overview(db: Session = Depends(get_db), _user=Depends(get_current_user)):
-    kpis = kpis_overview(db)
-    kpis["executive_text"] = build_executive_text(kpis)
+async def overview(request: Request, response: Response, db: DbSession = Depends(get_db), _user=Depends(get_current_user)):
+    window = overview_window()
+    if not settings.kpi_cache_enabled:
+        etag = conditional.make_etag(await versions.snapshot_async(versions.KPI_KEYS), window)
+        if conditional.matches(request, etag):
+            return conditional.not_modified(etag)
+        kpis = await run_db(db, compute_overview)
+    else:
+        entry = overview_cache.peek_entry(window) or await run_in_threadpool(overview_cache.get_entry, window)
+        tag, kpis = entry
+        etag = conditional.make_etag(tag, window)
+        if conditional.matches(request, etag):
+            return conditional.not_modified(etag)
+    response.headers.update(conditional.cache_headers(etag))
     return kpis
+
+
+@router.get("/timeseries")
+async def timeseries_endpoint(
+    request: Request,
+    from_: date | None = Query(None, alias="from"),
+    to: date | None = None,
+    interval: str = Query("day", pattern="^(day|week|month)$"),
+    metrics: str | None = None,
+    _user=Depends(get_current_user),
+):
+    # Served from memory: no DB access unless the store is cold or another worker wrote
+    last = to or date.today()
+    first = from_ or last - timedelta(days=89)
+    if first > last:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    if (last - first).days >= settings.timeseries_max_days:
+        raise HTTPException(status_code=400, detail=f"At most {settings.timeseries_max_days} days per request")
+    selected = tuple(m.strip() for m in metrics.split(",") if m.strip()) if metrics else timeseries.METRICS
+    unknown = sorted(set(selected) - set(timeseries.METRICS))
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"metrics must be among: {', '.join(timeseries.METRICS)}")
+    store = timeseries.store
+    if store.is_stale(await versions.snapshot_async(versions.DATASET_KEYS)):
+        await run_in_threadpool(store.ensure_fresh)
+    # Tag before reading: the body is at least as new as its ETag
+    etag = conditional.make_etag(store.tag(), conditional.request_key(request), first, last)
+    if conditional.matches(request, etag):
+        return conditional.not_modified(etag)
+    return ORJSONResponse(store.series(first, last, interval, selected), headers=conditional.cache_headers(etag))
+
+
+@router.get("/breakdown/{dataset}")
+async def breakdown(
+    dataset: str,
+    request: Request,
+    from_: date | None = Query(None, alias="from"),
+    to: date | None = None,
+    by: str | None = None,
+    measure: str | None = None,
+    top: int = Query(10, ge=1, le=1000),
+    _user=Depends(get_current_user),
+):
+    # Pareto view over the in-memory cube; any dimension can also be passed as a filter
+    # (repeat it for several values): ?by=sector&type=Trinca&type=Quebra
+    target = cube.CUBES.get(dataset)
+    if target is None:
+        raise HTTPException(status_code=404, detail=f"No breakdown for {dataset}")
+    dims, measures = target.spec.dimensions, tuple(target.spec.measures)
+    last = to or date.today()
+    first = from_ or last - timedelta(days=89)
+    if first > last:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    grouped = tuple(d.strip() for d in by.split(",") if d.strip()) if by else dims[:1]
+    if set(grouped) - set(dims) or len(set(grouped)) != len(grouped):
+        raise HTTPException(status_code=400, detail=f"by must be distinct dimensions among: {', '.join(dims)}")
+    measure = measure or measures[0]
+    if measure not in measures:
+        raise HTTPException(status_code=400, detail=f"measure must be one of: {', '.join(measures)}")
+    filters = {d: request.query_params.getlist(d) for d in dims if d in request.query_params}
+    await run_in_threadpool(target.ensure_fresh)
+    etag = conditional.make_etag(target.tag(), conditional.request_key(request), first, last)
+    if conditional.matches(request, etag):
+        return conditional.not_modified(etag)
+    content = await run_in_threadpool(target.query, first, last, grouped, measure, filters, top)
+    return ORJSONResponse(content, headers=conditional.cache_headers(etag))
+
+
+@router.post("/simulate")
+async def simulate(payload: SimulationIn, db: DbSession = Depends(get_db), _user=Depends(get_current_user)):
+    # What-if over candidate goal values: nothing is written, the stored goals only fill
+    # in the keys left out and give the baseline
+    last = payload.to or date.today()
+    first = payload.from_ or overview_start(last)
+    if first > last:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    if (last - first).days >= settings.timeseries_max_days:
+        raise HTTPException(status_code=400, detail=f"At most {settings.timeseries_max_days} days per request")
+    unknown = sorted(set(payload.goals) - set(simulation.GOAL_KEYS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"goals must be among: {', '.join(simulation.GOAL_KEYS)}")
+    scenarios = 1
+    for values in payload.goals.values():
+        scenarios *= max(len(values), 1)
+    if scenarios > settings.simulate_max_scenarios:
+        raise HTTPException(status_code=400, detail=f"At most {settings.simulate_max_scenarios} scenarios per request")
+    current = await run_db(db, get_goal_values, GOAL_DEFAULTS)
+    if timeseries.store.is_stale(await versions.snapshot_async(versions.DATASET_KEYS)):
+        await run_in_threadpool(timeseries.store.ensure_fresh)
+    await run_in_threadpool(cube.CUBES["entries"].ensure_fresh)
+    content = await run_in_threadpool(
+        simulation.simulate,
+        first,
+        last,
+        payload.goals,
+        current,
+        settings.day_shifts if payload.day_shifts is None else payload.day_shifts,
+        settings.night_shifts if payload.night_shifts is None else payload.night_shifts,
+        # Without `from`, the overview's window: rated like the overview, so the baseline
+        # matches its utilization_pct
+        OVERVIEW_DAYS if payload.from_ is None else None,
+    )
+    return ORJSONResponse(content)
+
+
+@router.get("/reports")
+async def list_reports(
+    period: str | None = Query(None, pattern="^(week|month)$"),
+    from_: date | None = Query(None, alias="from"),
+    to: date | None = None,
+    limit: int = Query(52, ge=1, le=1000),
+    db: DbSession = Depends(get_db),
+    _user=Depends(get_current_user),
+):
+    # Precomputed by the report scheduler (services/reports.py); nothing is built here
+    return ORJSONResponse(await run_db(db, reports.list_reports, period, from_, to, limit))
+
+
+@router.get("/reports/{period}/{start}")
+async def get_report(
+    period: str,
+    start: date,
+    request: Request,
+    format: str = Query("json", pattern="^(json|html|text)$"),
+    db: DbSession = Depends(get_db),
+    _user=Depends(get_current_user),
+):
+    report = await run_db(db, reports.get_report, period, start)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    etag = conditional.make_etag(report.id, report.revision, format)
+    generated_at = reports.generated_at(report)
+    if conditional.matches(request, etag):
+        return conditional.not_modified(etag, generated_at)
+    headers = conditional.cache_headers(etag, generated_at)
+    if format == "html":
+        return HTMLResponse(report.html, headers=headers)
+    if format == "text":
+        return PlainTextResponse(report.text, headers=headers)
+    return ORJSONResponse(reports.serialize(report, full=True), headers=headers)
+
+
+@router.get("/stream")
+async def overview_stream(token: str = Depends(get_stream_token), last_event_id: str | None = Header(None)):
+    # Server-Sent Events: the overview now, then again after every change to its data.
+    # Browsers reconnect on their own and send Last-Event-ID, so an unchanged overview
+    # is not sent twice.
+    queue = kpi_stream.broadcaster.subscribe()
+
+    async def events():
+        sent = last_event_id
+        checked = time.monotonic()
+
+        async def token_valid() -> bool:
+            # Expired or deactivated users lose the stream within one keepalive interval,
+            # however busy it is
+            nonlocal checked
+            if time.monotonic() - checked < settings.kpi_stream_keepalive_s:
+                return True
+            try:
+                await resolve_token(token)
+            except HTTPException:
+                return False
+            checked = time.monotonic()
+            return True
+
+        try:
+            yield b"retry: 5000\n\n"
+            event_id, frame = await kpi_stream.broadcaster.latest()
+            while True:
+                if event_id != sent:
+                    if not await token_valid():
+                        return
+                    yield frame
+                    sent = event_id
+                try:
+                    event_id, frame = await asyncio.wait_for(queue.get(), settings.kpi_stream_keepalive_s)
+                except asyncio.TimeoutError:
+                    if not await token_valid():
+                        return
+                    yield b": keepalive\n\n"
+        finally:
+            kpi_stream.broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from app.api.v1 import conditional
 from app.api.v1.deps import require_roles, get_current_user
-from app.db.session import get_db
+from app.db.session import DbSession, get_db, run_db
 from app.db.models import Goal
+from app.services import versions
 
 
 router = APIRouter()
@@ -15,14 +17,21 @@ class GoalIn(BaseModel):
     unit: str
 
 
-@router.get("/")
-def list_goals(db: Session = Depends(get_db), _user=Depends(get_current_user)):
+def _list_goals(db: Session) -> list[dict]:
     goals = db.query(Goal).order_by(Goal.key).all()
     return [{"id": g.id, "key": g.key, "value": g.value, "unit": g.unit} for g in goals]
 
 
-@router.post("/", dependencies=[Depends(require_roles("ADMIN"))])
-def upsert_goal(payload: GoalIn, db: Session = Depends(get_db)):
+@router.get("/")
+async def list_goals(request: Request, response: Response, db: DbSession = Depends(get_db), _user=Depends(get_current_user)):
+    etag = conditional.make_etag(await versions.snapshot_async((versions.GOALS_KEY,)), conditional.request_key(request))
+    if conditional.matches(request, etag):
+        return conditional.not_modified(etag)
+    response.headers.update(conditional.cache_headers(etag))
+    return await run_db(db, _list_goals)
+
+
+def _upsert_goal(db: Session, payload: GoalIn) -> dict:
     goal = db.query(Goal).filter(Goal.key == payload.key).first()
     if goal:
         goal.value = payload.value
@@ -30,6 +39,12 @@ def upsert_goal(payload: GoalIn, db: Session = Depends(get_db)):
     else:
         goal = Goal(key=payload.key, value=payload.value, unit=payload.unit)
         db.add(goal)
+    versions.bump(db, versions.GOALS_KEY)
     db.commit()
     db.refresh(goal)
     return {"id": goal.id, "key": goal.key, "value": goal.value, "unit": goal.unit}
+
+
+@router.post("/", dependencies=[Depends(require_roles("ADMIN"))])
+async def upsert_goal(payload: GoalIn, db: DbSession = Depends(get_db)):
+    return await run_db(db, _upsert_goal, payload)
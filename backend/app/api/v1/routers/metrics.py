@@ -0,0 +1,27 @@
+import hmac
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.security import HTTPAuthorizationCredentials
+from app.api.v1.deps import resolve_token, reusable_oauth2
+from app.core import metrics
+from app.core.config import settings
+
+
+router = APIRouter()
+
+
+async def require_metrics_access(credentials: HTTPAuthorizationCredentials | None = Depends(reusable_oauth2)) -> None:
+    # Scrapers send METRICS_TOKEN (no expiry to manage); people use an ADMIN access token
+    if credentials is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    token = credentials.credentials
+    if settings.metrics_token and hmac.compare_digest(token.encode(), settings.metrics_token.encode()):
+        return
+    principal = await resolve_token(token)
+    if principal.role != "ADMIN":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+
+
+@router.get("", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
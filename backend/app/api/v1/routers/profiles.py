@@ -0,0 +1,37 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from app.api.v1.deps import require_roles
+from app.core.profiling import FORMATS, profile_store
+
+
+# Profiles are captured by sending X-Profile with an ADMIN token (core/profiling.py)
+router = APIRouter(dependencies=[Depends(require_roles("ADMIN"))])
+
+
+def profile_path(profile_id: str, fmt: str) -> str:
+    try:
+        path = profile_store.path(profile_id, fmt)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return path
+
+
+@router.get("/")
+def list_profiles():
+    return profile_store.list()
+
+
+@router.get("/{profile_id}/{fmt}")
+def download_profile(profile_id: str, fmt: str):
+    path = profile_path(profile_id, fmt)
+    return FileResponse(path, media_type=FORMATS[fmt], filename=f"{profile_id}.{fmt}")
+
+
+@router.delete("/{profile_id}")
+def delete_profile(profile_id: str):
+    profile_path(profile_id, "json")
+    profile_store.delete(profile_id)
+    return {"detail": "Profile deleted"}
@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from app.api.v1.deps import require_roles
-from app.db.session import get_db
+from app.db.session import DbSession, get_db, run_db
 from app.db.models import User
-from app.core.security import get_password_hash
+from app.core.security import hash_password_async
+from app.services import versions
 
 
 router = APIRouter()
@@ -31,27 +32,38 @@ class UserPatch(BaseModel):
     is_active: bool | None = None
 
 
-@router.post("/", response_model=UserOut, dependencies=[Depends(require_roles("ADMIN"))])
-def create_user(payload: UserCreate, db: Session = Depends(get_db)):
-    if payload.role not in ("ADMIN", "SUPERVISOR", "USER"):
-        raise HTTPException(status_code=400, detail="Invalid role")
-    exists = db.query(User).filter(User.email == payload.email).first()
-    if exists:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    user = User(email=payload.email, hashed_password=get_password_hash(payload.password), role=payload.role)
+def _email_taken(db: Session, email: str) -> bool:
+    return db.query(User.id).filter(User.email == email).first() is not None
+
+
+def _save(db: Session, user: User) -> User:
     db.add(user)
     db.commit()
     db.refresh(user)
     return user
 
 
-@router.get("/", response_model=list[UserOut], dependencies=[Depends(require_roles("ADMIN"))])
-def list_users(db: Session = Depends(get_db)):
+@router.post("/", response_model=UserOut, dependencies=[Depends(require_roles("ADMIN"))])
+async def create_user(payload: UserCreate, db: DbSession = Depends(get_db)):
+    if payload.role not in ("ADMIN", "SUPERVISOR", "USER"):
+        raise HTTPException(status_code=400, detail="Invalid role")
+    if await run_db(db, _email_taken, payload.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+    hashed_password = await hash_password_async(payload.password)
+    user = User(email=payload.email, hashed_password=hashed_password, role=payload.role)
+    return await run_db(db, _save, user)
+
+
+def _list_users(db: Session) -> list[User]:
     return db.query(User).order_by(User.id).all()
 
 
-@router.patch("/{user_id}", response_model=UserOut, dependencies=[Depends(require_roles("ADMIN"))])
-def patch_user(user_id: int, payload: UserPatch, db: Session = Depends(get_db)):
+@router.get("/", response_model=list[UserOut], dependencies=[Depends(require_roles("ADMIN"))])
+async def list_users(db: DbSession = Depends(get_db)):
+    return await run_db(db, _list_users)
+
+
+def _patch_user(db: Session, user_id: int, payload: UserPatch) -> User:
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -61,16 +73,28 @@ def patch_user(user_id: int, payload: UserPatch, db: Session = Depends(get_db)):
         user.role = payload.role
     if payload.is_active is not None:
         user.is_active = payload.is_active
+    # Cached principals (deps.authenticate_token) carry the role and active flag
+    versions.bump(db, versions.USERS_KEY)
     db.commit()
     db.refresh(user)
     return user
 
 
-@router.delete("/{user_id}", dependencies=[Depends(require_roles("ADMIN"))])
-def delete_user(user_id: int, db: Session = Depends(get_db)):
+@router.patch("/{user_id}", response_model=UserOut, dependencies=[Depends(require_roles("ADMIN"))])
+async def patch_user(user_id: int, payload: UserPatch, db: DbSession = Depends(get_db)):
+    return await run_db(db, _patch_user, user_id, payload)
+
+
+def _delete_user(db: Session, user_id: int) -> None:
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     user.is_active = False
+    versions.bump(db, versions.USERS_KEY)
     db.commit()
+
+
+@router.delete("/{user_id}", dependencies=[Depends(require_roles("ADMIN"))])
+async def delete_user(user_id: int, db: DbSession = Depends(get_db)):
+    await run_db(db, _delete_user, user_id)
     return {"detail": "User deactivated"}
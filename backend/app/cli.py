@@ -0,0 +1,99 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from app.db.session import SessionLocal, create_all_tables, engine
+from app.services import rollup, search
+
+
+def rollup_rebuild(_args) -> int:
+    with SessionLocal() as db:
+        days = rollup.rebuild(db)
+    print(f"Rebuilt daily rollup: {days} day(s)")
+    return 0
+
+
+def rollup_check(_args) -> int:
+    with SessionLocal() as db:
+        mismatches = rollup.check(db)
+    for m in mismatches:
+        print(json.dumps(m))
+    print(f"{len(mismatches)} mismatch(es)")
+    return 1 if mismatches else 0
+
+
+def search_rebuild(_args) -> int:
+    with engine.begin() as conn:
+        rebuilt = search.rebuild(conn)
+    if not rebuilt:
+        print(f"No search index for dialect {engine.dialect.name}; searches use ILIKE")
+        return 0
+    print(f"Rebuilt search index(es): {', '.join(rebuilt)}")
+    return 0
+
+
+def db_upgrade(args) -> int:
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option("script_location", str(Path(__file__).parent / "migrations"))
+    command.upgrade(config, args.revision)
+    return 0
+
+
+def plans_check(args) -> int:
+    from app.services import query_plans
+
+    if engine.dialect.name != "sqlite":
+        print(f"Query plan checks run on SQLite only (configured: {engine.dialect.name})")
+        return 0
+    with engine.begin() as conn:
+        search.ensure_index(conn)
+        total, failures = query_plans.check(conn)
+    for f in failures:
+        print(f"FAIL {f.case}: {f.problem}")
+        if args.verbose:
+            print("     " + " | ".join(f.plan))
+    print(f"{total} quer(ies) checked, {len(failures)} problem(s)")
+    return 1 if failures else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="SG Indicadores maintenance commands")
+    groups = parser.add_subparsers(dest="group", required=True)
+
+    rollup_parser = groups.add_parser("rollup", help="Daily KPI rollup table")
+    rollup_commands = rollup_parser.add_subparsers(dest="command", required=True)
+    rollup_commands.add_parser("rebuild", help="Recompute the rollup from the raw tables").set_defaults(func=rollup_rebuild)
+    rollup_commands.add_parser("check", help="Compare the rollup against the raw tables").set_defaults(func=rollup_check)
+
+    search_parser = groups.add_parser("search", help="Full-text search index for delays and complaints")
+    search_commands = search_parser.add_subparsers(dest="command", required=True)
+    search_commands.add_parser("rebuild", help="Repopulate the search index from the base tables").set_defaults(func=search_rebuild)
+
+    db_parser = groups.add_parser("db", help="Schema migrations (alembic)")
+    db_commands = db_parser.add_subparsers(dest="command", required=True)
+    db_upgrade_parser = db_commands.add_parser("upgrade", help="Apply migrations up to a revision")
+    db_upgrade_parser.add_argument("revision", nargs="?", default="head")
+    db_upgrade_parser.set_defaults(func=db_upgrade)
+
+    plans_parser = groups.add_parser("plans", help="Query plans of the dataset endpoints")
+    plans_commands = plans_parser.add_subparsers(dest="command", required=True)
+    plans_check_parser = plans_commands.add_parser(
+        "check", help="Fail on full scans or temp B-tree sorts in list/export queries"
+    )
+    plans_check_parser.add_argument("-v", "--verbose", action="store_true", help="Print the plan of each failure")
+    plans_check_parser.set_defaults(func=plans_check)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    create_all_tables()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
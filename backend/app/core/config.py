@@ -7,6 +7,65 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
     env: str = "local"
+    db_async: bool = False
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_s: float = 30.0
+    sqlite_tuning: bool = True
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_writer_timeout_s: float = 60.0
+    metrics_enabled: bool = True
+    # Static bearer token for Prometheus scrapes of /metrics; ADMIN users' tokens work too
+    metrics_token: str | None = None
+    slow_query_ms: float = 500.0
+    slow_query_explain: bool = True
+    profiling_enabled: bool = True
+    profile_dir: str = "./profiles"
+    profile_max_count: int = 50
+    profile_interval_ms: float = 5.0
+    profile_max_seconds: float = 120.0
+    kpi_cache_enabled: bool = True
+    version_check_interval_s: float = 1.0
+    kpi_stream_poll_s: float = 1.0
+    kpi_stream_debounce_s: float = 2.0
+    kpi_stream_max_delay_s: float = 10.0
+    kpi_stream_keepalive_s: float = 15.0
+    timeseries_max_days: int = 3660
+    simulate_max_scenarios: int = 2000
+    # Entry.shift values whose production counts toward the production_day / production_night goals
+    day_shifts: list[str] = ["A", "B"]
+    night_shifts: list[str] = ["C"]
+    reports_enabled: bool = True
+    report_schedule_s: float = 60.0
+    # Days after a week or month ends before its report is built (late entries)
+    report_settle_days: int = 2
+    # Only the latest closed periods of each kind are built and kept up to date: one stray
+    # old row must not make the scheduler backfill decades of reports
+    reports_backfill_periods: int = 104
+    export_batch_size: int = 1000
+    export_gzip_level: int = 6
+    export_columnar_batch_size: int = 65536
+    batch_max_rows: int = 1000
+    group_commit_enabled: bool = False
+    group_commit_window_ms: float = 5.0
+    group_commit_max_rows: int = 500
+    import_chunk_size: int = 5000
+    import_max_errors: int = 1000
+    import_spool_dir: str = "./import_spool"
+    import_job_workers: int = 1
+    import_job_heartbeat_timeout_s: float = 120.0
+    import_job_sweep_s: float = 30.0
+    import_job_max_attempts: int = 3
+    principal_cache_size: int = 10000
+    principal_cache_ttl_s: float = 60.0
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_max_queue: int = 256
+    password_hash_queue_timeout_s: float = 10.0
+    password_rehash_on_login: bool = True
 
     class Config:
         env_file = ".env"
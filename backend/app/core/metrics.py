@@ -0,0 +1,205 @@
+import logging
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+import anyio.to_thread
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+# With several workers (uvicorn --workers / gunicorn), set PROMETHEUS_MULTIPROC_DIR to an
+# empty directory shared by them before start: each process writes its samples there
+# and /metrics merges all of them, whichever worker serves the scrape.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency, until the last body byte", ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ["route"], buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "SQL time per request", ["route"], buckets=LATENCY_BUCKETS
+)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_TIMEOUTS = Counter("db_pool_checkout_timeouts_total", "Checkouts that gave up waiting", ["pool"])
+THREADPOOL_BUSY = Gauge("threadpool_busy_threads", "Worker threads running sync code", multiprocess_mode="livesum")
+THREADPOOL_LIMIT = Gauge("threadpool_threads_limit", "Worker thread capacity", multiprocess_mode="livesum")
+THREADPOOL_WAITING = Gauge("threadpool_waiting_tasks", "Tasks queued for a worker thread", multiprocess_mode="livesum")
+THREADPOOL_SATURATED = Counter("threadpool_saturated_total", "Requests that arrived with every worker thread busy")
+SLOW_QUERIES = Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS")
+GROUP_COMMIT_ROWS = Histogram(
+    "group_commit_batch_rows", "Rows written per group commit", buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+)
+GROUP_COMMIT_LATENCY = Histogram(
+    "group_commit_latency_seconds", "Enqueue to commit, per row", buckets=LATENCY_BUCKETS
+)
+GROUP_COMMIT_FLUSH = Histogram("group_commit_flush_seconds", "Transaction time per group commit", buckets=LATENCY_BUCKETS)
+PASSWORD_HASH_QUEUE = Gauge(
+    "password_hash_queue_depth", "Hash/verify calls waiting for a bcrypt pool slot", multiprocess_mode="livesum"
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "password_hash_in_flight", "Hash/verify calls running in the bcrypt pool", multiprocess_mode="livesum"
+)
+PASSWORD_HASH_WAIT = Histogram(
+    "password_hash_wait_seconds", "Queue time before a bcrypt pool slot", buckets=LATENCY_BUCKETS
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds", "Hash/verify time in the bcrypt pool", buckets=LATENCY_BUCKETS
+)
+PASSWORD_HASH_FAILED = Counter(
+    "password_hash_failed_total", "Hash/verify calls that got a bcrypt pool slot but did not complete"
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Hash/verify calls refused with 503", ["reason"]  # queue_full, timeout
+)
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+    def server_timing(self, app_seconds: float) -> str:
+        return f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries", app;dur={app_seconds * 1000:.1f}'
+
+
+# One per request. Threadpool calls (run_in_threadpool) and AsyncSession.run_sync run in a
+# copy of the request context, so they see and update the same object.
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def sample_threadpool() -> None:
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    busy, limit = limiter.borrowed_tokens, limiter.total_tokens
+    THREADPOOL_BUSY.set(busy)
+    THREADPOOL_LIMIT.set(limit)
+    THREADPOOL_WAITING.set(limiter.statistics().tasks_waiting)
+    if busy >= limit:
+        THREADPOOL_SATURATED.inc()
+
+
+def observe_pool_wait(pool: str, seconds: float, timed_out: bool = False) -> None:
+    POOL_WAIT.labels(pool).observe(seconds)
+    if timed_out:
+        POOL_TIMEOUTS.labels(pool).inc()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # On the statement's execution context: a failed statement takes its start time with
+    # it instead of leaving it behind on the connection
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    if settings.slow_query_ms > 0 and elapsed * 1000 >= settings.slow_query_ms:
+        _log_slow_query(conn, statement, parameters, executemany, elapsed)
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    prefix = "EXPLAIN QUERY PLAN" if conn.dialect.name == "sqlite" else "EXPLAIN"
+    # Raw DBAPI cursor: no engine events, so the EXPLAIN isn't itself counted or logged
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"{prefix} {statement}", parameters)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    if conn.dialect.name == "sqlite":
+        return " | ".join(str(r[3]) for r in rows)
+    return " | ".join(str(r[0]) for r in rows)
+
+
+def _log_slow_query(conn, statement: str, parameters, executemany: bool, elapsed: float) -> None:
+    SLOW_QUERIES.inc()
+    shown = f"{len(parameters)} parameter sets" if executemany else repr(parameters)[:500]
+    plan = ""
+    if settings.slow_query_explain and not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        try:
+            plan = _explain(conn, statement, parameters)
+        except Exception as exc:  # the plan is best effort; never fail the request over it
+            plan = f"unavailable ({exc.__class__.__name__}: {exc})"
+    slow_query_logger.warning(
+        "slow query %.1f ms: %s | params: %s%s",
+        elapsed * 1000, " ".join(statement.split()), shown, f" | plan: {plan}" if plan else "",
+    )
+
+
+def instrument_engines() -> None:
+    # On the Engine class: covers the reader, writer and the async engine's sync core
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware: keeps streaming responses streaming and
+    # the request context shared with the endpoint
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+        sample_threadpool()
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            # Route template, not the raw path: bounded label cardinality
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], route, str(status_code)).observe(elapsed)
+            REQUEST_QUERIES.labels(route).observe(stats.queries)
+            REQUEST_DB_SECONDS.labels(route).observe(stats.db_seconds)
+            _request_stats.reset(token)
+
+
+def render() -> tuple[bytes, str]:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,227 @@
+import json
+import marshal
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from types import FrameType
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+FORMATS = {"collapsed": "text/plain; charset=utf-8", "pstats": "application/octet-stream", "json": "application/json"}
+
+FrameKey = tuple[str, int, str]  # (filename, first line, function): the pstats key
+
+# Top frames of threads parked with nothing to do; their samples are dropped
+_IDLE = {("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("selectors.py", "select"), ("queue.py", "get")}
+
+
+class StackSampler:
+    # Samples every thread's Python stack at a fixed interval from a background thread.
+    # A request's work spans the event loop and threadpool threads, which a per-thread
+    # deterministic profiler would miss; the cost is that concurrent requests on the same
+    # worker show up in the profile too (stacks are grouped under their thread name).
+    def __init__(self, interval_s: float, max_seconds: float):
+        self.interval_s = interval_s
+        self.max_samples = int(max_seconds / interval_s)
+        self.samples: Counter[tuple[str, tuple[FrameKey, ...]]] = Counter()
+        self.total = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        # Only signals: the thread may be mid-sample, join() (off the event loop) waits for it
+        self._stop.set()
+
+    def join(self) -> None:
+        self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval_s) and self.total < self.max_samples:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = _stack(frame)
+                if not stack or (os.path.basename(stack[-1][0]), stack[-1][2]) in _IDLE:
+                    continue
+                self.samples[(names.get(ident, str(ident)), stack)] += 1
+            self.total += 1
+
+    def collapsed(self) -> str:
+        # Brendan Gregg's folded format: flamegraph.pl, speedscope, inferno
+        lines = []
+        for (thread, stack), count in self.samples.most_common():
+            frames = ";".join(f"{name} ({os.path.basename(path)}:{line})" for path, line, name in stack)
+            lines.append(f"{thread};{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+    def pstats(self) -> dict:
+        # Sample counts in cProfile's stats layout, loadable with pstats.Stats / snakeviz.
+        # "Calls" are samples; times are samples x interval.
+        stats: dict[FrameKey, list] = {}
+        for (_thread, stack), count in self.samples.items():
+            seconds = count * self.interval_s
+            for key in set(stack):
+                entry = stats.setdefault(key, [0, 0, 0.0, 0.0, {}])
+                entry[0] += count
+                entry[1] += count
+                entry[3] += seconds
+            stats[stack[-1]][2] += seconds
+            for caller, callee in set(zip(stack, stack[1:])):
+                edge = stats[callee][4].get(caller, (0, 0, 0.0, 0.0))
+                stats[callee][4][caller] = (edge[0] + count, edge[1] + count, edge[2], edge[3] + seconds)
+        return {key: (cc, nc, tt, ct, callers) for key, (cc, nc, tt, ct, callers) in stats.items()}
+
+
+def _stack(frame: FrameType | None) -> tuple[FrameKey, ...]:
+    keys = []
+    while frame is not None:
+        code = frame.f_code
+        keys.append((code.co_filename, code.co_firstlineno, code.co_name))
+        frame = frame.f_back
+    return tuple(reversed(keys))
+
+
+class ProfileStore:
+    # Bounded ring buffer on disk: <id>.json (metadata), <id>.collapsed, <id>.pstats.
+    # Ids sort by creation time, so the oldest are the first to go.
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def new_id(self) -> str:
+        return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{secrets.token_hex(4)}"
+
+    def path(self, profile_id: str, fmt: str) -> str:
+        if not PROFILE_ID.match(profile_id) or fmt not in FORMATS:
+            raise ValueError("invalid profile reference")
+        return os.path.join(self.directory, f"{profile_id}.{fmt}")
+
+    def save(self, profile_id: str, sampler: StackSampler, meta: dict) -> None:
+        sampler.join()  # stopped by the caller; the samples are final once the thread is gone
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(profile_id, "collapsed"), "w", encoding="utf-8") as f:
+            f.write(sampler.collapsed())
+        with open(self.path(profile_id, "pstats"), "wb") as f:
+            marshal.dump(sampler.pstats(), f)
+        # Metadata last: a profile is listed only once its files are complete
+        with open(self.path(profile_id, "json"), "w", encoding="utf-8") as f:
+            json.dump({"id": profile_id, **meta, "samples": sampler.total, "interval_ms": sampler.interval_s * 1000}, f)
+        self.prune()
+
+    def ids(self) -> list[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            (name[: -len(".json")] for name in os.listdir(self.directory) if name.endswith(".json")), reverse=True
+        )
+
+    def list(self) -> list[dict]:
+        profiles = []
+        for profile_id in self.ids():
+            try:
+                with open(self.path(profile_id, "json"), encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def delete(self, profile_id: str) -> bool:
+        found = False
+        for fmt in ("json", "collapsed", "pstats"):
+            try:
+                os.remove(self.path(profile_id, fmt))
+                found = True
+            except FileNotFoundError:
+                pass
+        return found
+
+    def prune(self) -> None:
+        for profile_id in self.ids()[self.max_profiles:]:
+            self.delete(profile_id)
+
+
+profile_store = ProfileStore(settings.profile_dir, settings.profile_max_count)
+# One profile at a time per process: the sampler sees every thread anyway
+_profiling = threading.Lock()
+
+
+class ProfilingMiddleware:
+    # Requests carrying X-Profile from an ADMIN are sampled; the response gets X-Profile-Id.
+    # Without the header the only cost is one scan of the request header names.
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._admin_only = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+        user = await self._admin(scope)
+        if user is None or not _profiling.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send, user)
+        finally:
+            _profiling.release()
+
+    async def _admin(self, scope: Scope):
+        from app.api.v1.deps import get_current_user, require_roles
+
+        if self._admin_only is None:
+            self._admin_only = require_roles("ADMIN")
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        try:
+            user = await get_current_user(HTTPAuthorizationCredentials(scheme=scheme, credentials=token))
+            return await self._admin_only(user)
+        except HTTPException:
+            return None
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, user) -> None:
+        profile_id = profile_store.new_id()
+        status_code = 500
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        sampler = StackSampler(settings.profile_interval_ms / 1000, settings.profile_max_seconds)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            meta = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "user": user.email,
+            }
+            await run_in_threadpool(profile_store.save, profile_id, sampler, meta)
@@ -1,12 +1,29 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+from typing import Any, Callable, Dict
 from jose import jwt
 from passlib.context import CryptContext
-from fastapi import Response
+from fastapi import HTTPException, Response, status
+from app.core import metrics
 from app.core.config import settings
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# min == max == default: any hash made with another cost is flagged by needs_update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
 
 
 def get_password_hash(password: str) -> str:
@@ -17,6 +34,124 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    return pwd_context.needs_update(hashed_password)
+
+
+# bcrypt is CPU-bound by design. Async callers hand it to a small process pool so a
+# login storm queues here (bounded, with a timeout) instead of pinning the request
+# threadpool that KPI reads also run on. hash_stats backs /auth/hash-stats; the same
+# figures go to the Prometheus registry (metrics.PASSWORD_HASH_*).
+_hash_pool: ProcessPoolExecutor | None = None
+_hash_pool_lock = threading.Lock()
+_hash_slots: asyncio.Semaphore | None = None
+hash_stats: Dict[str, Any] = {
+    "completed": 0,
+    "failed": 0,
+    "rejected": 0,
+    "in_flight": 0,
+    "queue_depth": 0,
+    "latency_total_s": 0.0,
+    "latency_max_s": 0.0,
+    "wait_total_s": 0.0,
+}
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=settings.password_hash_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_pool
+
+
+def _discard_hash_pool(pool: ProcessPoolExecutor) -> None:
+    # A worker process that died (OOM kill, segfault) breaks the whole executor; the next
+    # call starts a fresh one
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is pool:
+            _hash_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=False, cancel_futures=True)
+            _hash_pool = None
+
+
+async def _run_in_hash_pool(fn: Callable[..., Any], *args: Any) -> Any:
+    global _hash_slots
+    if _hash_slots is None:
+        _hash_slots = asyncio.Semaphore(settings.password_hash_workers)
+    busy = HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, retry shortly",
+        headers={"Retry-After": "1"},
+    )
+    if hash_stats["queue_depth"] >= settings.password_hash_max_queue:
+        hash_stats["rejected"] += 1
+        metrics.PASSWORD_HASH_REJECTED.labels("queue_full").inc()
+        raise busy
+    queued_at = time.perf_counter()
+    hash_stats["queue_depth"] += 1
+    metrics.PASSWORD_HASH_QUEUE.inc()
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), timeout=settings.password_hash_queue_timeout_s)
+    except asyncio.TimeoutError:
+        hash_stats["rejected"] += 1
+        metrics.PASSWORD_HASH_REJECTED.labels("timeout").inc()
+        raise busy
+    finally:
+        hash_stats["queue_depth"] -= 1
+        metrics.PASSWORD_HASH_QUEUE.dec()
+    started = time.perf_counter()
+    hash_stats["wait_total_s"] += started - queued_at
+    metrics.PASSWORD_HASH_WAIT.observe(started - queued_at)
+    hash_stats["in_flight"] += 1
+    metrics.PASSWORD_HASH_IN_FLIGHT.inc()
+    try:
+        for attempt in range(2):
+            pool = _get_hash_pool()
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+                break
+            except BrokenProcessPool:
+                logger.error("Password hash pool broke (attempt %d), starting a new one", attempt + 1)
+                _discard_hash_pool(pool)
+        else:
+            raise busy
+    except BaseException:
+        # Failed and cancelled calls stay out of the latency figures
+        hash_stats["failed"] += 1
+        metrics.PASSWORD_HASH_FAILED.inc()
+        raise
+    else:
+        elapsed = time.perf_counter() - started
+        hash_stats["completed"] += 1
+        hash_stats["latency_total_s"] += elapsed
+        hash_stats["latency_max_s"] = max(hash_stats["latency_max_s"], elapsed)
+        metrics.PASSWORD_HASH_DURATION.observe(elapsed)
+        return result
+    finally:
+        hash_stats["in_flight"] -= 1
+        metrics.PASSWORD_HASH_IN_FLIGHT.dec()
+        _hash_slots.release()
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(subject: str, minutes: int | None = None) -> str:
     expire_minutes = minutes or settings.access_token_expire_minutes
     to_encode: Dict[str, Any] = {"sub": subject, "exp": datetime.now(tz=timezone.utc) + timedelta(minutes=expire_minutes)}
@@ -1,10 +1,12 @@
 from datetime import datetime, date
-from sqlalchemy import String, Integer, Boolean, Date, DateTime, Float, CheckConstraint, Index, UniqueConstraint
+from sqlalchemy import String, Integer, BigInteger, Boolean, Date, DateTime, Float, JSON, Text, CheckConstraint, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.session import Base
 
 
 VALID_ROLES = ("ADMIN", "SUPERVISOR", "USER")
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+REPORT_PERIODS = ("week", "month")
 
 
 class User(Base):
@@ -28,14 +30,14 @@ class Entry(Base):
     __tablename__ = "entries"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    date: Mapped[date] = mapped_column(Date, index=True, nullable=False)
+    date: Mapped[date] = mapped_column(Date, nullable=False)
     shift: Mapped[str] = mapped_column(String(16), nullable=False)
     pedidos_m2: Mapped[float] = mapped_column(Float, nullable=False)
     forno_m2: Mapped[float] = mapped_column(Float, nullable=False)
     notes: Mapped[str | None] = mapped_column(String(500), nullable=True)
 
     __table_args__ = (
-        Index("ix_entries_date", "date"),
+        Index("ix_entries_date_id", "date", "id"),
     )
 
 
@@ -43,16 +45,17 @@ class Delay(Base):
     __tablename__ = "delays"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    date: Mapped[date] = mapped_column(Date, index=True, nullable=False)
+    date: Mapped[date] = mapped_column(Date, nullable=False)
     order_code: Mapped[str] = mapped_column(String(64), nullable=False)
-    customer: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    customer: Mapped[str] = mapped_column(String(255), nullable=False)
     days_late: Mapped[float] = mapped_column(Float, nullable=False)
     reason: Mapped[str] = mapped_column(String(255), nullable=False)
     order_value: Mapped[float] = mapped_column(Float, nullable=True)
 
     __table_args__ = (
-        Index("ix_delays_date", "date"),
-        Index("ix_delays_customer", "customer"),
+        Index("ix_delays_date_id", "date", "id"),
+        Index("ix_delays_customer_date_id", "customer", "date", "id"),
+        Index("ix_delays_order_code", "order_code"),
     )
 
 
@@ -60,16 +63,16 @@ class Breakage(Base):
     __tablename__ = "breakages"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    date: Mapped[date] = mapped_column(Date, index=True, nullable=False)
-    sector: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    date: Mapped[date] = mapped_column(Date, nullable=False)
+    sector: Mapped[str] = mapped_column(String(64), nullable=False)
     type: Mapped[str] = mapped_column(String(64), nullable=False)
     operator: Mapped[str] = mapped_column(String(128), nullable=True)
     qty_m2: Mapped[float] = mapped_column(Float, nullable=False)
     notes: Mapped[str | None] = mapped_column(String(500), nullable=True)
 
     __table_args__ = (
-        Index("ix_breakages_date", "date"),
-        Index("ix_breakages_sector", "sector"),
+        Index("ix_breakages_date_id", "date", "id"),
+        Index("ix_breakages_sector_date_id", "sector", "date", "id"),
     )
 
 
@@ -77,15 +80,15 @@ class Complaint(Base):
     __tablename__ = "complaints"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    date: Mapped[date] = mapped_column(Date, index=True, nullable=False)
-    customer: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    date: Mapped[date] = mapped_column(Date, nullable=False)
+    customer: Mapped[str] = mapped_column(String(255), nullable=False)
     type: Mapped[str] = mapped_column(String(64), nullable=False)
     qty: Mapped[float] = mapped_column(Float, nullable=False)
     description: Mapped[str | None] = mapped_column(String(500), nullable=True)
 
     __table_args__ = (
-        Index("ix_complaints_date", "date"),
-        Index("ix_complaints_customer", "customer"),
+        Index("ix_complaints_date_id", "date", "id"),
+        Index("ix_complaints_customer_date_id", "customer", "date", "id"),
     )
 
 
@@ -123,3 +126,90 @@ class Goal(Base):
         UniqueConstraint("key", name="uq_goals_key"),
     )
 
+
+class DailyRollup(Base):
+    __tablename__ = "daily_rollup"
+
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
+    production_m2: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    orders_m2: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    loss_m2: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    delays_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    complaints_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    dataset: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="queued")
+    filename: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    spool_path: Mapped[str] = mapped_column(String(1024), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    chunk_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_by: Mapped[str] = mapped_column(String(255), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Claim: the process running the job keeps heartbeat_at fresh; a stale one can be reclaimed
+    claimed_by: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Checkpoint, committed with each chunk: CSV lines up to checkpoint_line are done
+    checkpoint_line: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    bytes_done: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    inserted: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    skipped: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rows_per_s: Mapped[float | None] = mapped_column(Float, nullable=True)
+    error: Mapped[str | None] = mapped_column(String(1000), nullable=True)
+
+    __table_args__ = (
+        CheckConstraint(f"status in {JOB_STATUSES}", name="ck_import_jobs_status_valid"),
+        Index("ix_import_jobs_status_heartbeat", "status", "heartbeat_at"),
+        Index("ix_import_jobs_created_at", "created_at"),
+    )
+
+
+class ImportJobError(Base):
+    __tablename__ = "import_job_errors"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    job_id: Mapped[str] = mapped_column(String(32), ForeignKey("import_jobs.id", ondelete="CASCADE"), nullable=False)
+    line: Mapped[int] = mapped_column(Integer, nullable=False)
+    reason: Mapped[str] = mapped_column(String(1000), nullable=False)
+
+    __table_args__ = (
+        Index("ix_import_job_errors_job_line", "job_id", "line"),
+    )
+
+
+class Report(Base):
+    __tablename__ = "reports"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    period: Mapped[str] = mapped_column(String(8), nullable=False)
+    start: Mapped[date] = mapped_column(Date, nullable=False)
+    end: Mapped[date] = mapped_column(Date, nullable=False)
+    # Digest of the rollup totals the report was built from; late data changes it
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    revision: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    generated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    html: Mapped[str] = mapped_column(Text, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint(f"period in {REPORT_PERIODS}", name="ck_reports_period_valid"),
+        UniqueConstraint("period", "start", name="uq_reports_period_start"),
+    )
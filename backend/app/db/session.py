@@ -1,28 +1,189 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import time
+from typing import Any, Callable, TypeVar
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from app.core import metrics
 from app.core.config import settings
 
 
+T = TypeVar("T")
+DbSession = Session | AsyncSession
+
+
 class Base(DeclarativeBase):
     pass
 
 
+IS_SQLITE = settings.database_url.startswith("sqlite")
+
+
+def is_sqlite_memory(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":"))
+
+
+class _TimedCheckout:
+    # Records how long each checkout waited for a free connection
+    metrics_name = "default"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            metrics.observe_pool_wait(self.metrics_name, time.perf_counter() - started, timed_out=True)
+            raise
+        metrics.observe_pool_wait(self.metrics_name, time.perf_counter() - started)
+        return connection
+
+
+class ReaderPool(_TimedCheckout, QueuePool):
+    metrics_name = "reader"
+
+
+class WriterPool(_TimedCheckout, QueuePool):
+    metrics_name = "writer"
+
+
+class AsyncPool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+
+def engine_options(url: str, poolclass=ReaderPool) -> dict[str, Any]:
+    if is_sqlite_memory(url):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_s,
+    }
+
+
+def sqlite_pragmas() -> list[str]:
+    return [
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}",
+        "PRAGMA temp_store=MEMORY",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+    ]
+
+
+def apply_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma in sqlite_pragmas():
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def tune_sqlite(sync_engine) -> None:
+    if IS_SQLITE and settings.sqlite_tuning:
+        event.listen(sync_engine, "connect", apply_sqlite_pragmas)
+
+
+# The sync engine always exists: CLI commands, background refreshes and streaming
+# exports use it even when request handlers run on the async engine.
 engine = create_engine(
     settings.database_url,
-    connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {},
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    **engine_options(settings.database_url),
 )
+tune_sqlite(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-def get_db():
-    db = SessionLocal()
+# An in-memory database exists per engine, so it can't get a separate writer
+if IS_SQLITE and not is_sqlite_memory(settings.database_url):
+    # Dataset inserts and imports share one connection: they queue on the pool checkout
+    # instead of fighting over SQLite's write lock, and readers on `engine` keep going
+    # under WAL. BEGIN IMMEDIATE takes the lock up front, so a transaction that read
+    # first cannot hit "database is locked" when it starts writing.
+    writer_engine = create_engine(
+        settings.database_url,
+        connect_args={"check_same_thread": False},
+        poolclass=WriterPool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.sqlite_writer_timeout_s,
+    )
+    tune_sqlite(writer_engine)
+
+    @event.listens_for(writer_engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, _connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(writer_engine, "begin")
+    def _begin_immediate(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+else:
+    writer_engine = engine
+
+WriterSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
+
+
+def async_database_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    driver = scheme.split("+", 1)[0]
+    if driver == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if driver in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
+async_engine = None
+if settings.db_async:
+    _async_url = async_database_url(settings.database_url)
+    # Explicit pool class: aiosqlite would default to NullPool, a fresh connection (and
+    # pragma round) per checkout
+    async_engine = create_async_engine(_async_url, **engine_options(_async_url, AsyncPool))
+    tune_sqlite(async_engine.sync_engine)
+
+# expire_on_commit=False: attributes read after the handler's run_db() call returns must
+# not trigger lazy loads outside the greenlet
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if async_engine is not None else None
+)
+
+
+if settings.db_async:
+
+    async def get_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+else:
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+def get_writer_db():
+    db = WriterSessionLocal()
     try:
         yield db
     finally:
         db.close()
 
 
+async def run_db(db: DbSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    # Runs sync ORM code `fn(session, ...)` without blocking the event loop: on the async
+    # engine through run_sync (I/O awaited via greenlets), on the sync engine in the threadpool.
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
 def create_all_tables():
     # Imported inside to avoid circular imports
     from app.db import models  # noqa: F401
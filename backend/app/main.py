@@ -1,7 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core import metrics
 from app.core.config import settings
-from app.db.session import create_all_tables
+from app.core.profiling import ProfilingMiddleware
+from app.core.security import shutdown_hash_pool
+from app.db.session import SessionLocal, create_all_tables, engine
+from app.services import group_commit, import_jobs, kpi_stream, reports, rollup, search, versions
 
 
 def get_application() -> FastAPI:
@@ -13,20 +17,57 @@ def get_application() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "X-Profile-Id"],
     )
+    if settings.profiling_enabled:
+        app.add_middleware(ProfilingMiddleware)
+    if settings.metrics_enabled:
+        # Added last: outermost, so latency covers CORS and everything below it
+        metrics.instrument_engines()
+        app.add_middleware(metrics.MetricsMiddleware)
 
     # Routers will be included after they are implemented
-    from app.api.v1.routers import auth, users, datasets, kpis, metas
+    from app.api.v1.routers import auth, users, datasets, kpis, metas, profiles, metrics as metrics_router
+    from app.api.v1.routers import import_jobs as import_jobs_router
 
     app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
     app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
     app.include_router(datasets.router, prefix="/api/v1/datasets", tags=["datasets"])
+    app.include_router(import_jobs_router.router, prefix="/api/v1/import-jobs", tags=["import-jobs"])
     app.include_router(kpis.router, prefix="/api/v1/kpis", tags=["kpis"])
     app.include_router(metas.router, prefix="/api/v1/metas", tags=["metas"])
+    app.include_router(profiles.router, prefix="/api/v1/profiles", tags=["profiles"])
+    if settings.metrics_enabled:
+        app.include_router(metrics_router.router, prefix="/api/v1/metrics", tags=["metrics"])
 
     @app.on_event("startup")
     def on_startup() -> None:
         create_all_tables()
+        with engine.begin() as conn:
+            search.ensure_index(conn)
+        with SessionLocal() as db:
+            versions.ensure_keys(db)
+            if rollup.is_empty(db):
+                rollup.rebuild(db)
+
+    @app.on_event("startup")
+    async def start_import_jobs() -> None:
+        # Picks up jobs left queued or cut short by a restart, then keeps sweeping
+        import_jobs.start()
+
+    @app.on_event("startup")
+    async def start_reports() -> None:
+        if settings.reports_enabled:
+            reports.start()
+
+    @app.on_event("shutdown")
+    async def on_shutdown() -> None:
+        await kpi_stream.broadcaster.stop()
+        await import_jobs.stop()
+        await reports.stop()
+        await group_commit.writer.stop()
+        shutdown_hash_pool()
+        metrics.mark_process_dead()
 
     return app
 
@@ -0,0 +1,76 @@
+"""Composite indexes for dataset filters and sorts
+
+Replaces the duplicated single-column date/customer/sector indexes with
+(date, id) and (customer|sector, date, id) composites matching
+build_filters + apply_pagination_and_sort.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# The schema before any of this: what downgrade() returns to
+BASELINE_INDEXES = {
+    "entries": {"ix_entries_date": ["date"]},
+    "delays": {"ix_delays_date": ["date"], "ix_delays_customer": ["customer"]},
+    "breakages": {"ix_breakages_date": ["date"], "ix_breakages_sector": ["sector"]},
+    "complaints": {"ix_complaints_date": ["date"], "ix_complaints_customer": ["customer"]},
+}
+
+# Added with cursor pagination, superseded by NEW_INDEXES; dropped on upgrade only
+CURSOR_INDEXES = {
+    "delays": {"ix_delays_customer_id": ["customer", "id"]},
+    "breakages": {"ix_breakages_sector_id": ["sector", "id"]},
+    "complaints": {"ix_complaints_customer_id": ["customer", "id"]},
+}
+
+# Also added with cursor pagination; created here too for databases that predate it
+DATE_INDEXES = {
+    "entries": {"ix_entries_date_id": ["date", "id"]},
+    "delays": {"ix_delays_date_id": ["date", "id"]},
+    "breakages": {"ix_breakages_date_id": ["date", "id"]},
+    "complaints": {"ix_complaints_date_id": ["date", "id"]},
+}
+
+NEW_INDEXES = {
+    "delays": {"ix_delays_customer_date_id": ["customer", "date", "id"]},
+    "breakages": {"ix_breakages_sector_date_id": ["sector", "date", "id"]},
+    "complaints": {"ix_complaints_customer_date_id": ["customer", "date", "id"]},
+}
+
+
+# IF [NOT] EXISTS throughout: databases created by create_all() at startup may
+# already have any subset of either index set.
+def _drop(indexes: dict[str, dict[str, list[str]]]) -> None:
+    for table, names in indexes.items():
+        for name in names:
+            op.drop_index(name, table_name=table, if_exists=True)
+
+
+def _create(indexes: dict[str, dict[str, list[str]]]) -> None:
+    for table, names in indexes.items():
+        for name, columns in names.items():
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def upgrade() -> None:
+    _drop(BASELINE_INDEXES)
+    _drop(CURSOR_INDEXES)
+    _create(DATE_INDEXES)
+    _create(NEW_INDEXES)
+    # Fresh statistics so the planner weighs the new composites
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    _drop(NEW_INDEXES)
+    _drop(DATE_INDEXES)
+    _create(BASELINE_INDEXES)
@@ -0,0 +1,37 @@
+"""Daily KPI rollup
+
+daily_rollup holds per-day totals maintained by every write path (services/rollup.py).
+The table starts empty; the app rebuilds it from the raw tables at startup when it is
+empty, or run python -m app.cli rollup rebuild.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0001a"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_all at startup may have made it already
+    if "daily_rollup" in set(sa.inspect(op.get_bind()).get_table_names()):
+        return
+    op.create_table(
+        "daily_rollup",
+        sa.Column("date", sa.Date(), primary_key=True),
+        sa.Column("production_m2", sa.Float(), nullable=False),
+        sa.Column("orders_m2", sa.Float(), nullable=False),
+        sa.Column("loss_m2", sa.Float(), nullable=False),
+        sa.Column("delays_count", sa.Integer(), nullable=False),
+        sa.Column("complaints_count", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_rollup")
@@ -0,0 +1,33 @@
+"""Data version counters
+
+data_versions holds one change counter per table group (services/versions.py), bumped
+by every write path. The app seeds the keys at startup (versions.ensure_keys).
+
+Revision ID: 0001b
+Revises: 0001a
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0001b"
+down_revision = "0001a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_all at startup may have made it already
+    if "data_versions" in set(sa.inspect(op.get_bind()).get_table_names()):
+        return
+    op.create_table(
+        "data_versions",
+        sa.Column("key", sa.String(64), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("data_versions")
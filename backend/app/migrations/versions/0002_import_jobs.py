@@ -0,0 +1,67 @@
+"""Background import jobs
+
+import_jobs holds each job's state and checkpoint, import_job_errors its per-row
+errors (capped at IMPORT_MAX_ERRORS per job).
+
+Revision ID: 0002
+Revises: 0001b
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_all at startup may have made them already
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if "import_jobs" not in existing:
+        op.create_table(
+            "import_jobs",
+            sa.Column("id", sa.String(32), primary_key=True),
+            sa.Column("dataset", sa.String(64), nullable=False),
+            sa.Column("status", sa.String(16), nullable=False),
+            sa.Column("filename", sa.String(255), nullable=True),
+            sa.Column("spool_path", sa.String(1024), nullable=False),
+            sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+            sa.Column("chunk_size", sa.Integer(), nullable=False),
+            sa.Column("created_by", sa.String(255), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("claimed_by", sa.String(255), nullable=True),
+            sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("cancel_requested", sa.Boolean(), nullable=False),
+            sa.Column("checkpoint_line", sa.Integer(), nullable=False),
+            sa.Column("bytes_done", sa.BigInteger(), nullable=False),
+            sa.Column("inserted", sa.Integer(), nullable=False),
+            sa.Column("skipped", sa.Integer(), nullable=False),
+            sa.Column("failed", sa.Integer(), nullable=False),
+            sa.Column("rows_per_s", sa.Float(), nullable=True),
+            sa.Column("error", sa.String(1000), nullable=True),
+            sa.CheckConstraint(
+                "status in ('queued', 'running', 'succeeded', 'failed', 'cancelled')", name="ck_import_jobs_status_valid"
+            ),
+        )
+        op.create_index("ix_import_jobs_status_heartbeat", "import_jobs", ["status", "heartbeat_at"])
+        op.create_index("ix_import_jobs_created_at", "import_jobs", ["created_at"])
+    if "import_job_errors" not in existing:
+        op.create_table(
+            "import_job_errors",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("job_id", sa.String(32), sa.ForeignKey("import_jobs.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("line", sa.Integer(), nullable=False),
+            sa.Column("reason", sa.String(1000), nullable=False),
+        )
+        op.create_index("ix_import_job_errors_job_line", "import_job_errors", ["job_id", "line"])
+
+
+def downgrade() -> None:
+    op.drop_table("import_job_errors")
+    op.drop_table("import_jobs")
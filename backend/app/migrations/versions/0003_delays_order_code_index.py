@@ -0,0 +1,24 @@
+"""Index delays.order_code
+
+Natural-key lookup for batch upserts (services/batch.py). Entries are matched on
+(date, shift), which ix_entries_date_id already narrows to one day.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_delays_order_code", "delays", ["order_code"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_delays_order_code", table_name="delays", if_exists=True)
@@ -0,0 +1,42 @@
+"""Precomputed period reports
+
+One row per (period, start): executive text, KPI payload and rendered HTML, written
+by the report scheduler (services/reports.py) and served as stored.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_all at startup may have made it already
+    if "reports" in set(sa.inspect(op.get_bind()).get_table_names()):
+        return
+    op.create_table(
+        "reports",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("period", sa.String(8), nullable=False),
+        sa.Column("start", sa.Date(), nullable=False),
+        sa.Column("end", sa.Date(), nullable=False),
+        sa.Column("fingerprint", sa.String(64), nullable=False),
+        sa.Column("revision", sa.Integer(), nullable=False),
+        sa.Column("generated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("html", sa.Text(), nullable=False),
+        sa.CheckConstraint("period in ('week', 'month')", name="ck_reports_period_valid"),
+        sa.UniqueConstraint("period", "start", name="uq_reports_period_start"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("reports")
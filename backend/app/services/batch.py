@@ -0,0 +1,94 @@
+import hashlib
+from typing import Any
+from sqlalchemy import bindparam, insert, select, text, tuple_, update
+from sqlalchemy.orm import Session
+from app.db.models import Delay, Entry
+from app.services import rollup, versions
+
+
+# Natural keys: a batch row matching an existing row on these columns updates it in
+# place, so a terminal re-sending a batch doesn't duplicate anything. Not enforced by a
+# unique constraint (historical data has repeats), so concurrent batches are kept apart
+# by locks taken before the lookup: on SQLite the writer transaction (BEGIN IMMEDIATE)
+# already serializes them, on PostgreSQL each key takes a transaction-level advisory
+# lock, elsewhere the lookup locks the matching rows (SELECT ... FOR UPDATE). The lookup
+# picks the newest matching row.
+NATURAL_KEYS: dict[type, tuple[str, ...]] = {
+    Entry: ("date", "shift"),
+    Delay: ("order_code",),
+}
+
+
+def natural_key(model, row: dict[str, Any]) -> tuple | None:
+    columns = NATURAL_KEYS.get(model)
+    return None if columns is None else tuple(row[c] for c in columns)
+
+
+def duplicate_keys(model, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    if model not in NATURAL_KEYS:
+        return []
+    seen: dict[tuple, int] = {}
+    duplicates = []
+    for index, row in enumerate(rows):
+        key = natural_key(model, row)
+        if key in seen:
+            duplicates.append({"index": index, "detail": f"same {', '.join(NATURAL_KEYS[model])} as item {seen[key]}"})
+        seen.setdefault(key, index)
+    return duplicates
+
+
+def _lock_id(model, key: tuple) -> int:
+    digest = hashlib.blake2b(repr((model.__tablename__, key)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _existing(db: Session, model, rows: list[dict[str, Any]]) -> dict[tuple, dict[str, Any]]:
+    table = model.__table__
+    columns = [table.c[c] for c in NATURAL_KEYS[model]]
+    keys = list({natural_key(model, row) for row in rows})
+    stmt = select(table).order_by(table.c.id)
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        # Covers keys with no row yet, which FOR UPDATE can't; sorted so two batches
+        # sharing keys can't deadlock
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(k) FROM unnest(CAST(:ids AS bigint[])) AS k"),
+            {"ids": sorted({_lock_id(model, k) for k in keys})},
+        )
+    elif dialect != "sqlite":
+        stmt = stmt.with_for_update()
+    lookup = tuple_(*columns).in_(keys) if len(columns) > 1 else columns[0].in_([k[0] for k in keys])
+    found: dict[tuple, dict[str, Any]] = {}
+    for row in db.execute(stmt.where(lookup)).mappings():
+        found[tuple(row[c.key] for c in columns)] = dict(row)  # newest id wins
+    return found
+
+
+def write_batch(db: Session, model, rows: list[dict[str, Any]]) -> dict[str, Any]:
+    # One transaction: INSERT ... RETURNING for new rows, one executemany UPDATE for
+    # natural-key matches, rollup deltas for both (old values out, new values in)
+    table = model.__table__
+    existing = _existing(db, model, rows) if model in NATURAL_KEYS else {}
+    results: list[dict[str, Any] | None] = [None] * len(rows)
+    inserts = [i for i, row in enumerate(rows) if natural_key(model, row) not in existing]
+    updates = [i for i, row in enumerate(rows) if natural_key(model, row) in existing]
+
+    if inserts:
+        stmt = insert(table).returning(*table.c, sort_by_parameter_order=True)
+        returned = db.execute(stmt, [rows[i] for i in inserts]).mappings()
+        for i, row in zip(inserts, returned):
+            results[i] = dict(row)
+    if updates:
+        old = [existing[natural_key(model, rows[i])] for i in updates]
+        # No explicit SET: it is built from the parameter keys other than old_id
+        db.execute(
+            update(table).where(table.c.id == bindparam("old_id")),
+            [{**rows[i], "old_id": o["id"]} for i, o in zip(updates, old)],
+        )
+        for i, o in zip(updates, old):
+            results[i] = {**o, **rows[i]}
+        rollup.apply_rows(db, model, old, sign=-1)
+    rollup.apply_rows(db, model, rows)
+    versions.bump(db, model.__tablename__)
+    db.commit()
+    return {"inserted": len(inserts), "updated": len(updates), "rows": results}
@@ -0,0 +1,293 @@
+import logging
+import threading
+from collections import defaultdict
+from datetime import date
+from typing import Any, NamedTuple
+import numpy as np
+from sqlalchemy import func, select
+from app.db.models import Breakage, Complaint, Delay, Entry
+from app.db.session import SessionLocal
+from app.services import rollup, versions
+
+
+logger = logging.getLogger(__name__)
+
+# Cell key: date ordinal in the top DAY_BITS, dimension codes packed below it. Sorted
+# keys are therefore sorted by day, and a date range is one searchsorted slice.
+DAY_BITS = 20
+CODE_BITS = 64 - DAY_BITS
+# Cells are added to an overlay first; it is folded into the sorted arrays once it is
+# this big (or 1/16 of them)
+MERGE_MIN_CELLS = 4096
+# Above this many possible groups, group with np.unique instead of np.bincount
+BINCOUNT_MAX_GROUPS = 1 << 22
+
+
+class CubeSpec(NamedTuple):
+    model: type
+    dimensions: tuple[str, ...]
+    measures: dict[str, str | None]  # name -> summed column, or None to count rows
+
+
+SPECS = {
+    "entries": CubeSpec(Entry, ("shift",), {"forno_m2": "forno_m2", "pedidos_m2": "pedidos_m2", "count": None}),
+    "breakages": CubeSpec(Breakage, ("sector", "type", "operator"), {"qty_m2": "qty_m2", "count": None}),
+    "delays": CubeSpec(Delay, ("customer", "reason"), {"count": None, "days_late": "days_late", "order_value": "order_value"}),
+    "complaints": CubeSpec(Complaint, ("customer", "type"), {"count": None, "qty": "qty"}),
+}
+
+
+class Dictionary:
+    # Append-only value <-> code mapping; codes never change, so readers holding an old
+    # length stay consistent
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.values: list[Any] = []
+        self.codes: dict[Any, int] = {}
+
+    def encode(self, value: Any) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            if len(self.values) >= self.limit:
+                raise OverflowError(f"more than {self.limit} distinct values")
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class _Cells(NamedTuple):
+    # Immutable once built: readers use them outside the lock
+    keys: np.ndarray  # uint64, sorted, unique
+    measures: dict[str, np.ndarray]
+
+
+class Cube:
+    # Day x dimensions pre-aggregation of one table. Same consistency scheme as the
+    # timeseries store: loaded with the table's data version, this worker's commits
+    # applied incrementally, anything else (another worker, an import job process)
+    # triggers a reload; the stale cube keeps answering until the reload lands.
+    def __init__(self, name: str, spec: CubeSpec):
+        self.name = name
+        self.spec = spec
+        self.key = spec.model.__tablename__
+        self.bits = CODE_BITS // len(spec.dimensions)
+        self.shifts = [CODE_BITS - self.bits * (i + 1) for i in range(len(spec.dimensions))]
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        self._tag: int | None = None
+        self._loaded = False
+        self._dictionaries: list[Dictionary] = []
+        self._cells = _Cells(np.empty(0, np.uint64), {})
+        self._overlay: dict[int, list[float]] = {}
+        self._overlay_cells: _Cells | None = None
+
+    def dimension_codes(self, keys: np.ndarray, i: int) -> np.ndarray:
+        return ((keys >> np.uint64(self.shifts[i])) & np.uint64((1 << self.bits) - 1)).astype(np.int64)
+
+    def _encode(self, dictionaries: list[Dictionary], row) -> int:
+        key = row["date"].toordinal() << CODE_BITS
+        for dictionary, dimension, shift in zip(dictionaries, self.spec.dimensions, self.shifts):
+            key |= dictionary.encode(row[dimension]) << shift
+        return key
+
+    def load(self) -> None:
+        model = self.spec.model
+        columns = [getattr(model, d) for d in self.spec.dimensions]
+        aggregates = [
+            func.count() if column is None else func.coalesce(func.sum(getattr(model, column)), 0.0)
+            for column in self.spec.measures.values()
+        ]
+        with SessionLocal() as db:
+            tag = versions.read(db, (self.key,))[self.key]
+            rows = db.execute(select(model.date, *columns, *aggregates).group_by(model.date, *columns)).all()
+        dictionaries = [Dictionary(1 << self.bits) for _ in self.spec.dimensions]
+        count = len(rows)
+        keys = np.fromiter((r[0].toordinal() for r in rows), np.uint64, count) << np.uint64(CODE_BITS)
+        for i, (dictionary, shift) in enumerate(zip(dictionaries, self.shifts), start=1):
+            codes = np.fromiter((dictionary.encode(r[i]) for r in rows), np.uint64, count)
+            keys |= codes << np.uint64(shift)
+        order = np.argsort(keys, kind="stable")
+        offset = 1 + len(self.spec.dimensions)
+        measures = {
+            name: np.fromiter((r[offset + j] or 0.0 for r in rows), np.float64, count)[order]
+            for j, name in enumerate(self.spec.measures)
+        }
+        with self._lock:
+            self._dictionaries, self._tag, self._loaded = dictionaries, tag, True
+            self._cells = _Cells(keys[order], measures)
+            self._overlay, self._overlay_cells = {}, None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._tag = None
+
+    def ensure_fresh(self) -> None:
+        # Cold: load inline, once. Stale: one reload in the background, stale answers meanwhile.
+        current = versions.snapshot((self.key,))[0]
+        with self._lock:
+            if self._loaded and self._tag is not None and current <= self._tag:
+                return
+            if self._loaded:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh, name=f"cube-{self.name}", daemon=True).start()
+                return
+        with self._load_lock:
+            if not self._loaded:
+                self.load()
+
+    def _refresh(self) -> None:
+        try:
+            with self._load_lock:
+                self.load()
+        except Exception:
+            logger.exception("cube %s reload failed", self.name)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def tag(self) -> int | None:
+        with self._lock:
+            return self._tag
+
+    def apply_commit(self, commit: rollup.Commit) -> None:
+        span = commit.bumped.get(self.key, False)
+        if span is False:
+            return
+        with self._lock:
+            if self._tag is None:
+                return
+            if span is not None and self._tag >= span[1]:
+                return  # loaded after this commit
+            if span is None or self._tag != span[0] or not commit.rows:
+                self._tag = None
+                return
+            cells: dict[int, list[float]] = defaultdict(lambda: [0.0] * len(self.spec.measures))
+            for model, rows, sign in commit.rows:
+                if model is not self.spec.model:
+                    continue
+                for row in rows:
+                    cell = cells[self._encode(self._dictionaries, row)]
+                    for j, column in enumerate(self.spec.measures.values()):
+                        cell[j] += sign * (1.0 if column is None else float(row.get(column) or 0.0))
+            for key, deltas in cells.items():
+                current = self._overlay.get(key)
+                self._overlay[key] = deltas if current is None else [a + b for a, b in zip(current, deltas)]
+            self._overlay_cells = None
+            self._tag = span[1]
+            if len(self._overlay) >= max(MERGE_MIN_CELLS, len(self._cells.keys) // 16):
+                self._merge()
+
+    def _overlay_arrays(self) -> _Cells:
+        # Caller holds the lock
+        if self._overlay_cells is None:
+            keys = np.fromiter(self._overlay.keys(), np.uint64, len(self._overlay))
+            values = np.array(list(self._overlay.values()), dtype=np.float64).reshape(len(keys), len(self.spec.measures))
+            self._overlay_cells = _Cells(keys, {name: values[:, j] for j, name in enumerate(self.spec.measures)})
+        return self._overlay_cells
+
+    def _merge(self) -> None:
+        # Caller holds the lock. Overlay keys may repeat sorted keys: summed by np.unique.
+        overlay = self._overlay_arrays()
+        keys, inverse = np.unique(np.concatenate((self._cells.keys, overlay.keys)), return_inverse=True)
+        measures = {
+            name: np.bincount(inverse, weights=np.concatenate((values, overlay.measures[name])), minlength=len(keys))
+            for name, values in self._cells.measures.items()
+        }
+        self._cells = _Cells(keys, measures)
+        self._overlay, self._overlay_cells = {}, None
+
+    def _select(self, first: date, last: date, measure: str) -> tuple[np.ndarray, np.ndarray, list[Dictionary], list[int]]:
+        # Cells of [first, last] (sorted part and overlay) with one measure, plus the
+        # dictionaries and their sizes as of the same moment
+        with self._lock:
+            cells, overlay = self._cells, self._overlay_arrays()
+            dictionaries = self._dictionaries
+            sizes = [len(d.values) for d in dictionaries]
+        lo_key, hi_key = np.uint64(first.toordinal() << CODE_BITS), np.uint64((last.toordinal() + 1) << CODE_BITS)
+        lo, hi = np.searchsorted(cells.keys, [lo_key, hi_key])
+        in_range = (overlay.keys >= lo_key) & (overlay.keys < hi_key)
+        keys = np.concatenate((cells.keys[lo:hi], overlay.keys[in_range]))
+        values = np.concatenate((cells.measures[measure][lo:hi], overlay.measures[measure][in_range]))
+        return keys, values, dictionaries, sizes
+
+    def matrix(self, first: date, last: date, dimension: str, measure: str) -> tuple[list[Any], np.ndarray]:
+        # Dense (values of `dimension`) x (days of [first, last]) totals of `measure`
+        keys, values, dictionaries, sizes = self._select(first, last, measure)
+        i = self.spec.dimensions.index(dimension)
+        days = (last - first).days + 1
+        offsets = (keys >> np.uint64(CODE_BITS)).astype(np.int64) - first.toordinal()
+        cells = self.dimension_codes(keys, i) * days + offsets
+        totals = np.bincount(cells, weights=values, minlength=sizes[i] * days).reshape(sizes[i], days)
+        return dictionaries[i].values[:sizes[i]], totals
+
+    def query(
+        self, first: date, last: date, by: tuple[str, ...], measure: str, filters: dict[str, list[str]], top: int
+    ) -> dict:
+        keys, values, dictionaries, sizes = self._select(first, last, measure)
+        dims = self.spec.dimensions
+        for dimension, wanted in filters.items():
+            i = dims.index(dimension)
+            codes = [dictionaries[i].codes.get(v) for v in wanted]
+            allowed = np.zeros(sizes[i], dtype=bool)
+            allowed[[c for c in codes if c is not None and c < sizes[i]]] = True
+            selected = allowed[self.dimension_codes(keys, i)]
+            keys, values = keys[selected], values[selected]
+
+        group_sizes = [sizes[dims.index(d)] for d in by]
+        groups = np.zeros(len(keys), dtype=np.int64)
+        for dimension, size in zip(by, group_sizes):
+            groups = groups * size + self.dimension_codes(keys, dims.index(dimension))
+        if int(np.prod(group_sizes)) <= BINCOUNT_MAX_GROUPS:
+            totals = np.bincount(groups, weights=values, minlength=int(np.prod(group_sizes)))
+            present = np.flatnonzero(totals)
+            ids, sums = present, totals[present]
+        else:
+            ids, inverse = np.unique(groups, return_inverse=True)
+            sums = np.bincount(inverse, weights=values)
+            ids, sums = ids[sums != 0], sums[sums != 0]
+
+        # Pareto order: largest first, ties by code (first seen)
+        order = np.lexsort((ids, -sums))
+        total = float(sums.sum())
+        head = order[:top]
+        head_sums = sums[head]
+        cumulative = np.cumsum(head_sums)
+        labels = np.unravel_index(ids[head], group_sizes) if by else ()
+        items = [
+            {
+                **{d: dictionaries[dims.index(d)].values[int(codes[n])] for d, codes in zip(by, labels)},
+                "value": float(value),
+                "share": float(value / total) if total else 0.0,
+                "cumulative_share": float(running / total) if total else 0.0,
+            }
+            for n, (value, running) in enumerate(zip(head_sums, cumulative))
+        ]
+        rest = sums[order[top:]]
+        return {
+            "dataset": self.name,
+            "from": first,
+            "to": last,
+            "by": list(by),
+            "measure": measure,
+            "filters": filters,
+            "total": total,
+            "groups": len(ids),
+            "items": items,
+            "others": {"groups": len(rest), "value": float(rest.sum())},
+        }
+
+
+CUBES = {name: Cube(name, spec) for name, spec in SPECS.items()}
+
+
+@rollup.on_commit
+def _on_commit(commit: rollup.Commit) -> None:
+    for cube in CUBES.values():
+        try:
+            cube.apply_commit(commit)
+        except Exception:
+            # Never fail the writer's commit over it; the next read reloads
+            logger.exception("cube %s update failed", cube.name)
+            cube.invalidate()
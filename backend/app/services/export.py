@@ -0,0 +1,177 @@
+import csv
+import io
+import zlib
+from io import StringIO
+from typing import Iterable, Iterator, NamedTuple
+import orjson
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric, Select
+from app.core.config import settings
+from app.db.session import engine
+
+
+class ExportFormat(NamedTuple):
+    media_type: str
+    extension: str
+    compressions: tuple[str, ...]  # first one is the default
+    http_compressed: bool  # compressed with Content-Encoding (negotiated) rather than inside the file
+
+
+FORMATS = {
+    "csv": ExportFormat("text/csv; charset=utf-8", "csv", ("gzip", "none"), True),
+    "ndjson": ExportFormat("application/x-ndjson", "ndjson", ("gzip", "none"), True),
+    "arrow": ExportFormat("application/vnd.apache.arrow.stream", "arrows", ("zstd", "lz4", "none"), False),
+    "parquet": ExportFormat("application/vnd.apache.parquet", "parquet", ("zstd", "snappy", "gzip", "none"), False),
+}
+
+
+def _qvalue(params: str) -> float:
+    # Anything unparsable counts as q=0: never send a coding the client may not understand
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                return 0.0
+            return q if 0.0 <= q <= 1.0 else 0.0
+    return 1.0
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    # An explicit gzip entry wins over the * wildcard, wherever either appears
+    wildcard = None
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if coding == "gzip":
+            return _qvalue(params) > 0
+        if coding == "*" and wildcard is None:
+            wildcard = _qvalue(params) > 0
+    return bool(wildcard)
+
+
+def iter_batches(stmt: Select, batch_size: int | None = None) -> Iterator[tuple[list[str], list]]:
+    # A connection of its own: the request-scoped session is closed before the body streams
+    batch_size = batch_size or settings.export_batch_size
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+        columns = list(result.keys())
+        empty = True
+        for rows in result.partitions():
+            empty = False
+            yield columns, rows
+        if empty:
+            yield columns, []
+
+
+def iter_csv(stmt: Select, batch_size: int | None = None) -> Iterator[bytes]:
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    for columns, rows in iter_batches(stmt, batch_size):
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def iter_ndjson(stmt: Select, batch_size: int | None = None) -> Iterator[bytes]:
+    # One JSON object per line; dates as ISO strings, numbers stay numbers
+    for columns, rows in iter_batches(stmt, batch_size):
+        if rows:
+            yield b"".join(orjson.dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def arrow_schema(stmt: Select):
+    import pyarrow as pa
+
+    def arrow_type(sql_type):
+        if isinstance(sql_type, Integer):
+            return pa.int64()
+        if isinstance(sql_type, (Float, Numeric)):
+            return pa.float64()
+        if isinstance(sql_type, DateTime):
+            return pa.timestamp("us", tz="UTC" if sql_type.timezone else None)
+        if isinstance(sql_type, Date):
+            return pa.date32()
+        if isinstance(sql_type, Boolean):
+            return pa.bool_()
+        return pa.string()
+
+    return pa.schema([pa.field(c.name, arrow_type(c.type)) for c in stmt.selected_columns])
+
+
+def iter_record_batches(stmt: Select, batch_size: int | None = None):
+    # Column arrays built per cursor partition (rows transposed with zip), never row dicts
+    import pyarrow as pa
+
+    schema = arrow_schema(stmt)
+    for _columns, rows in iter_batches(stmt, batch_size or settings.export_columnar_batch_size):
+        columns = list(zip(*rows)) if rows else [()] * len(schema)
+        arrays = [pa.array(values, type=field.type) for values, field in zip(columns, schema)]
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only file object for the pyarrow writers; drained after every batch so the
+    # body streams instead of being assembled in memory
+    def __init__(self):
+        self.chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def iter_arrow(stmt: Select, compression: str = "zstd", batch_size: int | None = None) -> Iterator[bytes]:
+    # Arrow IPC stream format: pyarrow.ipc.open_stream / pandas / polars read it directly
+    import pyarrow as pa
+
+    sink = _ChunkSink()
+    options = pa.ipc.IpcWriteOptions(compression=None if compression == "none" else compression)
+    with pa.ipc.new_stream(sink, arrow_schema(stmt), options=options) as writer:
+        for batch in iter_record_batches(stmt, batch_size):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_parquet(stmt: Select, compression: str = "zstd", batch_size: int | None = None) -> Iterator[bytes]:
+    # One row group per batch; the footer (written on close) comes last, which is all a
+    # streamed Parquet file needs
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, arrow_schema(stmt), compression=compression) as writer:
+        for batch in iter_record_batches(stmt, batch_size):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_export(stmt: Select, fmt: str, compression: str) -> Iterator[bytes]:
+    if fmt == "arrow":
+        return iter_arrow(stmt, compression)
+    if fmt == "parquet":
+        return iter_parquet(stmt, compression)
+    body = iter_ndjson(stmt) if fmt == "ndjson" else iter_csv(stmt)
+    return gzip_chunks(body) if compression == "gzip" else body
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int | None = None) -> Iterator[bytes]:
+    compressor = zlib.compressobj(settings.export_gzip_level if level is None else level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
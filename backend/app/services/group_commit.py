@@ -0,0 +1,163 @@
+import asyncio
+import functools
+import logging
+import time
+from typing import Any
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import WriterSessionLocal
+from app.services import rollup, versions
+
+
+logger = logging.getLogger(__name__)
+
+Item = tuple[Any, dict[str, Any], asyncio.Future, float]  # (model, row, caller's future, enqueued at)
+
+
+def insert_group(db: Session, items: list[Item]) -> list[dict[str, Any]]:
+    results: list[dict[str, Any] | None] = [None] * len(items)
+    by_model: dict[Any, list[int]] = {}
+    for index, (model, *_rest) in enumerate(items):
+        by_model.setdefault(model, []).append(index)
+    for model, indexes in by_model.items():
+        table = model.__table__
+        rows = [items[i][1] for i in indexes]
+        returned = db.execute(insert(table).returning(*table.c, sort_by_parameter_order=True), rows).mappings()
+        for i, row in zip(indexes, returned):
+            results[i] = dict(row)
+        rollup.apply_rows(db, model, rows)
+    versions.bump(db, *(model.__tablename__ for model in by_model))
+    return results
+
+
+def write_items(items: list[Item]) -> list[dict[str, Any] | Exception]:
+    with WriterSessionLocal() as db:
+        try:
+            results: list[dict[str, Any] | Exception] = list(insert_group(db, items))
+            db.commit()
+            return results
+        except SQLAlchemyError:
+            db.rollback()
+        # One bad row must not fail its neighbours: redo the group one row per transaction
+        results = []
+        for item in items:
+            try:
+                results.extend(insert_group(db, [item]))
+                db.commit()
+            except SQLAlchemyError as e:
+                db.rollback()
+                results.append(e)
+        return results
+
+
+class GroupCommitWriter:
+    # Single-row creates from concurrent requests share one transaction (one fsync on
+    # SQLite): the first queued row opens a window of GROUP_COMMIT_WINDOW_MS, cut short
+    # once GROUP_COMMIT_MAX_ROWS are waiting; rows arriving during a flush form the next
+    # group. Each caller gets its own row back, with its id, or its own error.
+    def __init__(self):
+        self._queue: asyncio.Queue[Item | None] | None = None  # None: stop once drained
+        self._full: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._inflight: list[Item] = []  # the group being written
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._full = asyncio.Event()
+            self._inflight = []
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            self._task.add_done_callback(functools.partial(self._on_done, self._queue, self._inflight))
+
+    @staticmethod
+    def _on_done(queue: asyncio.Queue, inflight: list[Item], task: asyncio.Task) -> None:
+        # After stop() nothing is left here. If the loop died or was cancelled instead,
+        # whoever still waits on it (queued, or in the group being written, whose fate is
+        # unknown) gets an error rather than hanging; the next insert starts a new loop.
+        error = None if task.cancelled() else task.exception()
+        if error is not None:
+            logger.error("Group commit writer died", exc_info=error)
+        pending = list(inflight)
+        while not queue.empty():
+            item = queue.get_nowait()
+            if item is not None:
+                pending.append(item)
+        failure = RuntimeError("Group commit writer stopped")
+        failure.__cause__ = error
+        for _model, _row, future, _enqueued in pending:
+            if not future.done():
+                future.set_exception(failure)
+
+    async def insert(self, model, row: dict[str, Any]) -> dict[str, Any]:
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((model, row, future, time.perf_counter()))
+        if self._queue.qsize() >= settings.group_commit_max_rows:
+            self._full.set()
+        # shield: a client disconnecting must not cancel the row's fate for the others
+        return await asyncio.shield(future)
+
+    async def stop(self) -> None:
+        # Everything queued before the call is still committed
+        if self._task is None or self._task.done():
+            return
+        self._queue.put_nowait(None)
+        self._full.set()
+        await self._task
+        self._task = None
+
+    def _take(self, limit: int) -> list[Item]:
+        items, stopping = [], False
+        while len(items) < limit and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is None:
+                stopping = True
+            else:
+                items.append(item)
+        if stopping:
+            self._queue.put_nowait(None)
+        return items
+
+    async def _run(self) -> None:
+        max_rows = settings.group_commit_max_rows
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                if self._queue.empty():
+                    return
+                self._queue.put_nowait(None)
+                continue
+            if self._queue.qsize() + 1 < max_rows:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), settings.group_commit_window_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+            self._inflight[:] = [first, *self._take(max_rows - 1)]
+            await self._flush(self._inflight)
+            self._inflight.clear()
+
+    async def _flush(self, items: list[Item]) -> None:
+        started = time.perf_counter()
+        try:
+            results = await run_in_threadpool(write_items, items)
+        except Exception as e:  # connection-level failure: every caller in the group sees it
+            results = [e] * len(items)
+        done = time.perf_counter()
+        metrics.GROUP_COMMIT_ROWS.observe(len(items))
+        metrics.GROUP_COMMIT_FLUSH.observe(done - started)
+        for (_model, _row, future, enqueued), result in zip(items, results):
+            metrics.GROUP_COMMIT_LATENCY.observe(done - enqueued)
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+writer = GroupCommitWriter()
@@ -0,0 +1,401 @@
+import asyncio
+import csv
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Any, BinaryIO
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.models import ImportJob, ImportJobError
+from app.db.session import SessionLocal, WriterSessionLocal, is_sqlite_memory
+from app.services import importer
+
+
+logger = logging.getLogger(__name__)
+
+# Background CSV imports. The upload is spooled to disk and recorded as a queued job;
+# a pool process claims it (status -> running, claimed_by, heartbeat_at) and works
+# through the file in chunks. Each chunk commits together with the job's checkpoint,
+# so after a crash the next claimant resumes right after the last committed line and
+# no row is inserted twice. Every web worker sweeps for queued jobs and for running
+# ones whose heartbeat went stale; the conditional claim makes sure one process wins.
+TERMINAL = ("succeeded", "failed", "cancelled")
+
+
+class _Stop(Exception):
+    def __init__(self, status: str):
+        self.status = status
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def utcnow() -> datetime:
+    return datetime.utcnow()
+
+
+def create_job(db: Session, model, source: BinaryIO, filename: str | None, chunk_size: int | None, user: str) -> ImportJob:
+    job_id = uuid.uuid4().hex
+    os.makedirs(settings.import_spool_dir, exist_ok=True)
+    path = os.path.abspath(os.path.join(settings.import_spool_dir, f"{job_id}.csv"))
+    try:
+        with open(path, "wb") as out:
+            shutil.copyfileobj(source, out, 1 << 20)
+            size = out.tell()
+        job = ImportJob(
+            id=job_id,
+            dataset=model.__tablename__,
+            filename=filename,
+            spool_path=path,
+            size_bytes=size,
+            chunk_size=chunk_size or settings.import_chunk_size,
+            created_by=user,
+        )
+        db.add(job)
+        db.commit()
+    except BaseException:
+        _remove_spool(path)
+        raise
+    db.refresh(job)
+    return job
+
+
+def serialize(job: ImportJob) -> dict[str, Any]:
+    elapsed = None
+    if job.started_at is not None:
+        end = job.finished_at or utcnow()
+        elapsed = round((end.replace(tzinfo=None) - job.started_at.replace(tzinfo=None)).total_seconds(), 3)
+    return {
+        "id": job.id,
+        "dataset": job.dataset,
+        "status": job.status,
+        "filename": job.filename,
+        "size_bytes": job.size_bytes,
+        "bytes_done": job.bytes_done,
+        "progress": round(job.bytes_done / job.size_bytes, 4) if job.size_bytes else 1.0,
+        "checkpoint_line": job.checkpoint_line,
+        "inserted": job.inserted,
+        "skipped": job.skipped,
+        "failed": job.failed,
+        "rows_per_s": job.rows_per_s,
+        "elapsed_s": elapsed,
+        "attempts": job.attempts,
+        "cancel_requested": job.cancel_requested,
+        "error": job.error,
+        "created_by": job.created_by,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def request_cancel(db: Session, job: ImportJob) -> None:
+    # Queued and failed jobs stop here; a running one stops at its next checkpoint.
+    # Chunks already committed stay.
+    if job.status in ("queued", "failed"):
+        job.status = "cancelled"
+        job.finished_at = utcnow()
+        db.commit()
+        _remove_spool(job.spool_path)
+    elif job.status == "running":
+        job.cancel_requested = True
+        db.commit()
+
+
+def retry(db: Session, job: ImportJob) -> bool:
+    # A failed job keeps its spool file and checkpoint: it continues where it stopped
+    if job.status != "failed" or not os.path.exists(job.spool_path):
+        return False
+    job.status = "queued"
+    job.error = None
+    job.finished_at = None
+    job.attempts = 0
+    db.commit()
+    return True
+
+
+# --- Pool side -----------------------------------------------------------------------
+
+
+def _claim(db: Session, job_id: str, me: str) -> bool:
+    now = utcnow()
+    stale = now - timedelta(seconds=settings.import_job_heartbeat_timeout_s)
+    result = db.execute(
+        update(ImportJob)
+        .where(
+            ImportJob.id == job_id,
+            or_(ImportJob.status == "queued", and_(ImportJob.status == "running", ImportJob.heartbeat_at < stale)),
+        )
+        .values(status="running", claimed_by=me, heartbeat_at=now, started_at=now, attempts=ImportJob.attempts + 1)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def _checkpoint(db: Session, job_id: str, me: str, **values: Any) -> None:
+    # Same transaction as the chunk it records. Fenced on claimed_by: a process whose
+    # claim was taken over (it stalled past the heartbeat timeout) must not commit.
+    counters = {k: getattr(ImportJob, k) + values.pop(k) for k in ("inserted", "skipped", "failed") if k in values}
+    result = db.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id, ImportJob.claimed_by == me, ImportJob.status == "running")
+        .values(heartbeat_at=utcnow(), **counters, **values)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        raise _Stop("lost")
+
+
+def _store_errors(db: Session, job_id: str, errors: list[dict[str, Any]], room: int) -> int:
+    kept = errors[: max(room, 0)]
+    if kept:
+        db.execute(insert(ImportJobError), [{"job_id": job_id, "line": e["line"], "reason": e["reason"][:1000]} for e in kept])
+    return len(kept)
+
+
+def _finish(db: Session, job_id: str, me: str, status: str, error: str | None = None, rows_per_s: float | None = None) -> None:
+    values: dict[str, Any] = {"status": status, "finished_at": utcnow(), "error": error}
+    if rows_per_s is not None:
+        values["rows_per_s"] = rows_per_s
+    db.execute(update(ImportJob).where(ImportJob.id == job_id, ImportJob.claimed_by == me).values(**values))
+    db.commit()
+
+
+def _process(db: Session, job: ImportJob, me: str) -> float:
+    model = importer.IMPORT_MODELS[job.dataset]
+    converters = importer.column_converters(model, importer.IMPORT_COLUMNS[model])
+    resume_after = job.checkpoint_line
+    stored_errors = db.scalar(select(func.count()).select_from(ImportJobError).where(ImportJobError.job_id == job.id)) or 0
+    started, processed = time.perf_counter(), 0
+
+    def rate() -> float:
+        elapsed = time.perf_counter() - started
+        return round(processed / elapsed, 1) if elapsed > 0 else 0.0
+
+    def check_cancel() -> None:
+        if db.scalar(select(ImportJob.cancel_requested).where(ImportJob.id == job.id)):
+            raise _Stop("cancelled")
+
+    def flush(records: list[importer.Record], position: int) -> None:
+        nonlocal stored_errors, processed
+        rows, lines, errors, skipped = importer.coerce_chunk(converters, records)
+        last_line = records[-1][0]
+        try:
+            if rows:
+                importer.write_rows(db, model, rows)
+            kept = _store_errors(db, job.id, errors, settings.import_max_errors - stored_errors)
+            _checkpoint(
+                db, job.id, me, checkpoint_line=last_line, bytes_done=position, rows_per_s=rate(),
+                inserted=len(rows), skipped=skipped, failed=len(errors),
+            )
+            db.commit()
+            stored_errors += kept
+        except SQLAlchemyError:
+            db.rollback()
+            # Rejected chunk: row by row, each row committed with its own checkpoint so a
+            # crash in here still never re-inserts anything. The chunk's unparseable and
+            # blank lines are recorded with its first commit.
+            pending_errors, pending = errors, {"skipped": skipped, "failed": len(errors)}
+            for row, line in zip(rows, lines):
+                try:
+                    importer.write_rows(db, model, [row])
+                    kept = _store_errors(db, job.id, pending_errors, settings.import_max_errors - stored_errors)
+                    _checkpoint(db, job.id, me, checkpoint_line=line, inserted=1, **pending)
+                    db.commit()
+                except SQLAlchemyError as e:
+                    db.rollback()
+                    pending_errors = [*pending_errors, {"line": line, "reason": str(getattr(e, "orig", e)).strip()}]
+                    kept = _store_errors(db, job.id, pending_errors, settings.import_max_errors - stored_errors)
+                    _checkpoint(db, job.id, me, checkpoint_line=line, skipped=pending["skipped"], failed=pending["failed"] + 1)
+                    db.commit()
+                stored_errors += kept
+                pending_errors, pending = [], {"skipped": 0, "failed": 0}
+            kept = _store_errors(db, job.id, pending_errors, settings.import_max_errors - stored_errors)
+            _checkpoint(db, job.id, me, checkpoint_line=last_line, bytes_done=position, rows_per_s=rate(), **pending)
+            db.commit()
+            stored_errors += kept
+        processed += len(records)
+        check_cancel()
+
+    def fail_stream(line: int, reason: str) -> None:
+        nonlocal stored_errors
+        kept = _store_errors(db, job.id, [{"line": line, "reason": reason}], settings.import_max_errors - stored_errors)
+        _checkpoint(db, job.id, me, failed=1)
+        db.commit()
+        stored_errors += kept
+
+    check_cancel()
+    with open(job.spool_path, "rb") as f:
+        records: list[importer.Record] = []
+        last_line = 0
+        try:
+            for line, row in importer.read_records(f, importer.IMPORT_COLUMNS[model]):
+                last_line = line
+                if line <= resume_after:
+                    continue
+                records.append((line, row))
+                if len(records) >= job.chunk_size:
+                    flush(records, f.tell())
+                    records = []
+        except UnicodeDecodeError:
+            fail_stream(last_line + 1, "file is not valid UTF-8; import stopped")
+        except csv.Error as e:
+            fail_stream(last_line + 1, f"malformed CSV ({e}); import stopped")
+        if records:
+            flush(records, job.size_bytes)
+        _checkpoint(db, job.id, me, bytes_done=job.size_bytes, rows_per_s=rate())
+        db.commit()
+    return rate()
+
+
+def run_job(job_id: str) -> str:
+    # Runs in a pool process (or thread, for in-memory databases)
+    me = worker_id()
+    with WriterSessionLocal() as db:
+        if not _claim(db, job_id, me):
+            return "not claimed"
+        job = db.get(ImportJob, job_id)
+        if job.attempts > settings.import_job_max_attempts:
+            _finish(db, job_id, me, "failed", f"gave up after {job.attempts - 1} attempts")
+            return "failed"
+        try:
+            rows_per_s = _process(db, job, me)
+            status, error = "succeeded", None
+        except _Stop as stop:
+            if stop.status == "lost":
+                return "lost claim"
+            status, error, rows_per_s = stop.status, None, None
+        except Exception as e:
+            logger.exception("import job %s failed", job_id)
+            db.rollback()
+            status, error, rows_per_s = "failed", f"{e.__class__.__name__}: {e}"[:1000], None
+        _finish(db, job_id, me, status, error, rows_per_s)
+        if status != "failed":
+            _remove_spool(job.spool_path)
+        return status
+
+
+def _remove_spool(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# --- Web worker side -----------------------------------------------------------------
+
+_pool: Executor | None = None
+_pool_lock = threading.Lock()
+_submitted: set[str] = set()
+_sweeper: asyncio.Task | None = None
+
+
+def _get_pool() -> Executor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if is_sqlite_memory(settings.database_url):
+                # Another process would see a different (empty) database
+                _pool = ThreadPoolExecutor(max_workers=settings.import_job_workers, thread_name_prefix="import-job")
+            else:
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.import_job_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+        return _pool
+
+
+def _discard_pool(pool: Executor) -> None:
+    # A pool process that died (OOM kill, segfault) breaks the whole ProcessPoolExecutor;
+    # the next submit starts a fresh one and the sweep resumes the interrupted job
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            _submitted.clear()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _done(job_id: str, pool: Executor, future: Future) -> None:
+    with _pool_lock:
+        _submitted.discard(job_id)
+    if future.cancelled() or future.exception() is None:
+        return
+    logger.error("import job %s crashed its worker", job_id, exc_info=future.exception())
+    if isinstance(future.exception(), BrokenProcessPool):
+        _discard_pool(pool)
+
+
+def submit(job_id: str) -> None:
+    with _pool_lock:
+        if job_id in _submitted:
+            return
+        _submitted.add(job_id)
+    pool = _get_pool()
+    try:
+        future = pool.submit(run_job, job_id)
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        pool = _get_pool()
+        with _pool_lock:
+            _submitted.add(job_id)
+        future = pool.submit(run_job, job_id)
+    future.add_done_callback(lambda f: _done(job_id, pool, f))
+
+
+def sweep() -> list[str]:
+    stale = utcnow() - timedelta(seconds=settings.import_job_heartbeat_timeout_s)
+    with SessionLocal() as db:
+        ids = list(db.scalars(
+            select(ImportJob.id)
+            .where(or_(ImportJob.status == "queued", and_(ImportJob.status == "running", ImportJob.heartbeat_at < stale)))
+            .order_by(ImportJob.created_at)
+        ))
+    for job_id in ids:
+        submit(job_id)
+    return ids
+
+
+async def _sweep_forever() -> None:
+    while True:
+        try:
+            await run_in_threadpool(sweep)
+        except Exception:
+            logger.exception("import job sweep failed")
+        await asyncio.sleep(settings.import_job_sweep_s)
+
+
+def start() -> None:
+    global _sweeper
+    if _sweeper is None or _sweeper.done():
+        _sweeper = asyncio.get_running_loop().create_task(_sweep_forever())
+
+
+async def stop() -> None:
+    global _sweeper, _pool
+    if _sweeper is not None:
+        _sweeper.cancel()
+        try:
+            await _sweeper
+        except asyncio.CancelledError:
+            pass
+        _sweeper = None
+    with _pool_lock:
+        if _pool is not None:
+            # Queued jobs are dropped here (they stay queued in the database); a running one
+            # completes, or if the process is killed, is resumed from its checkpoint by a
+            # later sweep once its heartbeat is stale
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+            _submitted.clear()
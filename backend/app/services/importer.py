@@ -0,0 +1,185 @@
+import csv
+import io
+import time
+from datetime import date, datetime
+from typing import Any, BinaryIO, Callable, Iterator
+from sqlalchemy import Date, Float, Integer, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.models import Breakage, Complaint, Delay, Entry
+from app.services import rollup, versions
+
+
+Record = tuple[int, dict[str, str | None]]
+
+# CSV columns accepted per dataset
+IMPORT_COLUMNS: dict[type, list[str]] = {
+    Entry: ["date", "shift", "pedidos_m2", "forno_m2", "notes"],
+    Delay: ["date", "order_code", "customer", "days_late", "reason", "order_value"],
+    Breakage: ["date", "sector", "type", "operator", "qty_m2", "notes"],
+    Complaint: ["date", "customer", "type", "qty", "description"],
+}
+IMPORT_MODELS = {model.__tablename__: model for model in IMPORT_COLUMNS}
+
+
+def parse_date_fast(value: str) -> date:
+    # Same formats as datasets.parse_date (YYYY-MM-DD, DD/MM/YYYY); strptime only for
+    # the unpadded variants
+    value = value.strip()
+    try:
+        if len(value) == 10:
+            if value[4] == "-" and value[7] == "-":
+                return date.fromisoformat(value)
+            if value[2] == "/" and value[5] == "/":
+                return date(int(value[6:]), int(value[3:5]), int(value[:2]))
+        for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                continue
+    except ValueError:
+        pass
+    raise ValueError(f"invalid date '{value}'")
+
+
+def _to_float(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"invalid number '{value}'") from None
+
+
+def _to_int(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"invalid integer '{value}'") from None
+
+
+def column_converters(model, columns: list[str]) -> dict[str, tuple[Callable[[str], Any], bool]]:
+    converters = {}
+    for name in columns:
+        column = model.__table__.c[name]
+        if isinstance(column.type, Date):
+            convert = parse_date_fast
+        elif isinstance(column.type, Float):
+            convert = _to_float
+        elif isinstance(column.type, Integer):
+            convert = _to_int
+        else:
+            convert = str
+        converters[name] = (convert, not column.nullable)
+    return converters
+
+
+def read_records(stream: BinaryIO, columns: list[str]) -> Iterator[Record]:
+    # Decodes incrementally; the upload is never held in memory as a whole
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {col: row.get(col) for col in columns}
+    finally:
+        text.detach()
+
+
+def coerce_chunk(converters, records: list[Record]) -> tuple[list[dict[str, Any]], list[int], list[dict[str, Any]], int]:
+    # Column at a time: one converter lookup per column per chunk instead of per cell
+    failed: dict[int, str] = {}
+    skipped = {i for i, (_, row) in enumerate(records) if all(v in (None, "") for v in row.values())}
+    columns: dict[str, list[Any]] = {}
+    for name, (convert, required) in converters.items():
+        values: list[Any] = []
+        for i, (_, row) in enumerate(records):
+            raw = row.get(name)
+            if raw is None or raw == "":
+                if required and i not in skipped and i not in failed:
+                    failed[i] = f"{name}: value is required"
+                values.append(None)
+                continue
+            try:
+                values.append(convert(raw))
+            except ValueError as e:
+                failed.setdefault(i, f"{name}: {e}")
+                values.append(None)
+        columns[name] = values
+    names = list(columns)
+    rows, lines = [], []
+    for i, values in enumerate(zip(*columns.values())):
+        if i in failed or i in skipped:
+            continue
+        rows.append(dict(zip(names, values)))
+        lines.append(records[i][0])
+    errors = [{"line": records[i][0], "reason": reason} for i, reason in sorted(failed.items())]
+    return rows, lines, errors, len(skipped)
+
+
+def write_rows(db: Session, model, rows: list[dict[str, Any]]) -> None:
+    db.execute(insert(model.__table__), rows)
+    rollup.apply_rows(db, model, rows)
+    versions.bump(db, model.__tablename__)
+
+
+def insert_chunk(db: Session, model, rows: list[dict[str, Any]], lines: list[int]) -> tuple[int, list[dict[str, Any]]]:
+    if not rows:
+        return 0, []
+    try:
+        write_rows(db, model, rows)
+        db.commit()
+        return len(rows), []
+    except SQLAlchemyError:
+        db.rollback()
+    # The batch was rejected: retry row by row to find the offending lines
+    inserted, errors = 0, []
+    for row, line in zip(rows, lines):
+        try:
+            write_rows(db, model, [row])
+            db.commit()
+            inserted += 1
+        except SQLAlchemyError as e:
+            db.rollback()
+            errors.append({"line": line, "reason": str(getattr(e, "orig", e)).strip()})
+    return inserted, errors
+
+
+def import_csv(db: Session, model, columns: list[str], stream: BinaryIO, chunk_size: int | None = None) -> dict[str, Any]:
+    chunk_size = chunk_size or settings.import_chunk_size
+    converters = column_converters(model, columns)
+    started = time.perf_counter()
+    stats: dict[str, Any] = {"inserted": 0, "skipped": 0, "failed": 0, "errors": []}
+
+    def record_errors(errors: list[dict[str, Any]]) -> None:
+        stats["failed"] += len(errors)
+        room = settings.import_max_errors - len(stats["errors"])
+        stats["errors"].extend(errors[: max(room, 0)])
+
+    def flush(records: list[Record]) -> None:
+        rows, lines, errors, skipped = coerce_chunk(converters, records)
+        inserted, insert_errors = insert_chunk(db, model, rows, lines)
+        stats["inserted"] += inserted
+        stats["skipped"] += skipped
+        record_errors(errors + insert_errors)
+
+    records: list[Record] = []
+    last_line = 0
+    try:
+        for line, row in read_records(stream, columns):
+            last_line = line
+            records.append((line, row))
+            if len(records) >= chunk_size:
+                flush(records)
+                records = []
+    except UnicodeDecodeError:
+        record_errors([{"line": last_line + 1, "reason": "file is not valid UTF-8; import stopped"}])
+    except csv.Error as e:
+        record_errors([{"line": last_line + 1, "reason": f"malformed CSV ({e}); import stopped"}])
+    if records:
+        flush(records)
+
+    elapsed = time.perf_counter() - started
+    processed = stats["inserted"] + stats["skipped"] + stats["failed"]
+    stats["elapsed_s"] = round(elapsed, 4)
+    stats["rows_per_s"] = round(processed / elapsed, 1) if elapsed > 0 else None
+    stats["errors_truncated"] = stats["failed"] > len(stats["errors"])
+    return stats
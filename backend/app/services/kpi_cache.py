@@ -0,0 +1,120 @@
+import logging
+import threading
+from datetime import date
+from typing import Any, Callable
+from sqlalchemy.orm import Session
+from app.db.session import SessionLocal
+from app.services import versions
+from app.services.kpi_calculator import kpis_overview
+from app.services.report_text import build_executive_text
+
+
+logger = logging.getLogger(__name__)
+
+
+# Results per window, tagged with the data versions they were computed from. When the
+# versions move, the first reader schedules one background recompute and everyone keeps
+# getting the stale value until it lands; only a cold window is computed inline (once).
+# Windows are tuples ending with the reference date.
+class VersionedCache:
+    def __init__(self, compute: Callable[[Session, tuple], Any], keys=versions.KPI_KEYS):
+        self.compute = compute
+        self.keys = keys
+        self._entries: dict[tuple, tuple[tuple[int, ...], Any]] = {}
+        self._refreshing: set[tuple] = set()
+        self._window_locks: dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def peek(self, window: tuple) -> Any | None:
+        entry = self.peek_entry(window)
+        return None if entry is None else entry[1]
+
+    def get(self, window: tuple) -> Any:
+        return self.get_entry(window)[1]
+
+    def peek_entry(self, window: tuple) -> tuple[tuple[int, ...], Any] | None:
+        # For the event loop, never touches the database: returns the cached (versions,
+        # value) pair (scheduling a refresh when it is stale), or None for a cold window or
+        # when the versions snapshot is due for a re-read (then use get_entry in the
+        # threadpool). The versions are the ones the value was computed from, which is
+        # what an ETag for it must be built on.
+        current = versions.peek(self.keys)
+        return None if current is None else self._cached(window, current)
+
+    def _cached(self, window: tuple, current: tuple[int, ...]) -> tuple[tuple[int, ...], Any] | None:
+        with self._lock:
+            cached = self._entries.get(window)
+            if cached is None:
+                return None
+            if cached[0] != current and window not in self._refreshing:
+                self._refreshing.add(window)
+                threading.Thread(target=self._refresh, args=(window,), daemon=True).start()
+            return cached
+
+    def get_entry(self, window: tuple) -> tuple[tuple[int, ...], Any]:
+        cached = self._cached(window, versions.snapshot(self.keys))
+        if cached is not None:
+            return cached
+        with self._lock:
+            window_lock = self._window_locks.setdefault(window, threading.Lock())
+        with window_lock:
+            with self._lock:
+                cached = self._entries.get(window)
+            if cached is not None:
+                return cached
+            return self._load(window)
+
+    def get_entry_for(self, window: tuple, tag: tuple[int, ...]) -> tuple[tuple[int, ...], Any]:
+        # The value computed from `tag` (or newer), never a stale one: for pushers, which
+        # only send when the versions move
+        with self._lock:
+            window_lock = self._window_locks.setdefault(window, threading.Lock())
+        with window_lock:
+            with self._lock:
+                cached = self._entries.get(window)
+            if cached is not None and cached[0] == tag:
+                return cached
+            return self._load(window)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._window_locks.clear()
+
+    def _load(self, window: tuple) -> tuple[tuple[int, ...], Any]:
+        with SessionLocal() as db:
+            # Versions are read before computing so a write landing mid-compute still
+            # invalidates the result on the next read.
+            tag = tuple(versions.read(db, self.keys)[k] for k in self.keys)
+            value = self.compute(db, window)
+        with self._lock:
+            self._entries = {w: e for w, e in self._entries.items() if w[-1] == window[-1]}
+            self._entries[window] = (tag, value)
+            self._window_locks = {w: l for w, l in self._window_locks.items() if w[-1] == window[-1]}
+        return tag, value
+
+    def _refresh(self, window: tuple) -> None:
+        try:
+            self._load(window)
+        except Exception:
+            logger.exception("KPI cache refresh failed for %r", window)
+        finally:
+            with self._lock:
+                self._refreshing.discard(window)
+
+
+def compute_overview(db: Session, _window: tuple | None = None) -> dict:
+    kpis = kpis_overview(db)
+    kpis["executive_text"] = build_executive_text(kpis)
+    return kpis
+
+
+overview_cache = VersionedCache(compute_overview)
+
+
+def overview_window() -> tuple:
+    return ("overview", date.today())
+
+
+def get_overview() -> dict:
+    return overview_cache.get(overview_window())
@@ -1,7 +1,21 @@
 from datetime import date, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.db.models import Entry, Breakage, Delay, Complaint, Goal
+from app.db.models import Goal
+from app.services import rollup
+
+
+GOAL_DEFAULTS = {"forno_daily": 1.0, "production_day": 0.0, "production_night": 0.0, "loss_pct": 0.0}
+# The overview covers everything since OVERVIEW_DAYS ago, today included, and rates
+# utilization against OVERVIEW_DAYS days of forno capacity
+OVERVIEW_DAYS = 30
+
+
+def overview_start(today: date) -> date:
+    return today - timedelta(days=OVERVIEW_DAYS)
+
+
+def utilization_pct(production: float, forno_daily: float, days: float) -> float:
+    return (production / (forno_daily * days)) * 100.0 if forno_daily else 0.0
 
 
 def get_goal_value(db: Session, key: str, default: float) -> float:
@@ -9,26 +23,34 @@ def get_goal_value(db: Session, key: str, default: float) -> float:
     return goal.value if goal else default
 
 
+def get_goal_values(db: Session, defaults: dict[str, float]) -> dict[str, float]:
+    rows = db.query(Goal.key, Goal.value).filter(Goal.key.in_(list(defaults))).all()
+    values = dict(defaults)
+    values.update({key: value for key, value in rows})
+    return values
+
+
 def kpis_overview(db: Session) -> dict:
     today = date.today()
-    start = today - timedelta(days=30)
+    start = overview_start(today)
 
-    production_30d = db.query(func.coalesce(func.sum(Entry.forno_m2), 0.0)).filter(Entry.date >= start).scalar() or 0.0
-    orders_30d = db.query(func.coalesce(func.sum(Entry.pedidos_m2), 0.0)).filter(Entry.date >= start).scalar() or 0.0
-    loss_30d = db.query(func.coalesce(func.sum(Breakage.qty_m2), 0.0)).filter(Breakage.date >= start).scalar() or 0.0
-    delays_count = db.query(func.count(Delay.id)).filter(Delay.date >= start).scalar() or 0
-    complaints_count = db.query(func.count(Complaint.id)).filter(Complaint.date >= start).scalar() or 0
+    totals = rollup.totals(db, start)
+    production_30d = totals["production_m2"]
+    orders_30d = totals["orders_m2"]
+    loss_30d = totals["loss_m2"]
+    delays_count = int(totals["delays_count"])
+    complaints_count = int(totals["complaints_count"])
 
     loss_pct = (loss_30d / max(production_30d, 1.0)) * 100.0
 
-    forno_daily_goal = get_goal_value(db, "forno_daily", 1.0)
-    utilization_pct = (production_30d / (forno_daily_goal * 30.0)) * 100.0 if forno_daily_goal else 0.0
+    goal_values = get_goal_values(db, GOAL_DEFAULTS)
+    forno_daily_goal = goal_values["forno_daily"]
 
     goals = {
         "forno_daily": forno_daily_goal,
-        "prod_day": get_goal_value(db, "production_day", 0.0),
-        "prod_night": get_goal_value(db, "production_night", 0.0),
-        "loss_pct": get_goal_value(db, "loss_pct", 0.0),
+        "prod_day": goal_values["production_day"],
+        "prod_night": goal_values["production_night"],
+        "loss_pct": goal_values["loss_pct"],
     }
 
     return {
@@ -38,6 +60,6 @@ def kpis_overview(db: Session) -> dict:
         "loss_pct": loss_pct,
         "delays_count": delays_count,
         "complaints_count": complaints_count,
-        "utilization_pct": utilization_pct,
+        "utilization_pct": utilization_pct(production_30d, forno_daily_goal, OVERVIEW_DAYS),
         "goals": goals,
     }
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import orjson
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from app.core.config import settings
+from app.services import versions
+from app.services.kpi_cache import overview_cache, overview_window
+
+
+logger = logging.getLogger(__name__)
+
+Event = tuple[str, bytes]  # (event id, encoded SSE frame)
+
+
+def _state() -> tuple[tuple[int, ...], tuple]:
+    return versions.snapshot(overview_cache.keys, max_age=0), overview_window()
+
+
+def encode(tag: tuple[int, ...], window: tuple, kpis: dict) -> Event:
+    event_id = f"{window[-1].isoformat()}:{'.'.join(map(str, tag))}"
+    data = orjson.dumps(jsonable_encoder(kpis))
+    return event_id, b"event: overview\nid: " + event_id.encode() + b"\ndata: " + data + b"\n\n"
+
+
+class KpiBroadcaster:
+    # One per worker process. The data_versions table is the cross-worker channel: every
+    # write path bumps it in its own transaction, whichever worker served the write. While
+    # anyone is subscribed, this polls it; once the versions have been quiet for the
+    # debounce period (or changing for max_delay, during long imports) the overview is
+    # recomputed once and the same encoded frame goes to every subscriber.
+    def __init__(self):
+        self._subscribers: set[asyncio.Queue[Event]] = set()
+        self._has_subscribers = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._latest: tuple[tuple, Event] | None = None  # (state, event)
+        self._build_lock = asyncio.Lock()
+
+    def subscribe(self) -> asyncio.Queue[Event]:
+        # Holds only the newest frame: a slow client skips intermediate states
+        queue: asyncio.Queue[Event] = asyncio.Queue(maxsize=1)
+        self._subscribers.add(queue)
+        self._has_subscribers.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[Event]) -> None:
+        self._subscribers.discard(queue)
+        if not self._subscribers:
+            self._has_subscribers.clear()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    async def latest(self) -> Event:
+        # Checked against the current versions, as _run does: with nobody subscribed
+        # nothing keeps _latest up to date
+        async with self._build_lock:
+            state = await run_in_threadpool(_state)
+            if self._latest is None or self._latest[0] != state:
+                self._latest = await self._build(state)
+            return self._latest[1]
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _build(self, state: tuple) -> tuple[tuple, Event]:
+        tag, window = state
+        computed, kpis = await run_in_threadpool(overview_cache.get_entry_for, window, tag)
+        # Versions may have moved on during the compute; the frame carries what it reflects
+        return (computed, window), encode(computed, window, kpis)
+
+    async def _publish(self, state: tuple) -> None:
+        async with self._build_lock:
+            self._latest = await self._build(state)
+            event = self._latest[1]
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        seen = pending_since = changed_at = None
+        while True:
+            if not self._subscribers:
+                seen = pending_since = None
+                await self._has_subscribers.wait()
+            await asyncio.sleep(settings.kpi_stream_poll_s)
+            try:
+                state = await run_in_threadpool(_state)
+                published = self._latest[0] if self._latest else None
+                if state == published:
+                    seen = pending_since = None
+                    continue
+                now = loop.time()
+                if state != seen:
+                    seen, changed_at = state, now
+                    pending_since = pending_since or now
+                if (
+                    now - changed_at >= settings.kpi_stream_debounce_s
+                    or now - pending_since >= settings.kpi_stream_max_delay_s
+                ):
+                    await self._publish(state)
+                    seen = pending_since = None
+            except Exception:
+                logger.exception("KPI stream update failed")
+
+
+broadcaster = KpiBroadcaster()
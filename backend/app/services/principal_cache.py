@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+from app.core.config import settings
+from app.services import versions
+
+
+class Principal(NamedTuple):
+    id: int
+    email: str
+    role: str
+    is_active: bool
+
+
+class PrincipalCache:
+    # LRU of verified token digest -> principal. An entry dies at the earliest of its TTL,
+    # the token's own `exp`, or any change to the users table (shared "users" version).
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[bytes, tuple[Principal, float, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Principal | None:
+        # Blocking when the users version is due for a re-read: from the event loop use peek
+        return self._lookup(token, self.users_version)
+
+    def peek(self, token: str) -> Principal | None:
+        # Never touches the database: also a miss while the users version is due for a
+        # re-read, which the caller then does through get() in the threadpool
+        return self._lookup(token, lambda: (versions.peek((versions.USERS_KEY,)) or (None,))[0])
+
+    def _lookup(self, token: str, current_version: Callable[[], int | None]) -> Principal | None:
+        key = self.digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        principal, expires_at, users_version = entry
+        if time.time() < expires_at:
+            current = current_version()
+            if current is None:
+                return None
+            if current == users_version:
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                return principal
+        with self._lock:
+            self._entries.pop(key, None)
+        return None
+
+    def put(self, token: str, principal: Principal, token_exp: float | None, users_version: int) -> None:
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._entries[self.digest(token)] = (principal, expires_at, users_version)
+            self._entries.move_to_end(self.digest(token))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def users_version() -> int:
+        return versions.snapshot((versions.USERS_KEY,))[0]
+
+
+principal_cache = PrincipalCache(settings.principal_cache_size, settings.principal_cache_ttl_s)
@@ -0,0 +1,113 @@
+import itertools
+import re
+from typing import Any, Iterator, NamedTuple
+from sqlalchemy.engine import Connection
+from app.api.v1.routers import datasets
+from app.db import models
+
+
+# Regression check for the dataset list/export queries: every filter/sort combination
+# the endpoints can build is run through EXPLAIN QUERY PLAN (SQLite) and must not scan
+# a base table or sort in a temp B-tree, except where sorting is inherent:
+#   - text search (customer / q): the FTS index yields a set of rowids, not an order
+#   - a date range ordered by a column other than date: only the matched range is sorted
+# The default order and the indexed ones (datasets.SORT_COLUMNS) are checked; order_by on
+# any other column is accepted without an index and sorts.
+FILTERS = {
+    "from": "2024-01-01",
+    "to": "2024-12-31",
+    "customer": "cliente",
+    "sector": "corte",
+    "q": "forno",
+}
+DATASET_FILTERS = {
+    models.Entry: ("from", "to"),
+    models.Delay: ("from", "to", "customer", "q"),
+    models.Breakage: ("from", "to", "sector"),
+    models.Complaint: ("from", "to", "q"),
+}
+TEXT_FILTERS = ("customer", "q")
+EQUALITY_FILTERS = ("sector",)
+
+_full_scan = re.compile(r"^SCAN (\w+)$")
+
+
+class Case(NamedTuple):
+    name: str
+    sql: str
+    params: tuple
+    expect_sort: bool
+
+
+class Failure(NamedTuple):
+    case: str
+    problem: str
+    plan: list[str]
+
+
+def _filter_sets(model) -> Iterator[dict[str, Any]]:
+    names = DATASET_FILTERS[model]
+    for n in range(len(names) + 1):
+        for combo in itertools.combinations(names, n):
+            yield {name: FILTERS[name] for name in combo}
+
+
+def _expect_sort(params: dict[str, Any], order_by: str | None) -> bool:
+    if any(params.get(f) for f in TEXT_FILTERS):
+        return True
+    has_range = bool(params.get("from") or params.get("to"))
+    equality = {f for f in EQUALITY_FILTERS if params.get(f)}
+    return has_range and order_by not in (None, "date", *equality)
+
+
+def _cursor_for(model, order_by: str | None, is_desc: bool) -> str:
+    columns, _ = datasets.sort_key(model, order_by, is_desc)
+    sample = {"date": "2024-06-01", "id": 1000}
+    return datasets.encode_cursor(order_by, is_desc, [sample.get(c.key, "m") for c in columns])
+
+
+def cases(conn: Connection) -> Iterator[Case]:
+    for model in DATASET_FILTERS:
+        table = model.__tablename__
+        names = [c.key for c in model.__table__.columns]
+        for params, order_by, is_desc in itertools.product(
+            _filter_sets(model), (None, *datasets.SORT_COLUMNS[model]), (False, True)
+        ):
+            label = f"{table} {params or '{}'} order_by={order_by} desc={is_desc}"
+            expect_sort = _expect_sort(params, order_by)
+            statements = {
+                "list": datasets.list_statement(model, names, params, order_by, is_desc, 100, 0),
+                "list+cursor": datasets.list_statement(
+                    model, ["id"], params, order_by, is_desc, 100, 0, _cursor_for(model, order_by, is_desc)
+                ),
+                "export": datasets.export_statement(model, params, order_by, is_desc, None, 0),
+            }
+            for kind, stmt in statements.items():
+                compiled = stmt.compile(conn.engine)
+                params = tuple(compiled.params[name] for name in compiled.positiontup)
+                yield Case(f"{kind} {label}", compiled.string, params, expect_sort)
+
+
+def explain(conn: Connection, sql: str, params: tuple = ()) -> list[str]:
+    return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def problems(plan: list[str], expect_sort: bool) -> list[str]:
+    found = []
+    for step in plan:
+        scan = _full_scan.match(step)
+        if scan and not scan.group(1).endswith("_fts"):
+            found.append(f"full scan of {scan.group(1)}")
+        if step.startswith("USE TEMP B-TREE") and not expect_sort:
+            found.append(step.lower())
+    return found
+
+
+def check(conn: Connection) -> tuple[int, list[Failure]]:
+    total, failures = 0, []
+    for case in cases(conn):
+        total += 1
+        plan = explain(conn, case.sql, case.params)
+        for problem in problems(plan, case.expect_sort):
+            failures.append(Failure(case.name, problem, plan))
+    return total, failures
@@ -1,11 +1,10 @@
-def build_executive_text(kpis: dict) -> str:
-    utilization = kpis.get("utilization_pct", 0.0)
-    loss_pct = kpis.get("loss_pct", 0.0)
-    delays = kpis.get("delays_count", 0)
-    complaints = kpis.get("complaints_count", 0)
-    production = kpis.get("production_30d_m2", 0.0)
-    orders = kpis.get("orders_30d_m2", 0.0)
+MONTHS = (
+    "janeiro", "fevereiro", "março", "abril", "maio", "junho",
+    "julho", "agosto", "setembro", "outubro", "novembro", "dezembro",
+)
+
 
+def _text(production: float, orders: float, utilization: float, loss_pct: float, delays: int, complaints: int, span: str) -> str:
     trend = "estável"
     if utilization >= 90:
         trend = "acima do planejado"
@@ -13,7 +12,39 @@ def build_executive_text(kpis: dict) -> str:
         trend = "abaixo do planejado"
 
     return (
-        f"Produção consolidada de {production:.0f} m² nos últimos 30 dias, com utilização do forno {utilization:.1f}% ({trend}). "
+        f"Produção consolidada de {production:.0f} m² {span}, com utilização do forno {utilization:.1f}% ({trend}). "
         f"As perdas acumuladas representam {loss_pct:.1f}% da produção. Foi registrado {delays} atraso(s) e {complaints} reclamação(ões) no período. "
         f"Pedidos no período somam {orders:.0f} m². Reforçar ações de redução de perdas e atenção às causas de atrasos."
     )
+
+
+def build_executive_text(kpis: dict) -> str:
+    return _text(
+        kpis.get("production_30d_m2", 0.0),
+        kpis.get("orders_30d_m2", 0.0),
+        kpis.get("utilization_pct", 0.0),
+        kpis.get("loss_pct", 0.0),
+        kpis.get("delays_count", 0),
+        kpis.get("complaints_count", 0),
+        "nos últimos 30 dias",
+    )
+
+
+def period_label(period: str, start, end) -> str:
+    if period == "month":
+        return f"{MONTHS[start.month - 1]} de {start.year}"
+    return f"semana de {start:%d/%m/%Y} a {end:%d/%m/%Y}"
+
+
+def build_period_text(kpis: dict) -> str:
+    # Report payloads (services/reports.py): same wording, named period
+    span = "em " + kpis["label"] if kpis["period"] == "month" else "na " + kpis["label"]
+    return _text(
+        kpis["production_m2"],
+        kpis["orders_m2"],
+        kpis["utilization_pct"],
+        kpis["loss_pct"],
+        kpis["delays_count"],
+        kpis["complaints_count"],
+        span,
+    )
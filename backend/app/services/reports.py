@@ -0,0 +1,256 @@
+import asyncio
+import bisect
+import hashlib
+import html
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.models import DailyRollup, REPORT_PERIODS, Report
+from app.db.session import SessionLocal, WriterSessionLocal
+from app.services import rollup, versions
+from app.services.kpi_calculator import GOAL_DEFAULTS, get_goal_values, utilization_pct
+from app.services.report_text import build_period_text, period_label
+
+
+logger = logging.getLogger(__name__)
+
+# Weekly (Monday to Sunday) and monthly reports, built once and served as stored. A
+# period closes REPORT_SETTLE_DAYS after its last day; its report is then built from the
+# daily rollup and stored with a fingerprint of the totals it used. Each tick compares
+# the fingerprints of every closed period against the stored ones (one read of
+# daily_rollup, skipped while the data versions and the date stay put) and rebuilds
+# only the periods whose totals moved: late entries, imports into the past, batch
+# corrections. A rebuild keeps the goals in force when the report was first built.
+# Only the latest REPORTS_BACKFILL_PERIODS of each kind are considered; older reports
+# stay as stored.
+# Every web worker runs the scheduler; the writes are conditional, so overlapping
+# ticks in several workers don't clobber each other.
+_seen: tuple | None = None  # (dataset versions, date) of the last completed tick
+_task: asyncio.Task | None = None
+
+
+def period_bounds(period: str, day: date) -> tuple[date, date]:
+    if period == "week":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    start = day.replace(day=1)
+    return start, (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+def closed_periods(period: str, first: date, today: date) -> list[tuple[date, date]]:
+    # The latest REPORTS_BACKFILL_PERIODS closed periods that end on or after `first`,
+    # oldest first
+    start, end = period_bounds(period, today)
+    while end + timedelta(days=settings.report_settle_days) >= today:
+        start, end = period_bounds(period, start - timedelta(days=1))
+    periods = []
+    while end >= first and len(periods) < settings.reports_backfill_periods:
+        periods.append((start, end))
+        start, end = period_bounds(period, start - timedelta(days=1))
+    return periods[::-1]
+
+
+def fingerprint(totals: dict[str, float]) -> str:
+    # Rounded: a value added and later subtracted again must not count as a change
+    values = tuple(round(totals[f], 6) for f in rollup.ROLLUP_FIELDS)
+    return hashlib.blake2b(repr(values).encode(), digest_size=16).hexdigest()
+
+
+def build_payload(period: str, start: date, end: date, totals: dict[str, float], goals: dict[str, float]) -> dict[str, Any]:
+    days = (end - start).days + 1
+    production = totals["production_m2"]
+    return {
+        "period": period,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "label": period_label(period, start, end),
+        "days": days,
+        "production_m2": production,
+        "orders_m2": totals["orders_m2"],
+        "loss_m2": totals["loss_m2"],
+        # Same definitions as the overview
+        "loss_pct": (totals["loss_m2"] / max(production, 1.0)) * 100.0,
+        "utilization_pct": utilization_pct(production, goals["forno_daily"], days),
+        "delays_count": int(totals["delays_count"]),
+        "complaints_count": int(totals["complaints_count"]),
+        "goals": goals,
+    }
+
+
+def render_html(payload: dict[str, Any], text: str, revision: int, generated_at: datetime) -> str:
+    rows = [
+        ("Produção", f"{payload['production_m2']:,.0f} m²"),
+        ("Pedidos", f"{payload['orders_m2']:,.0f} m²"),
+        ("Utilização do forno", f"{payload['utilization_pct']:.1f}% (meta {payload['goals']['forno_daily']:,.0f} m²/dia)"),
+        ("Perdas", f"{payload['loss_m2']:,.1f} m² — {payload['loss_pct']:.1f}% (meta {payload['goals']['loss_pct']:.1f}%)"),
+        ("Atrasos", str(payload["delays_count"])),
+        ("Reclamações", str(payload["complaints_count"])),
+    ]
+    cells = "\n".join(f"<tr><th>{html.escape(k)}</th><td>{html.escape(v)}</td></tr>" for k, v in rows)
+    title = html.escape(f"Relatório executivo — {payload['label']}")
+    return (
+        '<!DOCTYPE html>\n<html lang="pt-BR">\n<head><meta charset="utf-8"><title>' + title + "</title>\n"
+        "<style>body{font-family:sans-serif;max-width:48rem;margin:2rem auto;color:#222}"
+        "table{border-collapse:collapse;width:100%}th,td{padding:.4rem .6rem;border-bottom:1px solid #ddd;text-align:left}"
+        "footer{margin-top:2rem;color:#777;font-size:.85rem}</style></head>\n"
+        f"<body>\n<h1>{title}</h1>\n<p>{html.escape(text)}</p>\n<table>\n{cells}\n</table>\n"
+        f"<footer>{html.escape(payload['start'])} a {html.escape(payload['end'])} · revisão {revision} · "
+        f"gerado em {generated_at:%d/%m/%Y %H:%M} UTC</footer>\n</body>\n</html>\n"
+    )
+
+
+def _period_totals(dates: list[date], rows: list, start: date, end: date) -> dict[str, float]:
+    lo, hi = bisect.bisect_left(dates, start), bisect.bisect_right(dates, end)
+    totals = {f: 0.0 for f in rollup.ROLLUP_FIELDS}
+    for row in rows[lo:hi]:
+        for f, value in zip(rollup.ROLLUP_FIELDS, row[1:]):
+            totals[f] += float(value or 0.0)
+    return totals
+
+
+def _insert(db: Session):
+    # Another worker may have stored the same period since the read: keep theirs
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(Report)
+    return dialect_insert(Report).on_conflict_do_nothing(index_elements=["period", "start"])
+
+
+def refresh(today: date | None = None) -> dict[str, int]:
+    global _seen
+    today = today or date.today()
+    with SessionLocal() as db:
+        tag = versions.read(db, versions.DATASET_KEYS)
+        state = (tuple(tag[k] for k in versions.DATASET_KEYS), today)
+        if state == _seen:
+            return {"created": 0, "updated": 0}
+        rows = db.execute(
+            select(DailyRollup.date, *[getattr(DailyRollup, f) for f in rollup.ROLLUP_FIELDS]).order_by(DailyRollup.date)
+        ).all()
+        stored = {
+            (r.period, r.start): r
+            for r in db.execute(select(Report.id, Report.period, Report.start, Report.fingerprint, Report.revision))
+        }
+        goals = get_goal_values(db, GOAL_DEFAULTS)
+
+        dates = [r[0] for r in rows]
+        created, changed = [], []
+        for period in REPORT_PERIODS:
+            for start, end in closed_periods(period, dates[0], today) if dates else ():
+                totals = _period_totals(dates, rows, start, end)
+                digest = fingerprint(totals)
+                existing = stored.get((period, start))
+                if existing is None:
+                    created.append((period, start, end, totals, digest))
+                elif existing.fingerprint != digest:
+                    changed.append((existing, totals, digest))
+        previous_goals = dict(
+            db.execute(select(Report.id, Report.payload).where(Report.id.in_([e.id for e, _, _ in changed]))).all()
+        ) if changed else {}
+
+    now = datetime.now(timezone.utc)
+    values = []
+    for period, start, end, totals, digest in created:
+        payload = build_payload(period, start, end, totals, goals)
+        text = build_period_text(payload)
+        values.append({
+            "period": period, "start": start, "end": end, "fingerprint": digest, "revision": 1, "generated_at": now,
+            "text": text, "payload": payload, "html": render_html(payload, text, 1, now),
+        })
+    updated = 0
+    with WriterSessionLocal() as db:
+        if values:
+            db.execute(_insert(db), values)
+        for existing, totals, digest in changed:
+            payload = build_payload(
+                existing.period, existing.start, period_bounds(existing.period, existing.start)[1], totals,
+                previous_goals[existing.id]["goals"],
+            )
+            text = build_period_text(payload)
+            revision = existing.revision + 1
+            result = db.execute(
+                update(Report)
+                .where(Report.id == existing.id, Report.fingerprint == existing.fingerprint)
+                .values(
+                    fingerprint=digest, revision=revision, generated_at=now, text=text, payload=payload,
+                    html=render_html(payload, text, revision, now),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            updated += result.rowcount
+        db.commit()
+    _seen = state
+    if values or updated:
+        logger.info("reports: %d created, %d regenerated", len(values), updated)
+    return {"created": len(values), "updated": updated}
+
+
+def list_reports(db: Session, period: str | None, first: date | None, last: date | None, limit: int) -> list[dict[str, Any]]:
+    stmt = select(Report).order_by(Report.start.desc(), Report.period).limit(limit)
+    if period:
+        stmt = stmt.where(Report.period == period)
+    if first:
+        stmt = stmt.where(Report.end >= first)
+    if last:
+        stmt = stmt.where(Report.start <= last)
+    return [serialize(r) for r in db.execute(stmt).scalars()]
+
+
+def get_report(db: Session, period: str, start: date) -> Report | None:
+    return db.execute(select(Report).where(Report.period == period, Report.start == start)).scalar_one_or_none()
+
+
+def generated_at(report: Report) -> datetime:
+    # Stored as naive UTC on SQLite
+    value = report.generated_at
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def serialize(report: Report, full: bool = False) -> dict[str, Any]:
+    data = {
+        "id": report.id,
+        "period": report.period,
+        "start": report.start,
+        "end": report.end,
+        "label": report.payload["label"],
+        "revision": report.revision,
+        "generated_at": generated_at(report),
+        "text": report.text,
+    }
+    if full:
+        data["kpis"] = report.payload
+    return data
+
+
+async def _run_forever() -> None:
+    while True:
+        try:
+            await run_in_threadpool(refresh)
+        except Exception:
+            logger.exception("report refresh failed")
+        await asyncio.sleep(settings.report_schedule_s)
+
+
+def start() -> None:
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.get_running_loop().create_task(_run_forever())
+
+
+async def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,155 @@
+from collections import defaultdict
+from datetime import date
+from typing import Any, Callable, Iterable, NamedTuple
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session
+from app.db.models import DailyRollup, Entry, Breakage, Delay, Complaint
+from app.services import versions
+
+
+ROLLUP_FIELDS = ("production_m2", "orders_m2", "loss_m2", "delays_count", "complaints_count")
+
+# How each raw row contributes to its day: {rollup field: source column, or None to count the row}
+CONTRIBUTIONS: dict[type, dict[str, str | None]] = {
+    Entry: {"production_m2": "forno_m2", "orders_m2": "pedidos_m2"},
+    Breakage: {"loss_m2": "qty_m2"},
+    Delay: {"delays_count": None},
+    Complaint: {"complaints_count": None},
+}
+
+Deltas = dict[date, dict[str, float]]
+
+
+class Commit(NamedTuple):
+    # What a committed transaction changed, for in-memory derived data: rollup deltas and
+    # the rows behind them, in the order applied (both empty after a rebuild), and the
+    # version spans recorded by versions.bump
+    deltas: list[Deltas]
+    rows: list[tuple[type, list[dict[str, Any]], int]]  # (model, rows, sign)
+    bumped: dict[str, tuple[int, int] | None]
+
+
+# Called after each commit that bumped a dataset version
+_commit_hooks: list[Callable[[Commit], None]] = []
+
+
+def row_deltas(model, rows: Iterable[dict[str, Any]], sign: int = 1) -> dict[date, dict[str, float]]:
+    contributions = CONTRIBUTIONS.get(model)
+    if not contributions:
+        return {}
+    deltas: dict[date, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for row in rows:
+        day = deltas[row["date"]]
+        for field, column in contributions.items():
+            day[field] += sign * (1 if column is None else float(row.get(column) or 0.0))
+    return deltas
+
+
+def apply_deltas(db: Session, deltas: dict[date, dict[str, float]]) -> None:
+    if not deltas:
+        return
+    if _commit_hooks:
+        db.info.setdefault("rollup_deltas", []).append(deltas)
+    values = [{"date": d, **{f: fields.get(f, 0.0) for f in ROLLUP_FIELDS}} for d, fields in deltas.items()]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(DailyRollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyRollup.date],
+            set_={f: getattr(DailyRollup, f) + getattr(stmt.excluded, f) for f in ROLLUP_FIELDS},
+        )
+        db.execute(stmt, values)
+        return
+    for value in values:
+        current = db.get(DailyRollup, value["date"])
+        if current is None:
+            db.add(DailyRollup(**value))
+        else:
+            for f in ROLLUP_FIELDS:
+                setattr(current, f, getattr(current, f) + value[f])
+    db.flush()
+
+
+def apply_rows(db: Session, model, rows: Iterable[dict[str, Any]], sign: int = 1) -> None:
+    # Runs inside the caller's transaction so the rollup commits (or rolls back) with the raw rows
+    if _commit_hooks:
+        rows = list(rows)
+        db.info.setdefault("rollup_rows", []).append((model, rows, sign))
+    apply_deltas(db, row_deltas(model, rows, sign))
+
+
+def _raw_daily(db: Session) -> dict[date, dict[str, float]]:
+    days: dict[date, dict[str, float]] = defaultdict(lambda: {f: 0.0 for f in ROLLUP_FIELDS})
+    sources = [
+        (Entry, {"production_m2": func.sum(Entry.forno_m2), "orders_m2": func.sum(Entry.pedidos_m2)}),
+        (Breakage, {"loss_m2": func.sum(Breakage.qty_m2)}),
+        (Delay, {"delays_count": func.count(Delay.id)}),
+        (Complaint, {"complaints_count": func.count(Complaint.id)}),
+    ]
+    for model, aggregates in sources:
+        stmt = select(model.date, *aggregates.values()).group_by(model.date)
+        for row in db.execute(stmt):
+            for field, value in zip(aggregates.keys(), row[1:]):
+                days[row[0]][field] = float(value or 0.0)
+    return days
+
+
+def rebuild(db: Session) -> int:
+    days = _raw_daily(db)
+    db.execute(delete(DailyRollup))
+    if days:
+        db.execute(insert(DailyRollup), [{"date": d, **fields} for d, fields in days.items()])
+    versions.bump(db, *versions.DATASET_KEYS)
+    db.commit()
+    return len(days)
+
+
+def check(db: Session, tolerance: float = 1e-6) -> list[dict[str, Any]]:
+    raw = _raw_daily(db)
+    stored = {r.date: r for r in db.query(DailyRollup).all()}
+    mismatches = []
+    for d in sorted(set(raw) | set(stored)):
+        expected = raw.get(d, {f: 0.0 for f in ROLLUP_FIELDS})
+        row = stored.get(d)
+        for f in ROLLUP_FIELDS:
+            actual = float(getattr(row, f)) if row is not None else 0.0
+            if abs(actual - expected[f]) > tolerance:
+                mismatches.append({"date": d.isoformat(), "field": f, "expected": expected[f], "actual": actual})
+    return mismatches
+
+
+def is_empty(db: Session) -> bool:
+    return db.query(DailyRollup.date).first() is None
+
+
+def totals(db: Session, start: date, end: date | None = None) -> dict[str, float]:
+    stmt = select(*[func.coalesce(func.sum(getattr(DailyRollup, f)), 0.0) for f in ROLLUP_FIELDS]).where(
+        DailyRollup.date >= start
+    )
+    if end is not None:
+        stmt = stmt.where(DailyRollup.date <= end)
+    row = db.execute(stmt).one()
+    return {f: float(v or 0.0) for f, v in zip(ROLLUP_FIELDS, row)}
+
+
+def on_commit(hook: Callable[[Commit], None]):
+    _commit_hooks.append(hook)
+    return hook
+
+
+@versions.on_commit
+def _committed(session: Session, bumped: dict[str, tuple[int, int] | None]) -> None:
+    commit = Commit(session.info.pop("rollup_deltas", []), session.info.pop("rollup_rows", []), bumped)
+    if any(key in bumped for key in versions.DATASET_KEYS):
+        for hook in _commit_hooks:
+            hook(commit)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop("rollup_deltas", None)
+    session.info.pop("rollup_rows", None)
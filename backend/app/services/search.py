@@ -0,0 +1,110 @@
+import logging
+import sqlite3
+from sqlalchemy import column, literal, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection
+from app.db.models import Complaint, Delay
+
+
+logger = logging.getLogger(__name__)
+
+# Substring search over free-text columns. SQLite: FTS5 external-content tables with the
+# trigram tokenizer (the rows live only in the base table; triggers keep the index in
+# sync with every write path, ORM or Core). Postgres: pg_trgm GIN indexes per column,
+# which the planner uses for ILIKE '%x%' directly. Anything else falls back to ILIKE.
+SEARCH_COLUMNS = {
+    Delay: ("customer", "reason", "order_code"),
+    Complaint: ("customer", "description"),
+}
+# Trigram indexes can't answer patterns shorter than a trigram
+MIN_INDEXED_LENGTH = 3
+
+_dialect: str | None = None
+
+
+def fts_name(model) -> str:
+    return f"{model.__tablename__}_fts"
+
+
+def _sqlite_ddl(model) -> list[str]:
+    name, fts = model.__tablename__, fts_name(model)
+    cols = SEARCH_COLUMNS[model]
+    col_list = ", ".join(cols)
+    new = ", ".join(f"new.{c}" for c in cols)
+    old = ", ".join(f"old.{c}" for c in cols)
+    delete_old = f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old});"
+    insert_new = f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({col_list}, content='{name}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_fts_ai AFTER INSERT ON {name} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_fts_ad AFTER DELETE ON {name} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_fts_au AFTER UPDATE ON {name} BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def _pg_ddl(model) -> list[str]:
+    name = model.__tablename__
+    return [
+        f"CREATE INDEX IF NOT EXISTS ix_{name}_{c}_trgm ON {name} USING gin ({c} gin_trgm_ops)"
+        for c in SEARCH_COLUMNS[model]
+    ]
+
+
+def _sqlite_table_exists(conn: Connection, name: str) -> bool:
+    return conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :n"), {"n": name}).first() is not None
+
+
+def ensure_index(conn: Connection) -> None:
+    # Idempotent; an FTS table created over existing rows is populated right away
+    global _dialect
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        if sqlite3.sqlite_version_info < (3, 34, 0):
+            logger.warning("SQLite %s has no trigram tokenizer; search falls back to LIKE", sqlite3.sqlite_version)
+            return
+        for model in SEARCH_COLUMNS:
+            fts = fts_name(model)
+            created = not _sqlite_table_exists(conn, fts)
+            for ddl in _sqlite_ddl(model):
+                conn.exec_driver_sql(ddl)
+            if created:
+                conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+    elif dialect == "postgresql":
+        conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for model in SEARCH_COLUMNS:
+            for ddl in _pg_ddl(model):
+                conn.exec_driver_sql(ddl)
+    else:
+        return
+    _dialect = dialect
+
+
+def rebuild(conn: Connection) -> list[str]:
+    ensure_index(conn)
+    rebuilt = []
+    for model in SEARCH_COLUMNS:
+        if _dialect == "sqlite":
+            fts = fts_name(model)
+            conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            rebuilt.append(fts)
+        elif _dialect == "postgresql":
+            for c in SEARCH_COLUMNS[model]:
+                index = f"ix_{model.__tablename__}_{c}_trgm"
+                conn.exec_driver_sql(f"REINDEX INDEX {index}")
+                rebuilt.append(index)
+    return rebuilt
+
+
+def search_clause(model, q: str, columns: tuple[str, ...] | None = None):
+    # Case-insensitive substring match of `q` in any of `columns` (default: all indexed)
+    columns = columns or SEARCH_COLUMNS[model]
+    if _dialect == "sqlite" and len(q) >= MIN_INDEXED_LENGTH:
+        fts = fts_name(model)
+        # One quoted phrase: with the trigram tokenizer that is a substring match
+        phrase = '"' + q.replace('"', '""') + '"'
+        match = "{" + " ".join(columns) + "} : " + phrase
+        # Anonymous bind: a request can combine several search clauses
+        matches = select(column("rowid")).select_from(table(fts)).where(literal_column(fts).op("MATCH")(literal(match)))
+        return model.id.in_(matches)
+    # Plain ILIKE (not lower() LIKE lower()) so Postgres can use the trigram indexes
+    pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return or_(*(getattr(model, c).ilike(pattern, escape="\\") for c in columns))
@@ -0,0 +1,126 @@
+from datetime import date, timedelta
+import numpy as np
+from app.services import cube, timeseries
+from app.services.kpi_calculator import GOAL_DEFAULTS
+
+
+GOAL_KEYS = tuple(GOAL_DEFAULTS)  # forno_daily, production_day, production_night, loss_pct
+
+
+def daily_inputs(first: date, last: date, day_shifts: list[str], night_shifts: list[str]) -> dict[str, np.ndarray]:
+    # Everything per day of [first, last], from the in-memory stores
+    window = timeseries.store.window(first, last, ("production_m2", "loss_m2"))
+    shifts, production = cube.CUBES["entries"].matrix(first, last, "shift", "forno_m2")
+    day = np.isin(np.array(shifts, dtype=object), day_shifts)
+    night = np.isin(np.array(shifts, dtype=object), night_shifts)
+    return {
+        "production": window["production_m2"],
+        "loss": window["loss_m2"],
+        "day": production[day].sum(axis=0),
+        "night": production[night].sum(axis=0),
+    }
+
+
+def hits(inputs: dict[str, np.ndarray], axes: dict[str, np.ndarray]) -> tuple[np.ndarray, ...]:
+    # Per goal in GOAL_KEYS order: hit or not, per candidate value and working day
+    # (any production), as [values, days]
+    forno, goal_day, goal_night, goal_loss = (np.asarray(axes[k], dtype=np.float64) for k in GOAL_KEYS)
+    production = inputs["production"]
+    working = production > 0
+    daily_loss_pct = timeseries.loss_pct(inputs["loss"], production)
+    return (
+        (production >= forno[:, None]) & working,
+        (inputs["day"] >= goal_day[:, None]) & working,
+        (inputs["night"] >= goal_night[:, None]) & working,
+        (daily_loss_pct <= goal_loss[:, None]) & working,
+    )
+
+
+def evaluate(inputs: dict[str, np.ndarray], axes: dict[str, np.ndarray], capacity_days: int) -> dict[str, np.ndarray]:
+    # Every combination of the candidate values in `axes` (the grid, one axis per goal
+    # in GOAL_KEYS order, flattened C-style). Each goal's per-day hits are computed once
+    # per candidate value; scenarios only exist through broadcasting those against each
+    # other, so the cost is the days x grid size of one AND, not a Python loop per
+    # scenario. Rates are over working days.
+    forno, goal_day, goal_night, goal_loss = (np.asarray(axes[k], dtype=np.float64) for k in GOAL_KEYS)
+    production = inputs["production"]
+    working_days = max(int((production > 0).sum()), 1)
+    period_loss_pct = float(timeseries.loss_pct(inputs["loss"].sum(), production.sum()))
+
+    hit_forno, hit_day, hit_night, hit_loss = hits(inputs, axes)
+    all_hit = (
+        hit_forno[:, None, None, None, :]
+        & hit_day[None, :, None, None, :]
+        & hit_night[None, None, :, None, :]
+        & hit_loss[None, None, None, :, :]
+    )
+    shape = all_hit.shape[:-1]
+
+    def spread(values: np.ndarray, axis: int) -> np.ndarray:
+        # Per-candidate values of one goal, repeated over the other axes of the grid
+        index = [None] * len(shape)
+        index[axis] = slice(None)
+        return np.broadcast_to(values[tuple(index)], shape).ravel()
+
+    # kpi_calculator.utilization_pct, over the candidate forno_daily values
+    utilization = np.divide(
+        production.sum() * 100.0, forno * capacity_days, out=np.zeros_like(forno), where=forno != 0
+    )
+    grid = np.meshgrid(forno, goal_day, goal_night, goal_loss, indexing="ij")
+    return {
+        **{key: values.ravel() for key, values in zip(GOAL_KEYS, grid)},
+        "utilization_pct": spread(utilization, 0),
+        "forno_hit_rate": spread(hit_forno.sum(axis=1) / working_days, 0),
+        "day_shift_hit_rate": spread(hit_day.sum(axis=1) / working_days, 1),
+        "night_shift_hit_rate": spread(hit_night.sum(axis=1) / working_days, 2),
+        "loss_hit_rate": spread(hit_loss.sum(axis=1) / working_days, 3),
+        "loss_compliant": spread(period_loss_pct <= goal_loss, 3),
+        "all_goals_hit_rate": all_hit.sum(axis=-1).ravel() / working_days,
+    }
+
+
+def simulate(
+    first: date,
+    last: date,
+    candidates: dict[str, list[float]],
+    current: dict[str, float],
+    day_shifts: list[str],
+    night_shifts: list[str],
+    capacity_days: int | None = None,
+) -> dict:
+    # capacity_days: the days of forno capacity utilization is rated against, by default
+    # the days in [first, last]; the overview's window passes OVERVIEW_DAYS
+    inputs = daily_inputs(first, last, day_shifts, night_shifts)
+    production, loss = inputs["production"], inputs["loss"]
+    capacity_days = capacity_days or len(production)
+    axes = {key: np.asarray(candidates.get(key) or [current[key]], dtype=np.float64) for key in GOAL_KEYS}
+    current_axes = {key: np.array([current[key]]) for key in GOAL_KEYS}
+    scenarios = evaluate(inputs, axes, capacity_days)
+    baseline = evaluate(inputs, current_axes, capacity_days)
+    hit_forno, hit_day, hit_night, hit_loss = (h[0] for h in hits(inputs, current_axes))
+    return {
+        "from": first,
+        "to": last,
+        "days": len(production),
+        "working_days": int((production > 0).sum()),
+        "production_m2": float(production.sum()),
+        "day_shifts_m2": float(inputs["day"].sum()),
+        "night_shifts_m2": float(inputs["night"].sum()),
+        "loss_pct": float(timeseries.loss_pct(loss.sum(), production.sum())),
+        "baseline": {name: values[0].item() for name, values in baseline.items()},
+        # Per day of the period: the inputs, and each goal's outcome under the current goals
+        "daily": {
+            "dates": np.arange(first, last + timedelta(days=1), dtype="datetime64[D]").tolist(),
+            "production_m2": production.tolist(),
+            "day_shifts_m2": inputs["day"].tolist(),
+            "night_shifts_m2": inputs["night"].tolist(),
+            "loss_pct": timeseries.loss_pct(loss, production).tolist(),
+            "forno_hit": hit_forno.tolist(),
+            "day_shift_hit": hit_day.tolist(),
+            "night_shift_hit": hit_night.tolist(),
+            "loss_hit": hit_loss.tolist(),
+            "all_goals_hit": (hit_forno & hit_day & hit_night & hit_loss).tolist(),
+        },
+        "axes": {key: values.tolist() for key, values in axes.items()},
+        "scenarios": {name: values.tolist() for name, values in scenarios.items()},
+    }
@@ -0,0 +1,166 @@
+import logging
+import threading
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import select
+from app.db.models import DailyRollup
+from app.db.session import SessionLocal
+from app.services import rollup, versions
+
+
+logger = logging.getLogger(__name__)
+
+METRICS = (*rollup.ROLLUP_FIELDS, "loss_pct")
+INTERVALS = ("day", "week", "month")
+
+_MONDAY = np.datetime64("1970-01-05", "D")
+
+
+def loss_pct(loss: np.ndarray, production: np.ndarray) -> np.ndarray:
+    # Same definition as the overview
+    return loss / np.maximum(production, 1.0) * 100.0
+
+
+def bucket_starts(start: date, days: int, interval: str) -> tuple[np.ndarray, np.ndarray]:
+    # Offsets where each period begins, and its first day. The first and last periods
+    # are clipped to the range.
+    dates = np.datetime64(start, "D") + np.arange(days)
+    if interval == "day":
+        return np.arange(days), dates
+    if interval == "week":
+        keys = (dates - _MONDAY).astype(np.int64) // 7
+    else:
+        keys = dates.astype("datetime64[M]")
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return starts, dates[starts]
+
+
+class TimeseriesStore:
+    # daily_rollup held in memory: one float64 array per rollup field, index = days since
+    # `start`. Loaded on first use and whenever the dataset versions move past `tag`;
+    # this worker's own commits are added in place (see apply_commit), so only writes from
+    # other processes cost a reload. Reads copy their slice under the lock and resample
+    # outside it.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._start: date | None = None
+        self._values: dict[str, np.ndarray] = {}
+        self._tag: dict[str, int] | None = None
+
+    def tag(self) -> tuple[int, ...] | None:
+        with self._lock:
+            return None if self._tag is None else tuple(self._tag[k] for k in versions.DATASET_KEYS)
+
+    def is_stale(self, current: tuple[int, ...] | None = None) -> bool:
+        # `current`: the dataset versions, when the caller has them (async handlers)
+        if current is None:
+            current = versions.snapshot(versions.DATASET_KEYS)
+        with self._lock:
+            return self._tag is None or any(v > self._tag[k] for k, v in zip(versions.DATASET_KEYS, current))
+
+    def ensure_fresh(self) -> None:
+        if not self.is_stale():
+            return
+        with self._load_lock:
+            if self.is_stale():
+                self.load()
+
+    def load(self) -> None:
+        with SessionLocal() as db:
+            # One read transaction: the versions match the rows
+            tag = versions.read(db, versions.DATASET_KEYS)
+            rows = db.execute(
+                select(DailyRollup.date, *[getattr(DailyRollup, f) for f in rollup.ROLLUP_FIELDS]).order_by(DailyRollup.date)
+            ).all()
+        start = rows[0][0] if rows else date.today()
+        days = (rows[-1][0] - start).days + 1 if rows else 1
+        offsets = np.fromiter(((r[0] - start).days for r in rows), dtype=np.int64, count=len(rows))
+        values = {}
+        for i, field in enumerate(rollup.ROLLUP_FIELDS, start=1):
+            array = np.zeros(days)
+            array[offsets] = np.fromiter((r[i] or 0.0 for r in rows), dtype=np.float64, count=len(rows))
+            values[field] = array
+        with self._lock:
+            self._start, self._values, self._tag = start, values, tag
+
+    def _cover(self, first: date, last: date) -> None:
+        # Grows every array so [first, last] is addressable; caller holds the lock
+        start = self._start
+        end = start + timedelta(days=len(self._values[rollup.ROLLUP_FIELDS[0]]) - 1)
+        before, after = max(0, (start - first).days), max(0, (last - end).days)
+        if before or after:
+            self._values = {f: np.pad(a, (before, after)) for f, a in self._values.items()}
+            self._start = start - timedelta(days=before)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._tag = None
+
+    def apply_commit(self, commit: rollup.Commit) -> None:
+        deltas, bumped = commit.deltas, commit.bumped
+        keys = [k for k in versions.DATASET_KEYS if k in bumped]
+        with self._lock:
+            if self._tag is None:
+                return
+            spans = [bumped[k] for k in keys]
+            if all(span is not None and self._tag[k] >= span[1] for k, span in zip(keys, spans)):
+                return  # loaded after this commit: already included
+            if not deltas or any(span is None or self._tag[k] != span[0] for k, span in zip(keys, spans)):
+                # A rebuild, a write from elsewhere in between, or no way to tell
+                self._tag = None
+                return
+            days = [d for batch in deltas for d in batch]
+            self._cover(min(days), max(days))
+            for batch in deltas:
+                for day, fields in batch.items():
+                    offset = (day - self._start).days
+                    for field, delta in fields.items():
+                        self._values[field][offset] += delta
+            for k, span in zip(keys, spans):
+                self._tag[k] = span[1]
+
+    def window(self, first: date, last: date, fields) -> dict[str, np.ndarray]:
+        # Daily values of [first, last], zero outside the stored range; copies
+        days = (last - first).days + 1
+        with self._lock:
+            offset = (first - self._start).days
+            size = len(self._values[rollup.ROLLUP_FIELDS[0]])
+            lo, hi = max(0, offset), min(size, offset + days)
+            window = {}
+            for field in fields:
+                array = np.zeros(days)
+                if lo < hi:
+                    array[lo - offset:hi - offset] = self._values[field][lo:hi]
+                window[field] = array
+        return window
+
+    def series(self, first: date, last: date, interval: str, metrics: tuple[str, ...]) -> dict:
+        days = (last - first).days + 1
+        fields = set(metrics) - {"loss_pct"} | ({"loss_m2", "production_m2"} if "loss_pct" in metrics else set())
+        window = self.window(first, last, fields)
+        starts, periods = bucket_starts(first, days, interval)
+        if interval != "day":
+            window = {f: np.add.reduceat(a, starts) for f, a in window.items()}
+        if "loss_pct" in metrics:
+            window["loss_pct"] = loss_pct(window["loss_m2"], window["production_m2"])
+        return {
+            "from": first,
+            "to": last,
+            "interval": interval,
+            "periods": periods.tolist(),  # datetime.date, serialized by orjson
+            "series": {m: window[m].tolist() for m in metrics},
+        }
+
+
+store = TimeseriesStore()
+
+
+@rollup.on_commit
+def _on_commit(commit: rollup.Commit) -> None:
+    try:
+        store.apply_commit(commit)
+    except Exception:
+        # Never fail the writer's commit over it; the next read reloads
+        logger.exception("timeseries store update failed")
+        store.invalidate()
@@ -0,0 +1,135 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.models import DataVersion
+from app.db.session import SessionLocal
+
+
+# Change counters shared by every worker through the database. Write paths bump the
+# key of each table they touch inside their own transaction; readers compare the
+# counters to decide whether derived data (caches, rollups, ETags) is still valid.
+DATASET_KEYS = ("entries", "delays", "breakages", "complaints")
+GOALS_KEY = "goals"
+USERS_KEY = "users"
+KPI_KEYS = (*DATASET_KEYS, GOALS_KEY)
+ALL_KEYS = (*KPI_KEYS, USERS_KEY)
+
+_lock = threading.Lock()
+_snapshot: dict[str, int] = {}
+_snapshot_at = 0.0
+_epoch = 0
+_commit_hooks: list[Callable[[Session, dict[str, tuple[int, int] | None]], None]] = []
+
+
+def ensure_keys(db: Session, keys=ALL_KEYS) -> None:
+    existing = set(db.scalars(select(DataVersion.key).where(DataVersion.key.in_(keys))))
+    for key in keys:
+        if key not in existing:
+            db.add(DataVersion(key=key, version=0))
+    db.commit()
+
+
+def bump(db: Session, *keys: str) -> None:
+    stmt = (
+        update(DataVersion)
+        .where(DataVersion.key.in_(keys))
+        .values(version=DataVersion.version + 1, updated_at=datetime.utcnow())
+    )
+    bumped = db.info.setdefault("bumped_versions", {})
+    if not db.get_bind().dialect.update_returning:
+        db.execute(stmt)
+        for key in keys:
+            bumped.setdefault(key, None)
+        return
+    # key -> (version before, version after) this transaction; the row lock taken by the
+    # UPDATE makes them exact, which lets on_commit hooks tell whether anyone else's
+    # write landed in between
+    for key, version in db.execute(stmt.returning(DataVersion.key, DataVersion.version)):
+        previous = bumped.get(key)
+        bumped[key] = (previous[0] if previous else version - 1, version)
+
+
+def read(db: Session, keys=ALL_KEYS) -> dict[str, int]:
+    rows = db.execute(select(DataVersion.key, DataVersion.version).where(DataVersion.key.in_(keys)))
+    values = {key: 0 for key in keys}
+    values.update({key: version for key, version in rows})
+    return values
+
+
+def last_modified(db: Session, keys=ALL_KEYS) -> datetime | None:
+    value = db.scalar(select(func.max(DataVersion.updated_at)).where(DataVersion.key.in_(keys)))
+    # Stored as naive UTC on SQLite
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def invalidate() -> None:
+    global _snapshot_at, _epoch
+    with _lock:
+        _snapshot_at = 0.0
+        _epoch += 1
+
+
+def peek(keys=ALL_KEYS, max_age: float | None = None) -> tuple[int, ...] | None:
+    # The throttled snapshot without touching the database: None when it is due for a
+    # re-read
+    max_age = settings.version_check_interval_s if max_age is None else max_age
+    with _lock:
+        if time.monotonic() - _snapshot_at < max_age and all(k in _snapshot for k in keys):
+            return tuple(_snapshot[k] for k in keys)
+    return None
+
+
+def snapshot(keys=ALL_KEYS, max_age: float | None = None) -> tuple[int, ...]:
+    # Throttled read: other workers' writes become visible within `max_age` seconds,
+    # this worker's own writes immediately (see _after_commit). Blocking when the
+    # snapshot is due: from the event loop use snapshot_async.
+    global _snapshot, _snapshot_at
+    current = peek(keys, max_age)
+    if current is not None:
+        return current
+    now = time.monotonic()
+    with _lock:
+        epoch = _epoch
+    with SessionLocal() as db:
+        values = read(db, tuple(set(ALL_KEYS) | set(keys)))
+    with _lock:
+        if epoch == _epoch:
+            _snapshot, _snapshot_at = values, now
+    return tuple(values.get(k, 0) for k in keys)
+
+
+async def snapshot_async(keys=ALL_KEYS, max_age: float | None = None) -> tuple[int, ...]:
+    # Same, for async handlers: the re-read goes to the threadpool, the common fresh case
+    # costs no hop
+    current = peek(keys, max_age)
+    if current is None:
+        current = await run_in_threadpool(snapshot, keys, max_age)
+    return current
+
+
+def on_commit(hook: Callable[[Session, dict[str, tuple[int, int] | None]], None]):
+    # Called after every commit that bumped something, with what bump() recorded
+    # (None per key on databases without UPDATE ... RETURNING)
+    _commit_hooks.append(hook)
+    return hook
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    bumped = session.info.pop("bumped_versions", None)
+    if bumped:
+        for hook in _commit_hooks:
+            hook(session, bumped)
+        invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop("bumped_versions", None)
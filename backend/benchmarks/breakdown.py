@@ -0,0 +1,122 @@
+"""Breakdown queries: in-memory cube (app.services.cube) against the equivalent SQL.
+
+Generates a deterministic dataset (benchmarks.generator), loads every cube once (timed),
+then runs each query both ways and prints p50 latency and the speedup. Results are
+checked against each other, so a wrong cube fails the run.
+
+Run from backend/:
+    python -m benchmarks.breakdown --scale 1m
+    python -m benchmarks.breakdown --scale 10m --repeat 3
+"""
+import argparse
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+
+from benchmarks.generator import Plan, parse_scale, populate
+
+
+# (dataset, by, measure, filters, days back from the end of the data)
+QUERIES = (
+    ("breakages", ("sector",), "qty_m2", {}, 30),
+    ("breakages", ("sector", "type"), "qty_m2", {}, 365),
+    ("breakages", ("operator",), "count", {"sector": ["Corte", "Têmpera"], "type": ["Trinca"]}, 90),
+    ("delays", ("customer",), "count", {}, 90),
+    ("delays", ("reason",), "order_value", {}, 730),
+    ("delays", ("customer", "reason"), "days_late", {"reason": ["Transporte"]}, 365),
+    ("complaints", ("customer",), "qty", {"type": ["Riscado"]}, 180),
+    ("complaints", ("type",), "count", {}, 730),
+)
+
+
+def sql_query(db, spec, first: date, last: date, by, measure: str, filters: dict, top: int) -> list[tuple]:
+    model = spec.model
+    column = spec.measures[measure]
+    value = func.count() if column is None else func.coalesce(func.sum(getattr(model, column)), 0.0)
+    stmt = select(*[getattr(model, d) for d in by], value).where(model.date.between(first, last))
+    for dimension, wanted in filters.items():
+        stmt = stmt.where(getattr(model, dimension).in_(wanted))
+    stmt = stmt.group_by(*[getattr(model, d) for d in by]).order_by(value.desc()).limit(top)
+    return [tuple(row) for row in db.execute(stmt)]
+
+
+def timed(fn, repeat: int) -> tuple[float, object]:
+    times, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times), result
+
+
+def same(cube_result: dict, sql_rows: list[tuple], by) -> bool:
+    got = {tuple(item[d] for d in by): item["value"] for item in cube_result["items"]}
+    expected = {tuple(row[:-1]): float(row[-1]) for row in sql_rows}
+    # Ties at the top-N boundary may pick different groups: compare the values only then.
+    # Sums differ in the last bits with the summation order.
+    if got.keys() != expected.keys():
+        got, expected = dict(enumerate(sorted(got.values()))), dict(enumerate(sorted(expected.values())))
+    return got.keys() == expected.keys() and all(math.isclose(got[k], expected[k], rel_tol=1e-9) for k in got)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", default="1m", help="10k, 100k, 1m, 10m or a row count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="sg-bench-") as workdir:
+        # Before any app import: settings and engines are created at import time
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        from app.db.session import SessionLocal, create_all_tables, engine
+        from app.services import cube
+
+        create_all_tables()
+        plan = Plan(parse_scale(args.scale), seed=args.seed, days=args.days)
+        started = time.perf_counter()
+        written = populate(engine, plan)
+        print(f"generated {sum(written.values()):,} rows in {time.perf_counter() - started:.1f}s")
+
+        for name, target in cube.CUBES.items():
+            started = time.perf_counter()
+            target.load()
+            cells = target._cells
+            size = cells.keys.nbytes + sum(m.nbytes for m in cells.measures.values())
+            print(
+                f"cube {name:<11} {written[name]:>11,} rows -> {len(cells.keys):>10,} cells  "
+                f"{size / 2**20:7.1f} MB  loaded in {time.perf_counter() - started:6.2f}s"
+            )
+
+        status = 0
+        print(f"\n{'query':<58} {'sql p50':>10} {'cube p50':>10} {'speedup':>9}")
+        with SessionLocal() as db:
+            for name, by, measure, filters, days in QUERIES:
+                target = cube.CUBES[name]
+                first = plan.end - timedelta(days=days - 1)
+                sql_time, rows = timed(
+                    lambda: sql_query(db, target.spec, first, plan.end, by, measure, filters, args.top), args.repeat
+                )
+                cube_time, result = timed(
+                    lambda: target.query(first, plan.end, by, measure, filters, args.top), args.repeat
+                )
+                label = f"{name} by {','.join(by)} {measure} {days}d" + (f" [{','.join(filters)}]" if filters else "")
+                ok = same(result, rows, by)
+                status |= not ok
+                print(
+                    f"{label:<58} {sql_time * 1000:>8.1f}ms {cube_time * 1000:>8.2f}ms {sql_time / cube_time:>8.0f}x"
+                    + ("" if ok else "  MISMATCH")
+                )
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
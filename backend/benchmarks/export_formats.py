@@ -0,0 +1,132 @@
+"""Export formats compared: bytes on the wire, server time and client load time.
+
+Generates a deterministic dataset (benchmarks.generator), then downloads one table through
+/datasets/<table>/export in every format/compression and loads each body into a
+pyarrow Table the way an analytics client would (pyarrow.csv / pyarrow.json / ipc /
+parquet readers). "load" includes gzip decoding for the Content-Encoding variants.
+
+Run from backend/:
+    python -m benchmarks.export_formats --scale 1m
+    python -m benchmarks.export_formats --scale 100k --table delays --repeat 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+import httpx
+import pyarrow as pa
+import pyarrow.csv
+import pyarrow.ipc
+import pyarrow.json
+import pyarrow.parquet
+
+from benchmarks.generator import Plan, parse_scale, populate
+
+
+VARIANTS = (
+    ("csv", "none"),
+    ("csv", "gzip"),
+    ("ndjson", "none"),
+    ("ndjson", "gzip"),
+    ("arrow", "none"),
+    ("arrow", "lz4"),
+    ("arrow", "zstd"),
+    ("parquet", "snappy"),
+    ("parquet", "zstd"),
+)
+
+READERS = {
+    "csv": lambda body: pa.csv.read_csv(pa.BufferReader(body)),
+    "ndjson": lambda body: pa.json.read_json(pa.BufferReader(body)),
+    "arrow": lambda body: pa.ipc.open_stream(body).read_all(),
+    "parquet": lambda body: pa.parquet.read_table(pa.BufferReader(body)),
+}
+
+
+async def download(client: httpx.AsyncClient, url: str, params: dict, headers: dict) -> tuple[bytes, str | None, float]:
+    started = time.perf_counter()
+    async with client.stream("GET", url, params=params, headers=headers) as response:
+        response.raise_for_status()
+        # Raw: what crossed the wire, before httpx undoes Content-Encoding
+        body = b"".join([chunk async for chunk in response.aiter_raw()])
+        encoding = response.headers.get("content-encoding")
+    return body, encoding, time.perf_counter() - started
+
+
+def load(fmt: str, body: bytes, encoding: str | None) -> tuple[pa.Table, float]:
+    started = time.perf_counter()
+    if encoding == "gzip":
+        body = zlib.decompress(body, 31)
+    table = READERS[fmt](body)
+    return table, time.perf_counter() - started
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    from app.db.session import create_all_tables, engine
+    from app.main import get_application
+
+    create_all_tables()
+    plan = Plan(parse_scale(args.scale), seed=args.seed)
+    written = populate(engine, plan)
+    print(f"{args.table}: {written[args.table]:,} rows")
+
+    app = get_application()
+    await app.router.startup()
+    results = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            token = (await client.post("/api/v1/auth/seed-admin")).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip"}
+            url = f"/api/v1/datasets/{args.table}/export"
+            for fmt, compression in VARIANTS:
+                server, client_load = [], []
+                for _ in range(args.repeat):
+                    body, encoding, elapsed = await download(
+                        client, url, {"format": fmt, "compression": compression}, headers
+                    )
+                    table, loaded = load(fmt, body, encoding)
+                    server.append(elapsed)
+                    client_load.append(loaded)
+                results.append({
+                    "variant": f"{fmt}/{compression}",
+                    "bytes": len(body),
+                    "server_s": min(server),
+                    "load_s": min(client_load),
+                    "rows": table.num_rows,
+                    "date_type": str(table.schema.field("date").type),
+                })
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", default="100k", help="10k, 100k, 1m, 10m or a row count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--table", default="entries", choices=("entries", "delays", "breakages", "complaints"))
+    parser.add_argument("--repeat", type=int, default=3, help="best of N per variant")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="sg-bench-") as workdir:
+        # Before any app import: settings and engines are created at import time
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        results = asyncio.run(run(args))
+
+    csv_bytes = results[0]["bytes"]
+    print(f"{'variant':<16} {'MB on wire':>10} {'vs csv':>7} {'server s':>9} {'load s':>8} {'rows':>10}  date column")
+    for r in results:
+        print(
+            f"{r['variant']:<16} {r['bytes'] / 1e6:>10.2f} {r['bytes'] / csv_bytes:>7.2f} {r['server_s']:>9.3f} "
+            f"{r['load_s']:>8.3f} {r['rows']:>10,}  {r['date_type']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""Deterministic synthetic plant data for benchmarks.
+
+Same (seed, rows, days, end) -> same rows. Each table draws from its own RNG, so
+changing one table's share does not reshuffle the others.
+
+Run from backend/:  python -m benchmarks.generator --scale 1m --database-url sqlite:////tmp/sg-1m.db
+"""
+import argparse
+import bisect
+import csv
+import itertools
+import os
+import random
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Iterator
+
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Share of the total row count per table
+SHARES = {
+    "entries": 0.35,
+    "delays": 0.25,
+    "breakages": 0.20,
+    "complaints": 0.10,
+    "sg_daily": 0.06,
+    "status": 0.04,
+}
+
+SHIFTS = (("A", 0.40), ("B", 0.35), ("C", 0.25))
+SECTORS = (
+    ("Corte", 0.30),
+    ("Lapidação", 0.20),
+    ("Têmpera", 0.22),
+    ("Laminação", 0.12),
+    ("Serigrafia", 0.06),
+    ("Expedição", 0.10),
+)
+BREAKAGE_TYPES = (("Trinca", 0.35), ("Quebra", 0.30), ("Risco", 0.20), ("Bolha", 0.08), ("Lasca", 0.07))
+DELAY_REASONS = (
+    ("Falta de matéria-prima", 0.22),
+    ("Fila no forno", 0.20),
+    ("Retrabalho", 0.15),
+    ("Quebra na produção", 0.13),
+    ("Medida divergente", 0.10),
+    ("Transporte", 0.12),
+    ("Aguardando aprovação do cliente", 0.08),
+)
+COMPLAINT_TYPES = (("Riscado", 0.30), ("Medida errada", 0.25), ("Trincado", 0.20), ("Atraso", 0.15), ("Embalagem", 0.10))
+COMPLAINT_TEXT = (
+    "Peça chegou {t} na obra",
+    "Cliente relata vidro {t} após instalação",
+    "{t} identificado na conferência de recebimento",
+    "Reclamação por telefone: {t}",
+)
+SG_CATEGORIES = (("Retrabalho", 0.40), ("Refugo", 0.30), ("Perda térmica", 0.20), ("Devolução", 0.10))
+STATUS_INDICATORS = {
+    "Produção": ("Eficiência do forno", "Produtividade corte", "Setup médio"),
+    "Qualidade": ("Índice de perdas", "Reclamações abertas"),
+    "Logística": ("Entregas no prazo", "Ocupação da frota"),
+}
+GOALS = (
+    ("forno_daily", 1200.0, "m2"),
+    ("production_day", 700.0, "m2"),
+    ("production_night", 500.0, "m2"),
+    ("loss_pct", 3.0, "%"),
+)
+
+_CUSTOMER_PREFIXES = ("Vidraçaria", "Construtora", "Esquadrias", "Temperados", "Box", "Vidros", "Incorporadora", "Espelhos")
+_CUSTOMER_PLACES = ("Central", "Sul", "Norte", "Litoral", "Paulista", "Mineira", "do Vale", "Serra", "Capital", "Oeste")
+CUSTOMER_COUNT = 800
+
+
+def _weighted(rng: random.Random, options) -> Callable[[], Any]:
+    values = [v for v, _ in options]
+    cum = list(itertools.accumulate(w for _, w in options))
+    total = cum[-1]
+    return lambda: values[bisect.bisect(cum, rng.random() * total)]
+
+
+def customers(seed: int) -> list[str]:
+    rng = random.Random(seed)
+    names = {f"{rng.choice(_CUSTOMER_PREFIXES)} {rng.choice(_CUSTOMER_PLACES)} {n:03d}" for n in range(CUSTOMER_COUNT)}
+    return sorted(names)
+
+
+def _customer_picker(rng: random.Random, seed: int) -> Callable[[], str]:
+    # Zipf-like: a few key accounts carry most of the volume
+    names = customers(seed)
+    rng.shuffle(names)
+    return _weighted(rng, [(name, 1.0 / (rank + 1) ** 1.1) for rank, name in enumerate(names)])
+
+
+class Plan:
+    def __init__(self, rows: int, seed: int = 42, days: int = 730, end: date | None = None):
+        self.seed = seed
+        self.end = end or date.today()
+        self.days = days
+        self.counts = {table: max(1, int(rows * share)) for table, share in SHARES.items()}
+
+    def _rng(self, table: str) -> random.Random:
+        return random.Random(f"{self.seed}:{table}")
+
+    def _dates(self, rng: random.Random) -> Callable[[], date]:
+        start = self.end - timedelta(days=self.days - 1)
+        return lambda: start + timedelta(days=rng.randrange(self.days))
+
+    def entries(self) -> Iterator[dict[str, Any]]:
+        rng = self._rng("entries")
+        day, shift = self._dates(rng), _weighted(rng, SHIFTS)
+        for _ in range(self.counts["entries"]):
+            pedidos = max(0.0, rng.gauss(900.0, 220.0))
+            yield {
+                "date": day(),
+                "shift": shift(),
+                "pedidos_m2": round(pedidos, 2),
+                "forno_m2": round(pedidos * rng.uniform(0.78, 1.04), 2),
+                "notes": None if rng.random() < 0.85 else "Parada para manutenção",
+            }
+
+    def delays(self) -> Iterator[dict[str, Any]]:
+        rng = self._rng("delays")
+        day, customer, reason = self._dates(rng), _customer_picker(rng, self.seed), _weighted(rng, DELAY_REASONS)
+        for n in range(self.counts["delays"]):
+            yield {
+                "date": day(),
+                "order_code": f"PED-{self.seed % 100:02d}{n:08d}",
+                "customer": customer(),
+                "days_late": float(min(60, int(rng.expovariate(1 / 4.0)) + 1)),
+                "reason": reason(),
+                "order_value": round(rng.lognormvariate(8.0, 0.9), 2) if rng.random() < 0.9 else None,
+            }
+
+    def breakages(self) -> Iterator[dict[str, Any]]:
+        rng = self._rng("breakages")
+        day, sector, kind = self._dates(rng), _weighted(rng, SECTORS), _weighted(rng, BREAKAGE_TYPES)
+        for _ in range(self.counts["breakages"]):
+            yield {
+                "date": day(),
+                "sector": sector(),
+                "type": kind(),
+                "operator": f"Operador {rng.randrange(1, 41):02d}" if rng.random() < 0.95 else None,
+                "qty_m2": round(rng.expovariate(1 / 2.5), 2),
+                "notes": None,
+            }
+
+    def complaints(self) -> Iterator[dict[str, Any]]:
+        rng = self._rng("complaints")
+        day, customer, kind = self._dates(rng), _customer_picker(rng, self.seed), _weighted(rng, COMPLAINT_TYPES)
+        for _ in range(self.counts["complaints"]):
+            t = kind()
+            yield {
+                "date": day(),
+                "customer": customer(),
+                "type": t,
+                "qty": float(rng.randint(1, 12)),
+                "description": rng.choice(COMPLAINT_TEXT).format(t=t.lower()) if rng.random() < 0.8 else None,
+            }
+
+    def sg_daily(self) -> Iterator[dict[str, Any]]:
+        rng = self._rng("sg_daily")
+        day, category = self._dates(rng), _weighted(rng, SG_CATEGORIES)
+        for _ in range(self.counts["sg_daily"]):
+            yield {"date": day(), "category": category(), "qty": round(rng.uniform(1, 80), 2), "notes": None}
+
+    def status(self) -> Iterator[dict[str, Any]]:
+        rng = self._rng("status")
+        day = self._dates(rng)
+        pairs = [(m, i) for m, indicators in STATUS_INDICATORS.items() for i in indicators]
+        for _ in range(self.counts["status"]):
+            module, indicator = rng.choice(pairs)
+            goal = rng.choice((80.0, 90.0, 95.0))
+            yield {
+                "date": day(),
+                "module": module,
+                "indicator": indicator,
+                "value": round(min(100.0, rng.gauss(goal - 3, 6)), 1),
+                "goal": goal,
+                "notes": None,
+            }
+
+    def tables(self) -> dict[str, Callable[[], Iterator[dict[str, Any]]]]:
+        return {name: getattr(self, name) for name in SHARES}
+
+
+def _batches(rows: Iterator[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    while batch := list(itertools.islice(rows, size)):
+        yield batch
+
+
+def populate(engine, plan: Plan, batch_size: int = 20_000, progress: Callable[[str, int], None] | None = None) -> dict[str, int]:
+    from sqlalchemy import delete, insert
+    from app.db.models import Goal
+    from app.db.session import Base
+
+    written = {}
+    metadata = Base.metadata.tables
+    with engine.begin() as conn:
+        conn.execute(delete(Goal))
+        conn.execute(insert(Goal), [{"key": k, "value": v, "unit": u} for k, v, u in GOALS])
+    for name, rows in plan.tables().items():
+        table = metadata[name]
+        count = 0
+        for batch in _batches(rows(), batch_size):
+            with engine.begin() as conn:
+                conn.execute(insert(table), batch)
+            count += len(batch)
+            if progress:
+                progress(name, count)
+        written[name] = count
+    return written
+
+
+def write_import_csv(path: str, target_bytes: int, seed: int = 42, end: date | None = None) -> int:
+    # Entries CSV in the import endpoint's column layout, grown until it reaches target_bytes
+    plan = Plan(rows=1 << 40, seed=seed, end=end)
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "shift", "pedidos_m2", "forno_m2", "notes"])
+        for row in plan.entries():
+            writer.writerow([row["date"].isoformat(), row["shift"], row["pedidos_m2"], row["forno_m2"], row["notes"] or ""])
+            rows += 1
+            if rows % 10_000 == 0 and f.tell() >= target_bytes:
+                break
+    return rows
+
+
+def parse_scale(value: str) -> int:
+    return SCALES.get(value.lower()) or int(value.replace("_", ""))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", default="10k", help=f"{', '.join(SCALES)} or a row count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--database-url", required=True)
+    args = parser.parse_args()
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from app.db.session import SessionLocal, create_all_tables, engine
+    from app.services import rollup, search, versions
+
+    create_all_tables()
+    plan = Plan(parse_scale(args.scale), seed=args.seed, days=args.days)
+    started = time.perf_counter()
+    written = populate(engine, plan, progress=lambda t, n: print(f"\r{t:<12} {n:>12,}", end="", flush=True))
+    print()
+    with engine.begin() as conn:
+        search.ensure_index(conn)
+    with SessionLocal() as db:
+        versions.ensure_keys(db)
+        rollup.rebuild(db)
+    elapsed = time.perf_counter() - started
+    total = sum(written.values())
+    print(f"{total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s): {written}")
+
+
+if __name__ == "__main__":
+    main()
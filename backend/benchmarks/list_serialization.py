@@ -0,0 +1,83 @@
+"""Rows/sec of the dataset list serialization: ORM + jsonable_encoder vs Core select + orjson.
+
+Run from backend/:  python -m benchmarks.list_serialization [--rows 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    tmp.close()
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp.name}"
+
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy import desc, insert, select
+    from app.db.models import Entry
+    from app.db.session import SessionLocal, engine, create_all_tables
+
+    create_all_tables()
+    rng = random.Random(42)
+    start = date(2020, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Entry),
+            [
+                {
+                    "date": start + timedelta(days=i // 3),
+                    "shift": ("A", "B", "C")[i % 3],
+                    "pedidos_m2": rng.uniform(500, 1500),
+                    "forno_m2": rng.uniform(400, 1400),
+                    "notes": None if i % 4 else "ok",
+                }
+                for i in range(args.rows)
+            ],
+        )
+
+    def orm_path(db) -> bytes:
+        results = db.query(Entry).order_by(desc(Entry.id)).limit(args.rows).all()
+        payload = []
+        for r in results:
+            d = {c: getattr(r, c) for c in r.__table__.columns.keys()}
+            if d.get("date"):
+                d["date"] = d["date"].isoformat()
+            payload.append(d)
+        return json.dumps(jsonable_encoder(payload)).encode()
+
+    def core_path(db) -> bytes:
+        names = Entry.__table__.columns.keys()
+        stmt = select(*Entry.__table__.c).order_by(desc(Entry.id)).limit(args.rows)
+        return orjson.dumps([dict(zip(names, row)) for row in db.execute(stmt)])
+
+    def core_rows_path(db) -> bytes:
+        stmt = select(*Entry.__table__.c).order_by(desc(Entry.id)).limit(args.rows)
+        return orjson.dumps({"columns": Entry.__table__.columns.keys(), "rows": [tuple(r) for r in db.execute(stmt)]})
+
+    try:
+        for name, fn in (("orm+jsonable_encoder", orm_path), ("core+orjson records", core_path), ("core+orjson rows", core_rows_path)):
+            timings = []
+            for _ in range(args.repeat):
+                with SessionLocal() as db:
+                    t0 = time.perf_counter()
+                    fn(db)
+                    timings.append(time.perf_counter() - t0)
+            best = min(timings)
+            print(f"{name:<24} best {best * 1000:8.1f} ms  {args.rows / best:12,.0f} rows/s")
+    finally:
+        engine.dispose()
+        os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Requests/sec at high concurrency, sync vs async DB mode (DB_ASYNC).
+
+Starts one uvicorn process per mode against the same SQLite file and drives it with
+N concurrent httpx clients for a fixed duration.
+
+Run from backend/:  python -m benchmarks.load_test [--clients 500] [--duration 20]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_ready(base: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{base}/api/v1/openapi.json")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def seed(base: str, rows: int) -> str:
+    async with httpx.AsyncClient(base_url=base, timeout=60) as client:
+        token = (await client.post("/api/v1/auth/seed-admin")).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        existing = (await client.get("/api/v1/datasets/entries?limit=1", headers=headers)).json()
+        if not existing:
+            lines = ["date,shift,pedidos_m2,forno_m2,notes"]
+            lines += [f"2024-{1 + i % 12:02d}-{1 + i % 28:02d},{'ABC'[i % 3]},{i % 900},{i % 800}," for i in range(rows)]
+            await client.post(
+                "/api/v1/datasets/entries/import",
+                files={"file": ("entries.csv", "\n".join(lines).encode())},
+                headers=headers,
+            )
+        return token
+
+
+async def drive(base: str, path: str, token: str, clients: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as client:
+        headers = {"Authorization": f"Bearer {token}"}
+        stop_at = time.monotonic() + duration
+
+        async def worker() -> None:
+            nonlocal errors
+            while time.monotonic() < stop_at:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, headers=headers)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.monotonic() - started
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else float("nan")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+    }
+
+
+def run_mode(db_async: bool, args, database_url: str) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "DATABASE_URL": database_url, "DB_ASYNC": "true" if db_async else "false"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(args.workers), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        asyncio.run(wait_ready(base))
+        token = asyncio.run(seed(base, args.rows))
+        return asyncio.run(drive(base, args.path, token, args.clients, args.duration))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--path", default="/api/v1/datasets/entries?limit=50&from=2024-03-01")
+    parser.add_argument("--database-url", help="defaults to a fresh temporary SQLite file")
+    args = parser.parse_args()
+
+    tmp = None
+    database_url = args.database_url
+    if database_url is None:
+        tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        tmp.close()
+        os.unlink(tmp.name)
+        database_url = f"sqlite:///{tmp.name}"
+    try:
+        print(f"{args.clients} clients, {args.duration:.0f}s, {args.workers} worker(s), GET {args.path}")
+        for db_async in (False, True):
+            r = run_mode(db_async, args, database_url)
+            mode = "async" if db_async else "sync"
+            print(
+                f"{mode:<6} {r['rps']:8.1f} req/s  p50 {r['p50_ms']:7.1f} ms  p95 {r['p95_ms']:7.1f} ms  "
+                f"p99 {r['p99_ms']:7.1f} ms  ok {r['requests']}  errors {r['errors']}"
+            )
+    finally:
+        if tmp is not None and os.path.exists(tmp.name):
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
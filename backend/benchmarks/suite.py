@@ -0,0 +1,300 @@
+"""Scenario benchmarks, in-process through httpx against get_application().
+
+Generates a deterministic dataset (benchmarks.generator), then runs the scenarios and
+prints p50/p95/p99 latency, throughput and peak RSS. With --baseline, results are
+compared against the stored numbers for the same scale and the run exits non-zero on
+any regression beyond --tolerance.
+
+Run from backend/:
+    python -m benchmarks.suite --scale 10k
+    python -m benchmarks.suite --scale 1m --only overview,pagination --baseline benchmarks/baseline.json
+    python -m benchmarks.suite --scale 10k --save-baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Awaitable, Callable
+
+import httpx
+
+from benchmarks.generator import Plan, parse_scale, populate, write_import_csv
+
+
+@dataclass
+class Context:
+    client: httpx.AsyncClient
+    headers: dict[str, str]
+    args: argparse.Namespace
+    workdir: str
+
+
+@dataclass
+class Result:
+    unit: str
+    latencies: list[float] = field(default_factory=list)
+    processed: float = 0.0
+    elapsed: float = 0.0
+    errors: int = 0
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def timed(result: Result, request: Awaitable[httpx.Response]) -> httpx.Response | None:
+    started = time.perf_counter()
+    response = await request
+    result.latencies.append(time.perf_counter() - started)
+    if response.status_code != 200:
+        result.errors += 1
+        return None
+    return response
+
+
+async def overview_polling(ctx: Context) -> Result:
+    # Dashboards polling the overview: mostly cache hits, one recompute per data change
+    result = Result("req")
+
+    async def poller() -> None:
+        for _ in range(ctx.args.polls):
+            await timed(result, ctx.client.get("/api/v1/kpis/overview", headers=ctx.headers))
+            result.processed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(poller() for _ in range(ctx.args.pollers)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+async def timeseries_queries(ctx: Context) -> Result:
+    # Chart queries over the whole generated range, cycling granularity; served from memory
+    result = Result("req")
+    params = {"from": (date.today() - timedelta(days=ctx.args.days - 1)).isoformat()}
+    started = time.perf_counter()
+    for n in range(ctx.args.polls * 4):
+        interval = ("day", "week", "month")[n % 3]
+        await timed(result, ctx.client.get("/api/v1/kpis/timeseries", params={**params, "interval": interval}, headers=ctx.headers))
+        result.processed += 1
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+async def deep_pagination(ctx: Context) -> Result:
+    # Cursor walk over the whole entries table; latency per page should stay flat
+    result = Result("rows")
+    cursor, pages = None, 0
+    started = time.perf_counter()
+    while pages < ctx.args.max_pages:
+        params = {"limit": ctx.args.page_size, **({"cursor": cursor} if cursor else {})}
+        response = await timed(result, ctx.client.get("/api/v1/datasets/entries", params=params, headers=ctx.headers))
+        if response is None:
+            break
+        result.processed += len(response.json())
+        pages += 1
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+async def full_export(ctx: Context) -> Result:
+    result = Result("rows")
+    started = time.perf_counter()
+    for _ in range(ctx.args.exports):
+        request_started = time.perf_counter()
+        async with ctx.client.stream("GET", "/api/v1/datasets/entries/export", headers=ctx.headers) as response:
+            lines = 0
+            async for chunk in response.aiter_bytes():
+                lines += chunk.count(b"\n")
+        result.latencies.append(time.perf_counter() - request_started)
+        if response.status_code != 200:
+            result.errors += 1
+        result.processed += max(0, lines - 1)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+async def bulk_import(ctx: Context) -> Result:
+    result = Result("rows")
+    path = os.path.join(ctx.workdir, "import.csv")
+    rows = write_import_csv(path, int(ctx.args.import_mb * 1024 * 1024), seed=ctx.args.seed + 1)
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        response = await timed(
+            result,
+            ctx.client.post("/api/v1/datasets/entries/import", files={"file": ("import.csv", f)}, headers=ctx.headers),
+        )
+    result.elapsed = time.perf_counter() - started
+    if response is not None:
+        result.processed = response.json()["inserted"]
+        if result.processed != rows:
+            result.errors += 1
+    os.unlink(path)
+    return result
+
+
+async def login_burst(ctx: Context) -> Result:
+    # Concurrent logins: bcrypt in the hash pool, queueing behind it
+    result = Result("req")
+    payload = {"email": "admin@sg.com", "password": "admin123"}
+
+    async def login() -> None:
+        await timed(result, ctx.client.post("/api/v1/auth/login", json=payload))
+        result.processed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(ctx.args.logins)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+SCENARIOS: dict[str, Callable[[Context], Awaitable[Result]]] = {
+    "overview": overview_polling,
+    "timeseries": timeseries_queries,
+    "pagination": deep_pagination,
+    "export": full_export,
+    "import": bulk_import,
+    "login": login_burst,
+}
+
+# metric -> True when higher is worse
+COMPARED = {"p95_ms": True, "throughput": False, "peak_rss_mb": True}
+# Below this many samples p95 is just the slowest request: compare throughput only
+MIN_SAMPLES_FOR_P95 = 20
+
+
+def summarize(result: Result) -> dict[str, float | int | str]:
+    return {
+        "count": len(result.latencies),
+        "errors": result.errors,
+        "p50_ms": round(percentile(result.latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(result.latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(result.latencies, 0.99) * 1000, 2),
+        "throughput": round(result.processed / result.elapsed, 1) if result.elapsed else 0.0,
+        "unit": f"{result.unit}/s",
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def compare(current: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    regressions = []
+    for name, metrics in current.items():
+        if metrics["errors"]:
+            regressions.append(f"{name}: {metrics['errors']} failed request(s)")
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, higher_is_worse in COMPARED.items():
+            old, new = base.get(metric), metrics[metric]
+            if not old or (metric == "p95_ms" and metrics["count"] < MIN_SAMPLES_FOR_P95):
+                continue
+            change = (new - old) / old
+            if (change > tolerance) if higher_is_worse else (change < -tolerance):
+                regressions.append(f"{name}: {metric} {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+async def run(args: argparse.Namespace, workdir: str) -> dict[str, dict]:
+    from app.db.session import create_all_tables, engine
+    from app.main import get_application
+
+    create_all_tables()
+    plan = Plan(parse_scale(args.scale), seed=args.seed, days=args.days)
+    started = time.perf_counter()
+    written = populate(engine, plan)
+    print(f"generated {sum(written.values()):,} rows in {time.perf_counter() - started:.1f}s")
+
+    app = get_application()
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            token = (await client.post("/api/v1/auth/seed-admin")).json()["access_token"]
+            ctx = Context(client, {"Authorization": f"Bearer {token}"}, args, workdir)
+            results = {}
+            for name in args.only:
+                summary = summarize(await SCENARIOS[name](ctx))
+                results[name] = summary
+                print(
+                    f"{name:<11} n={summary['count']:<6} p50 {summary['p50_ms']:>9.1f} ms  p95 {summary['p95_ms']:>9.1f} ms  "
+                    f"p99 {summary['p99_ms']:>9.1f} ms  {summary['throughput']:>12,.1f} {summary['unit']:<7} "
+                    f"peak RSS {summary['peak_rss_mb']:>7.1f} MB  errors {summary['errors']}"
+                )
+            return results
+    finally:
+        await app.router.shutdown()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", default="10k", help="10k, 100k, 1m, 10m or a row count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--only", default=",".join(SCENARIOS), help="comma-separated scenarios")
+    parser.add_argument("--pollers", type=int, default=20)
+    parser.add_argument("--polls", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--max-pages", type=int, default=10_000)
+    parser.add_argument("--exports", type=int, default=3)
+    parser.add_argument("--import-mb", type=float, default=100.0)
+    parser.add_argument("--logins", type=int, default=16)
+    parser.add_argument("--baseline", help="compare against this baseline file")
+    parser.add_argument("--save-baseline", help="write this run's results into this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args()
+    args.only = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(args.only) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory(prefix="sg-bench-") as workdir:
+        # Before any app import: settings and engines are created at import time
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        results = asyncio.run(run(args, workdir))
+
+    key = str(args.scale)
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get(key, {})
+        if not baseline:
+            print(f"no baseline for scale {key} in {args.baseline}")
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            status = 1
+        elif baseline:
+            print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    if args.save_baseline:
+        stored = {}
+        if os.path.exists(args.save_baseline):
+            with open(args.save_baseline) as f:
+                stored = json.load(f)
+        stored[key] = {**stored.get(key, {}), **results}
+        with open(args.save_baseline, "w") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"saved {key} results to {args.save_baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
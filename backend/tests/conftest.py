@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+
+# Before anything imports app.core.config
+_tmp = tempfile.mkdtemp(prefix="sg-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ["IMPORT_SPOOL_DIR"] = os.path.join(_tmp, "spool")
+
+import pytest  # noqa: E402
+from sqlalchemy import delete  # noqa: E402
+from app.db import models  # noqa: E402
+from app.db.session import Base, WriterSessionLocal, create_all_tables  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    from app.services import versions
+
+    create_all_tables()
+    with WriterSessionLocal() as session:
+        versions.ensure_keys(session)
+    yield
+    shutil.rmtree(_tmp, ignore_errors=True)
+
+
+@pytest.fixture
+def db():
+    with WriterSessionLocal() as session:
+        yield session
+    with WriterSessionLocal() as session:
+        # data_versions stays: its counters only ever move forward
+        for table in reversed(Base.metadata.sorted_tables):
+            if table is not models.DataVersion.__table__:
+                session.execute(delete(table))
+        session.commit()
+
+
+@pytest.fixture
+def admin_headers(db):
+    from app.core.security import create_access_token, get_password_hash
+
+    db.add(models.User(email="admin@sg.com", hashed_password=get_password_hash("admin123"), role="ADMIN", is_active=True))
+    db.commit()
+    return {"Authorization": f"Bearer {create_access_token('admin@sg.com')}"}
@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from app.db.models import Delay
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    # No lifespan: the background schedulers stay off
+    return TestClient(app)
+
+
+@pytest.fixture
+def delays(db):
+    # Few distinct dates and customers, so most pages end in the middle of a tie
+    db.add_all([
+        Delay(date=date(2030, 1, 1) + timedelta(days=i % 4), order_code=f"P{i:03d}", customer=f"Cliente {i % 3}",
+              days_late=i % 5, reason="Transporte", order_value=None if i % 2 else 100.0)
+        for i in range(40)
+    ])
+    db.commit()
+
+
+def walk(client, headers, params: dict) -> list[int]:
+    ids, cursor = [], None
+    while True:
+        page = {**params, "limit": 7, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/api/v1/datasets/delays", params=page, headers=headers)
+        assert r.status_code == 200
+        ids += [row["id"] for row in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("params", [{}, {"order_by": "date"}, {"order_by": "customer", "desc": "true"}, {"order_by": "days_late"}])
+def test_cursor_pages_are_disjoint_and_complete(client, admin_headers, delays, params):
+    everything = client.get("/api/v1/datasets/delays", params={**params, "limit": 1000}, headers=admin_headers).json()
+    ids = walk(client, admin_headers, params)
+    assert len(ids) == len(set(ids)) == 40
+    assert ids == [row["id"] for row in everything]
+
+
+def test_no_cursor_for_nullable_sort_column(client, admin_headers, delays):
+    r = client.get("/api/v1/datasets/delays", params={"order_by": "order_value", "limit": 7}, headers=admin_headers)
+    assert r.status_code == 200
+    assert "X-Next-Cursor" not in r.headers
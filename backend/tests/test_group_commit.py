@@ -0,0 +1,52 @@
+import asyncio
+from datetime import date
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from app.core.config import settings
+from app.db.models import Entry
+from app.services import group_commit
+
+
+def entry(day: int, forno: float | None = 7.5) -> dict:
+    return {"date": date(2030, 1, day), "shift": "A", "pedidos_m2": 10.0, "forno_m2": forno, "notes": None}
+
+
+async def insert_together(writer: group_commit.GroupCommitWriter, rows: list[dict]) -> list:
+    try:
+        return await asyncio.gather(*(writer.insert(Entry, row) for row in rows), return_exceptions=True)
+    finally:
+        await writer.stop()
+
+
+@pytest.fixture
+def one_group(monkeypatch):
+    # A long window and room for everything: the rows of one test land in a single flush
+    monkeypatch.setattr(settings, "group_commit_window_ms", 200.0)
+    monkeypatch.setattr(settings, "group_commit_max_rows", 500)
+
+
+def test_failed_flush_fails_every_waiter(db, one_group, monkeypatch):
+    calls = []
+
+    def broken(items):
+        calls.append(len(items))
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(group_commit, "write_items", broken)
+    results = asyncio.run(insert_together(group_commit.GroupCommitWriter(), [entry(d) for d in (1, 2, 3)]))
+
+    assert calls == [3]
+    assert all(isinstance(r, OperationalError) for r in results)
+    assert db.scalar(select(func.count()).select_from(Entry)) == 0
+
+
+def test_bad_row_falls_back_to_one_transaction_per_row(db, one_group):
+    rows = [entry(1), entry(2, forno=None), entry(3)]
+    results = asyncio.run(insert_together(group_commit.GroupCommitWriter(), rows))
+
+    assert isinstance(results[1], IntegrityError)
+    assert [r["date"] for r in (results[0], results[2])] == [date(2030, 1, 1), date(2030, 1, 3)]
+    stored = db.execute(select(Entry.id, Entry.date).order_by(Entry.id)).all()
+    assert [(r.id, r.date) for r in stored] == [(results[0]["id"], date(2030, 1, 1)), (results[2]["id"], date(2030, 1, 3))]
+
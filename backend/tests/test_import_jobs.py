@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import func, select, update
+from app.core.config import settings
+from app.db.models import Entry, ImportJob
+from app.services import import_jobs, importer
+
+
+@pytest.fixture
+def job(db, tmp_path):
+    spool = tmp_path / "job.csv"
+    spool.write_text("date,shift,pedidos_m2,forno_m2\n")
+    db.add(ImportJob(id="job1", dataset="entries", spool_path=str(spool), size_bytes=spool.stat().st_size, chunk_size=10, created_by="test"))
+    db.commit()
+    return "job1"
+
+
+def expire_heartbeat(db, job_id: str) -> None:
+    stale = import_jobs.utcnow() - timedelta(seconds=settings.import_job_heartbeat_timeout_s + 1)
+    db.execute(update(ImportJob).where(ImportJob.id == job_id).values(heartbeat_at=stale))
+    db.commit()
+
+
+def test_running_job_is_not_reclaimed_while_its_heartbeat_is_fresh(db, job):
+    assert import_jobs._claim(db, job, "worker-a")
+    assert not import_jobs._claim(db, job, "worker-b")
+
+
+def test_stale_worker_checkpoint_is_rejected_after_reclaim(db, job, monkeypatch):
+    assert import_jobs._claim(db, job, "worker-a")
+    import_jobs._checkpoint(db, job, "worker-a", checkpoint_line=10, inserted=10)
+    db.commit()
+
+    expire_heartbeat(db, job)
+    submitted = []
+    monkeypatch.setattr(import_jobs, "submit", submitted.append)
+    assert import_jobs.sweep() == [job]
+    assert submitted == [job]
+    assert import_jobs._claim(db, job, "worker-b")
+
+    # worker-a wakes up and tries to commit its next chunk with the checkpoint
+    importer.write_rows(db, Entry, [{"date": date(2030, 1, 1), "shift": "A", "pedidos_m2": 10.0, "forno_m2": 7.5}])
+    with pytest.raises(import_jobs._Stop) as stop:
+        import_jobs._checkpoint(db, job, "worker-a", checkpoint_line=20, inserted=1)
+    assert stop.value.status == "lost"
+    assert db.scalar(select(func.count()).select_from(Entry)) == 0
+
+    import_jobs._checkpoint(db, job, "worker-b", checkpoint_line=20, inserted=10)
+    db.commit()
+    stored = db.get(ImportJob, job)
+    db.refresh(stored)
+    assert (stored.claimed_by, stored.checkpoint_line, stored.inserted, stored.attempts) == ("worker-b", 20, 20, 2)